@@ -1,6 +1,10 @@
 import os
 from datetime import datetime, timedelta
 
+from utils.log import get_logger
+
+logger = get_logger('plaid')
+
 # Try to import Plaid, but handle gracefully if not configured
 try:
     import plaid
@@ -45,13 +49,13 @@ class PlaidClient:
                 api_client = ApiClient(configuration)
                 self.client = plaid_api.PlaidApi(api_client)
             except Exception as e:
-                print(f"Warning: Could not initialize Plaid client: {e}")
+                logger.warning("Could not initialize Plaid client: %s", e)
                 self.client = None
     
     def create_link_token(self, user_id):
         """Create a link token for Plaid Link"""
         if not self.client:
-            print("Plaid client not initialized. Please set up your Plaid credentials.")
+            logger.warning("Plaid client not initialized. Please set up your Plaid credentials.")
             return None
             
         try:
@@ -65,7 +69,7 @@ class PlaidClient:
             response = self.client.link_token_create(request)
             return response['link_token']
         except Exception as e:
-            print(f"Error creating link token: {e}")
+            logger.error("Error creating link token: %s", e)
             return None
     
     def exchange_public_token(self, public_token):
@@ -78,7 +82,7 @@ class PlaidClient:
             response = self.client.item_public_token_exchange(request)
             return response['access_token']
         except Exception as e:
-            print(f"Error exchanging public token: {e}")
+            logger.error("Error exchanging public token: %s", e)
             raise e
     
     def get_accounts(self, access_token):
@@ -105,7 +109,7 @@ class PlaidClient:
             
             return accounts
         except Exception as e:
-            print(f"Error getting accounts: {e}")
+            logger.error("Error getting accounts: %s", e)
             raise e
     
     def get_transactions(self, access_token, start_date=None, end_date=None, count=500):
@@ -143,13 +147,13 @@ class PlaidClient:
             
             return transactions
         except Exception as e:
-            print(f"Error getting transactions: {e}")
+            logger.error("Error getting transactions: %s", e)
             raise e
     
     def get_account_balance(self, access_token, account_id):
         """Get current balance for a specific account"""
         if not self.client:
-            print("Plaid client not initialized. Please set up your Plaid credentials.")
+            logger.warning("Plaid client not initialized. Please set up your Plaid credentials.")
             return None
             
         try:
@@ -159,5 +163,5 @@ class PlaidClient:
                     return account['balances']['current']
             return None
         except Exception as e:
-            print(f"Error getting account balance: {e}")
+            logger.error("Error getting account balance: %s", e)
             return None
\ No newline at end of file
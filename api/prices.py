@@ -0,0 +1,148 @@
+import random
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from datetime import timedelta
+
+from utils.log import get_logger
+
+logger = get_logger('prices')
+
+class PriceProvider(ABC):
+    """Source of market quotes. Implementations take a batch of symbols per call."""
+
+    # Most symbols a single get_quotes call may be given
+    max_batch_size = 100
+
+    @abstractmethod
+    def get_quotes(self, symbols):
+        """Latest price for each symbol, as {symbol: price}; unknown symbols are omitted"""
+
+    @abstractmethod
+    def get_history(self, symbols, start, end):
+        """Daily closes between start and end, as {symbol: [(date, close), ...]}"""
+
+class FakePriceProvider(PriceProvider):
+    """Local provider for development and tests.
+
+    Quotes drift within ±5% of a reference price; history is a seeded random walk.
+    """
+
+    REFERENCE_PRICES = {
+        'AAPL': 190.0,
+        'MSFT': 420.0,
+        'GOOGL': 170.0,
+        'AMZN': 180.0,
+        'TSLA': 250.0,
+        'NVDA': 120.0,
+        'VOO': 500.0,
+        'SPY': 550.0,
+    }
+
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+
+    def get_quotes(self, symbols):
+        return {
+            symbol: round(self.reference_price(symbol) * (1 + self.random.uniform(-0.05, 0.05)), 2)
+            for symbol in symbols
+        }
+
+    def get_history(self, symbols, start, end):
+        """A reproducible random walk per symbol that ends near its reference price"""
+        history = {}
+        days = (end - start).days + 1
+        for symbol in symbols:
+            walk = random.Random(f'{symbol}:{start}:{end}')
+            closes = [self.reference_price(symbol)]
+            for _ in range(days - 1):
+                closes.append(closes[-1] / (1 + walk.gauss(0.0003, 0.015)))
+            closes.reverse()
+            history[symbol] = [
+                (start + timedelta(days=i), round(close, 2)) for i, close in enumerate(closes)
+            ]
+        return history
+
+    def reference_price(self, symbol):
+        """Fixed price for well-known symbols, otherwise a stable one derived from the symbol"""
+        if symbol in self.REFERENCE_PRICES:
+            return self.REFERENCE_PRICES[symbol]
+        return 10 + zlib.crc32(symbol.encode()) % 49000 / 100
+
+PRICE_PROVIDERS = {
+    'fake': FakePriceProvider
+}
+
+def create_price_provider(name):
+    """Instantiate a registered price provider by name"""
+    try:
+        return PRICE_PROVIDERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown price provider '{name}'; available: {', '.join(PRICE_PROVIDERS)}")
+
+class PriceCache:
+    """Process-wide symbol -> price cache shared by every user.
+
+    Symbols missing or older than `ttl` seconds are fetched together in batches,
+    so any number of holders of one symbol cost a single quote per interval.
+    Concurrent refreshes are serialized, and a refresh that waited re-checks the
+    cache before calling the provider.
+    """
+
+    def __init__(self, provider, ttl=60):
+        self.provider = provider
+        self.ttl = ttl
+        self._prices = {}
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+
+    def get_prices(self, symbols):
+        """Current prices for symbols, quoting only those not cached within the TTL"""
+        symbols = set(symbols)
+        prices, stale = self._lookup(symbols)
+        if not stale:
+            return prices
+
+        with self._fetch_lock:
+            fresh, stale = self._lookup(stale)
+            prices.update(fresh)
+            if stale:
+                prices.update(self._fetch(sorted(stale)))
+        return prices
+
+    def invalidate(self, symbols=None):
+        with self._lock:
+            if symbols is None:
+                self._prices.clear()
+            else:
+                for symbol in symbols:
+                    self._prices.pop(symbol, None)
+
+    def _lookup(self, symbols):
+        now = time.monotonic()
+        found, stale = {}, []
+        with self._lock:
+            for symbol in symbols:
+                cached = self._prices.get(symbol)
+                if cached is not None and now - cached[1] < self.ttl:
+                    found[symbol] = cached[0]
+                else:
+                    stale.append(symbol)
+        return found, stale
+
+    def _fetch(self, symbols):
+        quotes = {}
+        size = self.provider.max_batch_size
+        for i in range(0, len(symbols), size):
+            batch = symbols[i:i + size]
+            try:
+                quotes.update(self.provider.get_quotes(batch))
+            except Exception:
+                logger.exception("Price provider failed for %d symbols", len(batch))
+
+        now = time.monotonic()
+        with self._lock:
+            for symbol, price in quotes.items():
+                self._prices[symbol] = (price, now)
+        return quotes
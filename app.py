@@ -1,19 +1,43 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
 import os
 from datetime import datetime, timedelta
 import json
+import base64
+import time
+import click
+from types import SimpleNamespace
 
 from config import Config
 from models.database import db, User, Account, Transaction
-from nlp.intent_classifier import IntentClassifier
-from models.forecasting import CashFlowForecaster
-from api.plaid_client import PlaidClient
-from utils.helpers import format_currency, categorize_transaction
+from models.budgets import BudgetEngine
+from models.timeline import TimelineCache, period_windows
+from models.search import TransactionSearch
+from models.schema import ensure_schema
+from models.synthetic import generate_users, load_demo_data
+from models.reports import ReportStore, render_report_text
+from models.exports import EXPORT_FORMATS, export_chunks
+from models.report_jobs import ReportJobQueue, JobLimitExceeded
+from models.portfolio import PortfolioValuation, backfill_price_history, refresh_prices
+from models.goals import GoalProjector, DEFAULT_SCENARIO_RATES
+from models.notifications import NotificationCenter, serialize_notification
+from api.prices import PriceCache, create_price_provider
+from utils.helpers import format_currency, categorize_transaction, add_months
+from utils.concurrency import run_parallel
+from utils.http_cache import conditional_json, bump_data_version
+from utils.log import get_logger, init_app as init_logging, log_event, hash_user_id
+from utils.json_provider import FastJSONProvider
+from utils.compression import init_app as init_compression
+from utils.identity import init_app as init_identity
+from utils.query_stats import init_app as init_query_stats
+from utils.profiling import RequestProfiler, init_app as init_profiling, sign_profile_token, verify_profile_token
+from utils.passwords import PasswordHasher, HashingOverloaded
+from utils.lazy import LazyComponent
+import logging
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 app.config.from_object(Config)
 
 # Initialize extensions
@@ -21,15 +45,57 @@ db.init_app(app)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
+init_logging(app)
+init_query_stats(app)
+init_compression(app)
+init_identity(app, login_manager)
+request_profiler = RequestProfiler()
+init_profiling(app, request_profiler)
 
-# Initialize components
-intent_classifier = IntentClassifier()
-forecaster = CashFlowForecaster()
-plaid_client = PlaidClient()
+logger = get_logger('app')
+chat_logger = get_logger('chat')
 
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
+def _create_intent_classifier():
+    from nlp.intent_classifier import IntentClassifier
+    return IntentClassifier()
+
+def _create_forecaster():
+    from models.forecasting import CashFlowForecaster
+    return CashFlowForecaster()
+
+def _create_plaid_client():
+    # Importing the client pulls in the whole Plaid SDK when it is installed
+    from api.plaid_client import PlaidClient
+    return PlaidClient()
+
+# Initialize components; the heavier ones are built on first use to keep cold starts short
+intent_classifier = LazyComponent(_create_intent_classifier)
+forecaster = LazyComponent(_create_forecaster)
+budget_engine = BudgetEngine()
+spending_timelines = TimelineCache(ttl=Config.TIMELINE_CACHE_TTL)
+transaction_search = TransactionSearch()
+goal_projector = GoalProjector(spending_timelines)
+notification_center = NotificationCenter(
+    warning_percent=budget_engine.warning_percent,
+    large_amount=Config.LARGE_TRANSACTION_ALERT,
+    low_balance=Config.LOW_BALANCE_ALERT
+)
+report_store = ReportStore()
+report_jobs = ReportJobQueue(
+    report_store,
+    max_workers=Config.REPORT_WORKERS,
+    per_user_limit=Config.REPORT_JOBS_PER_USER,
+    timeout=Config.REPORT_JOB_TIMEOUT
+)
+plaid_client = LazyComponent(_create_plaid_client)
+password_hasher = PasswordHasher(
+    scheme=Config.PASSWORD_HASH_SCHEME,
+    bcrypt_rounds=Config.BCRYPT_LOG_ROUNDS,
+    pbkdf2_iterations=Config.PBKDF2_ITERATIONS,
+    max_workers=Config.PASSWORD_HASH_WORKERS,
+    max_pending=Config.PASSWORD_HASH_MAX_PENDING
+)
+price_cache = PriceCache(create_price_provider(Config.PRICE_PROVIDER), ttl=Config.PRICE_CACHE_TTL)
 
 @app.route('/')
 def index():
@@ -48,10 +114,15 @@ def register():
         if User.query.filter_by(email=email).first():
             return jsonify({'error': 'Email already registered'}), 400
         
+        try:
+            password_hash = password_hasher.hash(password)
+        except HashingOverloaded:
+            return busy_response()
+        
         user = User(
             email=email,
             name=name,
-            password_hash=generate_password_hash(password)
+            password_hash=password_hash
         )
         db.session.add(user)
         db.session.commit()
@@ -70,14 +141,34 @@ def login():
         
         user = User.query.filter_by(email=email).first()
         
-        if user and check_password_hash(user.password_hash, password):
-            login_user(user)
-            return jsonify({'success': True, 'redirect': url_for('dashboard')})
+        if user:
+            try:
+                matches, needs_rehash = password_hasher.verify(password, user.password_hash)
+            except HashingOverloaded:
+                return busy_response()
+            
+            if matches:
+                if needs_rehash:
+                    # Upgrade to the current scheme and cost while we have the plaintext
+                    try:
+                        user.password_hash = password_hasher.hash(password)
+                        db.session.commit()
+                    except HashingOverloaded:
+                        pass  # Keep the old hash; a later login upgrades it
+                login_user(user)
+                return jsonify({'success': True, 'redirect': url_for('dashboard')})
         
         return jsonify({'error': 'Invalid credentials'}), 401
     
     return render_template('auth/login.html')
 
+def busy_response():
+    """503 asking the client to retry once password hashing has capacity again"""
+    response = jsonify({'error': 'Server is busy, please try again'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
 @app.route('/logout')
 @login_required
 def logout():
@@ -88,8 +179,9 @@ def logout():
 @login_required
 def dashboard():
     try:
-        # Get user's accounts and recent transactions
-        accounts = Account.query.filter_by(user_id=current_user.id).all()
+        # Get user's accounts, recent transactions and this month's category spending concurrently
+        data = load_dashboard_data(current_user.id)
+        accounts = data['accounts']
         
         # Auto-create demo data for new users (first time visiting dashboard)
         if not accounts:
@@ -97,39 +189,30 @@ def dashboard():
                 create_demo_accounts_and_transactions(current_user.id)
                 # Refresh the session to get the new accounts
                 db.session.expire_all()
-                accounts = Account.query.filter_by(user_id=current_user.id).all()
-            except Exception as e:
-                print(f"Error creating demo data: {e}")
+                data = load_dashboard_data(current_user.id)
+                accounts = data['accounts']
+            except Exception:
+                db.session.rollback()
+                logger.exception("Error creating demo data")
                 # If demo data creation fails, continue with empty accounts
                 accounts = []
         
-        recent_transactions = Transaction.query.filter_by(user_id=current_user.id)\
-            .order_by(Transaction.date.desc()).limit(10).all()
+        recent_transactions = data['recent_transactions']
+        monthly_spending = data['monthly_spending']
         
         # Calculate total balance
         total_balance = sum(account.balance for account in accounts) if accounts else 0
         
-        # Get spending by category for current month
-        current_month = datetime.now().replace(day=1)
-        monthly_spending = db.session.query(
-            Transaction.category, 
-            db.func.sum(Transaction.amount).label('total')
-        ).filter(
-            Transaction.user_id == current_user.id,
-            Transaction.date >= current_month,
-            Transaction.amount < 0  # Only expenses
-        ).group_by(Transaction.category).all()
-        
         return render_template('dashboard.html', 
                              accounts=accounts,
                              recent_transactions=recent_transactions,
                              total_balance=total_balance,
                              monthly_spending=monthly_spending)
     
-    except Exception as e:
+    except Exception:
         # Handle any database session issues
         db.session.rollback()
-        print(f"Dashboard error: {e}")
+        logger.exception("Dashboard error")
         
         # Return dashboard with empty data if there's an error
         return render_template('dashboard.html', 
@@ -138,20 +221,34 @@ def dashboard():
                              total_balance=0,
                              monthly_spending=[])
 
+def load_dashboard_data(user_id):
+    """Load the dashboard's independent queries concurrently"""
+    current_month = datetime.now().replace(day=1)
+    
+    return run_parallel(
+        accounts=lambda: Account.query.filter_by(user_id=user_id).all(),
+        recent_transactions=lambda: Transaction.query.filter_by(user_id=user_id)
+            .order_by(Transaction.date.desc()).limit(10).all(),
+        monthly_spending=lambda: db.session.query(
+            Transaction.category,
+            db.func.sum(Transaction.amount).label('total')
+        ).filter(
+            Transaction.user_id == user_id,
+            Transaction.date >= current_month,
+            Transaction.amount < 0  # Only expenses
+        ).group_by(Transaction.category).all()
+    )
+
 @app.route('/chat', methods=['POST'])
 @login_required
 def chat():
     user_message = request.json.get('message', '')
     
-    # Debug logging
-    print(f"User message: {user_message}")
-    
     # Process message through NLP
     try:
         intent, confidence = intent_classifier.classify_intent(user_message)
-        print(f"Intent: {intent}, Confidence: {confidence}")
-    except Exception as e:
-        print(f"Intent classification error: {e}")
+    except Exception:
+        logger.exception("Intent classification error")
         intent, confidence = 'general_help', 0.5
     
     # Lower confidence threshold for better responses
@@ -168,7 +265,11 @@ def chat():
 
 def process_financial_query(intent, message):
     """Process different types of financial queries"""
-    print(f"Processing intent: {intent} for message: {message}")
+    # Message contents are never logged, only their length
+    log_event(chat_logger, logging.INFO, 'chat_query',
+              intent=intent,
+              message_length=len(message),
+              user=hash_user_id(current_user.id))
     
     if intent == 'greeting':
         return f"Hello {current_user.name}! 👋 I'm your Finance Mentor AI. I can help you with your balance, spending analysis, financial forecasts, savings advice, and more. What would you like to know about your finances today?"
@@ -383,6 +484,7 @@ Connect your accounts for personalized advice based on your actual spending patt
 
 @app.route('/api/forecast')
 @login_required
+@conditional_json
 def api_forecast():
     """API endpoint for cash flow forecast"""
     try:
@@ -396,6 +498,7 @@ def api_forecast():
 
 @app.route('/api/insights')
 @login_required
+@conditional_json
 def api_insights():
     """API endpoint for spending insights"""
     try:
@@ -404,6 +507,154 @@ def api_insights():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/dashboard/snapshot')
+@login_required
+@conditional_json
+def dashboard_snapshot():
+    """API endpoint returning everything the dashboard needs in one response"""
+    try:
+        return jsonify(build_dashboard_snapshot(current_user.id))
+    except Exception as e:
+        logger.exception("Dashboard snapshot error")
+        return jsonify({'error': str(e)}), 500
+
+def build_dashboard_snapshot(user_id, recent_limit=10):
+    """Build balances, transactions, spending and forecast from one prepared dataset"""
+    # One concurrent load of the forecast window (last 365 days) and the accounts
+    dataset = forecaster.load_dataset(user_id)
+    accounts = dataset['accounts']
+    transactions = dataset['transactions']  # Sorted by date, oldest first
+    
+    current_month = datetime.now().date().replace(day=1)
+    category_spending = {}
+    for t in transactions:
+        if t.date >= current_month and t.amount < 0:
+            category_spending[t.category] = category_spending.get(t.category, 0) + abs(t.amount)
+    
+    recent_transactions = sorted(transactions, key=lambda t: (t.date, t.id), reverse=True)[:recent_limit]
+    
+    return {
+        'accounts': [
+            {'id': a.id, 'name': a.name, 'type': a.account_type, 'balance': a.balance}
+            for a in accounts
+        ],
+        'total_balance': sum(a.balance for a in accounts),
+        'recent_transactions': [
+            {
+                'id': t.id,
+                'date': t.date.isoformat(),
+                'description': t.description,
+                'category': t.category,
+                'amount': t.amount
+            }
+            for t in recent_transactions
+        ],
+        'category_spending': category_spending,
+        'forecast': forecaster.predict_cash_flow(user_id, dataset=dataset)
+    }
+
+TRANSACTION_FIELDS = {
+    'id': Transaction.id,
+    'date': Transaction.date,
+    'description': Transaction.description,
+    'category': Transaction.category,
+    'amount': Transaction.amount,
+    'account_id': Transaction.account_id
+}
+
+@app.route('/api/transactions')
+@login_required
+@conditional_json
+def list_transactions():
+    """Keyset-paginated transactions, newest first"""
+    account_id = request.args.get('account_id', type=int)
+    if account_id is not None and account_id not in current_user.account_ids:
+        return jsonify({'error': 'Unknown account_id'}), 404
+    
+    try:
+        page = get_transactions_page(
+            current_user.id,
+            limit=min(max(request.args.get('limit', 50, type=int), 1), 500),
+            cursor=request.args.get('cursor'),
+            category=request.args.get('category'),
+            account_id=account_id,
+            min_amount=request.args.get('min_amount', type=float),
+            max_amount=request.args.get('max_amount', type=float),
+            fields=request.args.get('fields')
+        )
+        return jsonify(page)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/transactions/search')
+@login_required
+@conditional_json
+def search_transactions():
+    """Full-text search over the user's transaction descriptions, best matches first"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'q is required'}), 400
+    
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    results = transaction_search.search(current_user.id, query, limit=limit)
+    return jsonify({'query': query, 'results': results})
+
+def encode_cursor(day, transaction_id):
+    return base64.urlsafe_b64encode(f"{day.isoformat()}|{transaction_id}".encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        day, transaction_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.strptime(day, '%Y-%m-%d').date(), int(transaction_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def get_transactions_page(user_id, limit=50, cursor=None, category=None, account_id=None,
+                          min_amount=None, max_amount=None, fields=None):
+    """One page of a user's transactions ordered by (date, id) descending"""
+    names = [name.strip() for name in fields.split(',')] if fields else list(TRANSACTION_FIELDS)
+    unknown = [name for name in names if name not in TRANSACTION_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    
+    # date and id are always fetched because the next cursor is built from them
+    columns = [Transaction.date, Transaction.id] + [
+        TRANSACTION_FIELDS[name] for name in names if name not in ('date', 'id')
+    ]
+    
+    query = db.session.query(*columns).filter(Transaction.user_id == user_id)
+    if category:
+        query = query.filter(Transaction.category == category)
+    if account_id is not None:
+        query = query.filter(Transaction.account_id == account_id)
+    if min_amount is not None:
+        query = query.filter(Transaction.amount >= min_amount)
+    if max_amount is not None:
+        query = query.filter(Transaction.amount <= max_amount)
+    if cursor:
+        last_date, last_id = decode_cursor(cursor)
+        query = query.filter(db.or_(
+            Transaction.date < last_date,
+            db.and_(Transaction.date == last_date, Transaction.id < last_id)
+        ))
+    
+    rows = query.order_by(Transaction.date.desc(), Transaction.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    transactions = []
+    for row in rows:
+        item = {name: getattr(row, name) for name in names}
+        if 'date' in item:
+            item['date'] = item['date'].isoformat()
+        transactions.append(item)
+    
+    return {
+        'transactions': transactions,
+        'next_cursor': encode_cursor(rows[-1].date, rows[-1].id) if has_more else None,
+        'has_more': has_more
+    }
+
 @app.route('/test_chat')
 @login_required
 def test_chat():
@@ -434,38 +685,7 @@ def test_chat():
 def create_demo_data():
     """Create demo financial data for testing"""
     try:
-        # Create demo accounts
-        demo_accounts = [
-            {'name': 'Demo Checking Account', 'type': 'depository', 'balance': 2500.00},
-            {'name': 'Demo Savings Account', 'type': 'depository', 'balance': 8750.00},
-        ]
-        
-        for account_data in demo_accounts:
-            # Create unique plaid_account_id for each user
-            plaid_account_id = f"demo_{current_user.id}_{account_data['name'].lower().replace(' ', '_')}"
-            
-            # Check if account already exists
-            existing = Account.query.filter_by(
-                user_id=current_user.id,
-                plaid_account_id=plaid_account_id
-            ).first()
-            
-            if not existing:
-                account = Account(
-                    user_id=current_user.id,
-                    plaid_account_id=plaid_account_id,
-                    access_token='demo_token',
-                    name=account_data['name'],
-                    account_type=account_data['type'],
-                    balance=account_data['balance']
-                )
-                db.session.add(account)
-        
-        db.session.commit()
-        
-        # Create demo transactions
-        create_demo_transactions(current_user.id)
-        
+        create_demo_accounts_and_transactions(current_user.id)
         return jsonify({'success': True, 'message': 'Demo data created successfully!'})
     
     except Exception as e:
@@ -497,6 +717,7 @@ def connect_account():
             )
             db.session.add(account)
         
+        bump_data_version([current_user.id])
         db.session.commit()
         
         # Fetch initial transactions
@@ -518,6 +739,7 @@ def fetch_transactions_for_user(user_id):
                 start_date=datetime.now() - timedelta(days=365)
             )
             
+            new_transactions = []
             for trans_data in transactions_data:
                 # Check if transaction already exists
                 existing = Transaction.query.filter_by(
@@ -535,137 +757,74 @@ def fetch_transactions_for_user(user_id):
                         category=categorize_transaction(trans_data)
                     )
                     db.session.add(transaction)
+                    new_transactions.append(transaction)
             
-            db.session.commit()
+            commit_new_transactions(new_transactions)
             
-        except Exception as e:
-            print(f"Error fetching transactions for account {account.id}: {e}")
+        except Exception:
+            logger.exception("Error fetching transactions for account %s", account.id)
 
-def create_demo_accounts_and_transactions(user_id):
-    """Create demo accounts and transactions for new users"""
-    # Create demo accounts
-    demo_accounts = [
-        {'name': 'Demo Checking Account', 'type': 'depository', 'balance': 2500.00},
-        {'name': 'Demo Savings Account', 'type': 'depository', 'balance': 8750.00},
-    ]
+def commit_new_transactions(transactions):
+    """Commit newly ingested transactions and update the state derived from them"""
+    budget_engine.record_transactions(transactions)
+    notifications = notification_center.evaluate(transactions)
+    entries = [(t.user_id, t.date, t.amount) for t in transactions]
+    if entries:
+        bump_data_version(user_id for user_id, _, _ in entries)
+        report_store.invalidate((user_id, day) for user_id, day, _ in entries)
     
-    for account_data in demo_accounts:
-        # Create unique plaid_account_id for each user
-        plaid_account_id = f"demo_{user_id}_{account_data['name'].lower().replace(' ', '_')}"
-        
-        # Check if account already exists for this user
-        existing_account = Account.query.filter_by(
-            user_id=user_id,
-            plaid_account_id=plaid_account_id
-        ).first()
-        
-        if not existing_account:
-            account = Account(
-                user_id=user_id,
-                plaid_account_id=plaid_account_id,
-                access_token='demo_token',
-                name=account_data['name'],
-                account_type=account_data['type'],
-                balance=account_data['balance']
-            )
-            db.session.add(account)
+    db.session.commit()
     
-    try:
-        db.session.commit()
-        # Create demo transactions
-        create_demo_transactions(user_id)
-    except Exception as e:
-        db.session.rollback()
-        print(f"Error creating demo accounts: {e}")
+    spending_timelines.record(entries)
+    notification_center.publish(notifications)
 
-def create_demo_transactions(user_id):
-    """Create demo transactions for testing"""
-    import random
-    from datetime import date, timedelta
-    
-    # Get user's accounts
-    accounts = Account.query.filter_by(user_id=user_id).all()
-    if not accounts:
-        return
-    
-    checking_account = accounts[0]  # Use first account for transactions
-    
-    # Demo transaction templates
-    demo_transactions = [
-        {'description': 'Starbucks Coffee', 'category': 'Food and Drink', 'amount_range': (-5, -15)},
-        {'description': 'Grocery Store', 'category': 'Food and Drink', 'amount_range': (-50, -120)},
-        {'description': 'Gas Station', 'category': 'Transportation', 'amount_range': (-30, -60)},
-        {'description': 'Netflix Subscription', 'category': 'Entertainment', 'amount_range': (-15, -20)},
-        {'description': 'Amazon Purchase', 'category': 'Shopping', 'amount_range': (-25, -100)},
-        {'description': 'Electric Bill', 'category': 'Bills', 'amount_range': (-80, -150)},
-        {'description': 'Salary Deposit', 'category': 'Income', 'amount_range': (2000, 3000)},
-        {'description': 'Restaurant Dinner', 'category': 'Food and Drink', 'amount_range': (-40, -80)},
-        {'description': 'Uber Ride', 'category': 'Transportation', 'amount_range': (-15, -35)},
-        {'description': 'Gym Membership', 'category': 'Health', 'amount_range': (-30, -50)},
-    ]
+def commit_bulk_transactions(rows):
+    """Commit bulk-inserted transaction rows and update the state derived from them.
+
+    Like commit_new_transactions, but for backfilled history: no alerts are raised.
+    """
+    transactions = [SimpleNamespace(**row) for row in rows]
+    budget_engine.record_transactions(transactions)
+    entries = [(t.user_id, t.date, t.amount) for t in transactions]
+    if entries:
+        bump_data_version(user_id for user_id, _, _ in entries)
+        report_store.invalidate((user_id, day) for user_id, day, _ in entries)
     
-    # Create transactions for the last 60 days
-    start_date = date.today() - timedelta(days=60)
+    db.session.commit()
     
-    try:
-        for i in range(45):  # Create 45 transactions
-            transaction_template = random.choice(demo_transactions)
-            transaction_date = start_date + timedelta(days=random.randint(0, 60))
-            amount = random.uniform(*transaction_template['amount_range'])
-            
-            # Create unique transaction ID
-            import time
-            plaid_transaction_id = f"demo_trans_{user_id}_{i}_{int(time.mktime(transaction_date.timetuple()))}"
-            
-            # Check if transaction already exists (avoid duplicates)
-            existing = Transaction.query.filter_by(
-                plaid_transaction_id=plaid_transaction_id
-            ).first()
-            
-            if not existing:
-                transaction = Transaction(
-                    user_id=user_id,
-                    account_id=checking_account.id,
-                    plaid_transaction_id=plaid_transaction_id,
-                    amount=amount,
-                    date=transaction_date,
-                    description=transaction_template['description'],
-                    category=transaction_template['category']
-                )
-                db.session.add(transaction)
-        
-        db.session.commit()
-    except Exception as e:
-        db.session.rollback()
-        print(f"Error creating demo transactions: {e}")
+    spending_timelines.record(entries)
+
+def create_demo_accounts_and_transactions(user_id):
+    """Create demo accounts and a couple of months of generated history for a user"""
+    rows = load_demo_data(user_id)
+    # New accounts change the user's cached identity even when no history was added
+    bump_data_version([user_id])
+    commit_bulk_transactions(rows)
 
 # Additional routes for new pages
 @app.route('/analytics')
 @login_required
 def analytics():
     """Advanced analytics and insights page"""
-    # Get comprehensive financial data
-    accounts = Account.query.filter_by(user_id=current_user.id).all()
-    transactions = Transaction.query.filter_by(user_id=current_user.id)\
-        .order_by(Transaction.date.desc()).limit(100).all()
+    user_id = current_user.id
     
-    # Calculate analytics
-    analytics_data = calculate_analytics(current_user.id)
+    # Get accounts and analytics concurrently; transactions are paged in by the browser from /api/transactions
+    data = run_parallel(
+        accounts=lambda: Account.query.filter_by(user_id=user_id).all(),
+        analytics=lambda: calculate_analytics(user_id)
+    )
     
     return render_template('analytics.html', 
-                         accounts=accounts,
-                         transactions=transactions,
-                         analytics=analytics_data)
+                         accounts=data['accounts'],
+                         analytics=data['analytics'])
 
 @app.route('/budgets')
 @login_required
 def budgets():
     """Budget management page"""
-    from models.database import Budget
-    budgets = Budget.query.filter_by(user_id=current_user.id).all()
-    
     # Calculate budget vs actual spending
     budget_analysis = analyze_budgets(current_user.id)
+    budgets = [item['budget'] for item in budget_analysis]
     
     return render_template('budgets.html', 
                          budgets=budgets,
@@ -715,6 +874,12 @@ def add_investment_api():
         )
         
         db.session.add(investment)
+        try:
+            # History is shared per symbol, so only the first holder of a symbol pays for this
+            backfill_price_history(price_cache.provider, investment.symbol, investment.purchase_date)
+        except Exception:
+            logger.exception("Could not backfill price history for %s", investment.symbol)
+        bump_data_version([current_user.id])
         db.session.commit()
         
         return jsonify({'success': True, 'message': 'Investment added successfully'})
@@ -722,38 +887,58 @@ def add_investment_api():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
+@app.route('/api/investments/performance')
+@login_required
+@conditional_json
+def portfolio_performance():
+    """Daily portfolio value, time-weighted return and drawdown series"""
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        valuation = PortfolioValuation.build(
+            current_user.id,
+            start=datetime.strptime(start, '%Y-%m-%d').date() if start else None,
+            end=datetime.strptime(end, '%Y-%m-%d').date() if end else None
+        )
+        return jsonify(valuation.to_dict())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
 @app.route('/api/refresh-prices')
 @login_required
 def refresh_investment_prices():
-    """Refresh investment prices (demo functionality)"""
+    """Refresh investment prices from the shared price cache"""
     try:
-        from models.database import Investment
-        import random
-        
-        investments = Investment.query.filter_by(user_id=current_user.id).all()
-        
-        for investment in investments:
-            # Simulate price changes (in real app, you'd call a stock API)
-            change_percent = random.uniform(-0.05, 0.05)  # ±5% change
-            investment.current_price = investment.purchase_price * (1 + change_percent)
-        
-        db.session.commit()
+        updated = refresh_prices(price_cache, user_id=current_user.id)
         
         return jsonify({
             'success': True, 
-            'message': f'Refreshed prices for {len(investments)} investments'
+            'message': f'Refreshed prices for {updated} investments'
         })
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.cli.command('refresh-prices')
+def refresh_prices_command():
+    """Refresh every user's holdings with one quote per distinct symbol."""
+    updated = refresh_prices(price_cache)
+    click.echo(f'Refreshed prices for {updated} investments')
+
 @app.route('/reports')
 @login_required
 def reports():
     """Financial reports page"""
     from models.database import Report
-    reports = Report.query.filter_by(user_id=current_user.id)\
-        .order_by(Report.generated_at.desc()).all()
+    reports = []
+    for report in Report.query.filter_by(user_id=current_user.id).order_by(Report.generated_at.desc()):
+        data = json.loads(report.data or '{}')
+        period = ''
+        if data.get('period_start'):
+            start = datetime.fromisoformat(data['period_start'])
+            end = datetime.fromisoformat(data['period_end'])
+            period = f"{start.strftime('%b %d')} - {end.strftime('%b %d, %Y')}"
+        reports.append((report, period))
     
     return render_template('reports.html', reports=reports)
 
@@ -779,29 +964,12 @@ def download_report(report_type):
     """Download report as PDF"""
     try:
         from flask import make_response
-        import json
-        from datetime import datetime
         
         # Generate report data
         report_data = generate_report_data(current_user.id, report_type)
         
         # Create a simple text-based report (in a real app, you'd use a PDF library)
-        report_content = f"""
-FINANCE MENTOR AI - {report_type.upper()} REPORT
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-User: {current_user.name}
-
-FINANCIAL SUMMARY:
-- Total Income: ${report_data.get('total_income', 0):,.2f}
-- Total Expenses: ${report_data.get('total_expenses', 0):,.2f}
-- Net Savings: ${report_data.get('net_savings', 0):,.2f}
-- Savings Rate: {report_data.get('savings_rate', 0):.1f}%
-
-TOP EXPENSE CATEGORIES:
-"""
-        
-        for category, amount in report_data.get('top_categories', []):
-            report_content += f"- {category}: ${amount:,.2f}\n"
+        report_content = render_report_text(report_type, report_data, current_user.name, datetime.now())
         
         response = make_response(report_content)
         response.headers['Content-Type'] = 'text/plain'
@@ -812,63 +980,153 @@ TOP EXPENSE CATEGORIES:
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-def generate_report_data(user_id, report_type):
-    """Generate report data based on type"""
-    from datetime import datetime, timedelta
-    
-    # Calculate date range based on report type
-    end_date = datetime.now()
-    if report_type == 'monthly':
-        start_date = end_date.replace(day=1)
-    elif report_type == 'quarterly':
-        start_date = end_date - timedelta(days=90)
-    else:  # yearly
-        start_date = end_date.replace(month=1, day=1)
-    
-    # Get transactions for the period
-    transactions = Transaction.query.filter(
-        Transaction.user_id == user_id,
-        Transaction.date >= start_date.date(),
-        Transaction.date <= end_date.date()
-    ).all()
-    
-    # Calculate metrics
-    income_transactions = [t for t in transactions if t.amount > 0]
-    expense_transactions = [t for t in transactions if t.amount < 0]
-    
-    total_income = sum(t.amount for t in income_transactions)
-    total_expenses = sum(abs(t.amount) for t in expense_transactions)
-    net_savings = total_income - total_expenses
-    savings_rate = (net_savings / total_income * 100) if total_income > 0 else 0
-    
-    # Top categories
-    from collections import defaultdict
-    category_spending = defaultdict(float)
-    for t in expense_transactions:
-        category_spending[t.category] += abs(t.amount)
-    
-    top_categories = sorted(category_spending.items(), key=lambda x: x[1], reverse=True)[:5]
+@app.route('/api/reports/jobs', methods=['POST'])
+@login_required
+def create_report_job():
+    """Queue a report for rendering by the background worker"""
+    data = request.get_json(silent=True) or {}
+    try:
+        job = report_jobs.submit(app, current_user.id, data.get('report_type', 'monthly'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except JobLimitExceeded as e:
+        return jsonify({'success': False, 'error': str(e)}), 429
     
+    response = jsonify({'success': True, 'job': serialize_report_job(job)})
+    response.status_code = 202
+    response.headers['Location'] = url_for('report_job_status', job_id=job.id)
+    return response
+
+@app.route('/api/reports/jobs/<job_id>')
+@login_required
+def report_job_status(job_id):
+    """Current status of a report job"""
+    job = report_jobs.get(current_user.id, job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({'job': serialize_report_job(job)})
+
+@app.route('/api/reports/jobs/<job_id>/download')
+@login_required
+def download_report_job(job_id):
+    """Download the output of a finished report job"""
+    from flask import make_response
+    
+    job = report_jobs.get(current_user.id, job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.status != 'done':
+        return jsonify({'error': f'Job is {job.status}', 'job': serialize_report_job(job)}), 409
+    
+    response = make_response(job.output)
+    response.headers['Content-Type'] = 'text/plain'
+    response.headers['Content-Disposition'] = f'attachment; filename="{job.report_type}_report_{job.created_at.strftime("%Y%m%d")}.txt"'
+    return response
+
+def serialize_report_job(job):
     return {
-        'total_income': total_income,
-        'total_expenses': total_expenses,
-        'net_savings': net_savings,
-        'savings_rate': savings_rate,
-        'top_categories': top_categories,
-        'transaction_count': len(transactions)
+        'id': job.id,
+        'report_type': job.report_type,
+        'status': job.status,
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'download_url': url_for('download_report_job', job_id=job.id) if job.status == 'done' else None
     }
 
+@app.route('/api/export/transactions')
+@login_required
+def export_transactions():
+    """Stream every transaction in a date range as CSV or JSON Lines"""
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        start = datetime.strptime(start, '%Y-%m-%d').date() if start else None
+        end = datetime.strptime(end, '%Y-%m-%d').date() if end else None
+    except ValueError:
+        return jsonify({'error': 'start and end must be YYYY-MM-DD'}), 400
+    
+    filename = f"transactions_{datetime.now().strftime('%Y%m%d')}.{export_format}"
+    response = Response(
+        stream_with_context(export_chunks(current_user.id, export_format, start, end)),
+        mimetype=EXPORT_FORMATS[export_format]
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    # Let reverse proxies pass chunks through as they are produced
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def generate_report_data(user_id, report_type):
+    """Generate report data based on type, reusing the stored report when its period is unchanged"""
+    return report_store.get(user_id, report_type)
+
 @app.route('/settings')
 @login_required
 def settings():
     """User settings and preferences page"""
-    from models.database import UserPreference, Notification
+    from models.database import UserPreference
     preferences = UserPreference.query.filter_by(user_id=current_user.id).all()
-    notifications = Notification.query.filter_by(user_id=current_user.id, is_read=False).all()
     
     return render_template('settings.html', 
                          preferences=preferences,
-                         notifications=notifications)
+                         unread_notifications=notification_center.unread_count(current_user.id))
+
+@app.context_processor
+def inject_unread_notifications():
+    """Unread count for the navbar badge, one read of the user's stored counter"""
+    if current_user.is_authenticated:
+        return {'unread_notification_count': notification_center.unread_count(current_user.id)}
+    return {}
+
+@app.route('/api/notifications')
+@login_required
+def list_notifications():
+    """Most recent notifications, newest first"""
+    from models.database import Notification
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    notifications = Notification.query.filter_by(user_id=current_user.id)\
+        .order_by(Notification.created_at.desc(), Notification.id.desc()).limit(limit).all()
+    
+    return jsonify({
+        'unread': notification_center.unread_count(current_user.id),
+        'notifications': [serialize_notification(n) for n in notifications]
+    })
+
+@app.route('/api/notifications/read', methods=['POST'])
+@login_required
+def mark_notifications_read():
+    """Mark the given notification ids read, or all of them when no ids are sent"""
+    ids = (request.get_json(silent=True) or {}).get('ids')
+    changed = notification_center.mark_read(current_user.id, ids)
+    return jsonify({'success': True, 'marked': changed, 'unread': notification_center.unread_count(current_user.id)})
+
+@app.route('/api/notifications/stream')
+@login_required
+def notification_stream():
+    """Short-lived server-sent event stream of the user's new notifications; the browser reconnects"""
+    user_id = current_user.id
+    unread = notification_center.unread_count(user_id)
+    # The session is not needed while the stream waits; release its connection now
+    db.session.remove()
+    response = Response(
+        notification_center.stream(user_id, unread,
+                                   stream_seconds=Config.NOTIFICATION_STREAM_SECONDS,
+                                   retry_seconds=Config.NOTIFICATION_RETRY_SECONDS),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/notifications/unread')
+@login_required
+def unread_notifications():
+    """Unread count for the navbar badge, polled by browsers without EventSource"""
+    return jsonify({'unread': notification_center.unread_count(current_user.id)})
 
 # API routes for new features
 @app.route('/api/budget', methods=['POST'])
@@ -884,6 +1142,7 @@ def create_budget():
         monthly_limit=float(data.get('monthly_limit'))
     )
     db.session.add(budget)
+    bump_data_version([current_user.id])
     db.session.commit()
     
     return jsonify({'success': True, 'message': 'Budget created successfully'})
@@ -904,12 +1163,29 @@ def create_goal():
         category=data.get('category', 'General')
     )
     db.session.add(goal)
+    bump_data_version([current_user.id])
     db.session.commit()
     
     return jsonify({'success': True, 'message': 'Goal created successfully'})
 
+@app.route('/api/goals/projections')
+@login_required
+@conditional_json
+def goal_projections():
+    """Projected completion for every active goal, with what-if contribution rates"""
+    try:
+        rates = request.args.get('rates')
+        rates = [float(rate) for rate in rates.split(',')] if rates else list(DEFAULT_SCENARIO_RATES)
+    except ValueError:
+        return jsonify({'error': 'rates must be comma-separated numbers'}), 400
+    if not 1 <= len(rates) <= 12 or any(rate < 0 for rate in rates):
+        return jsonify({'error': 'rates must be 1 to 12 non-negative numbers'}), 400
+    
+    return jsonify(goal_projector.project(current_user.id, rates=rates))
+
 @app.route('/api/analytics/spending-trends')
 @login_required
+@conditional_json
 def spending_trends():
     """Get spending trends data for charts"""
     trends = get_spending_trends(current_user.id)
@@ -917,34 +1193,43 @@ def spending_trends():
 
 @app.route('/api/analytics/income-vs-expenses')
 @login_required
+@conditional_json
 def income_vs_expenses():
     """Get income vs expenses data"""
-    data = get_income_vs_expenses(current_user.id)
+    months = min(max(request.args.get('months', 6, type=int), 1), 120)
+    data = get_income_vs_expenses(current_user.id, months=months)
     return jsonify(data)
 
+@app.route('/api/analytics/compare')
+@login_required
+@conditional_json
+def compare_periods():
+    """Compare spending and income for this period against the previous one"""
+    period = request.args.get('period', 'month')
+    if period not in ('week', 'month', 'quarter', 'year'):
+        return jsonify({'error': 'period must be week, month, quarter or year'}), 400
+    
+    timeline = spending_timelines.get(current_user.id)
+    current, previous = period_windows(period)
+    
+    return jsonify({
+        'period': period,
+        'current_window': [current[0].isoformat(), current[1].isoformat()],
+        'previous_window': [previous[0].isoformat(), previous[1].isoformat()],
+        'expenses': timeline.compare('expenses', current, previous),
+        'income': timeline.compare('income', current, previous)
+    })
+
 # Helper functions
 def calculate_analytics(user_id):
     """Calculate comprehensive analytics"""
-    current_month = datetime.now().replace(day=1)
+    current_month = datetime.now().date().replace(day=1)
     last_month = (current_month - timedelta(days=1)).replace(day=1)
     
-    # Current month data
-    current_expenses = Transaction.query.filter(
-        Transaction.user_id == user_id,
-        Transaction.date >= current_month,
-        Transaction.amount < 0
-    ).all()
-    
-    # Last month data
-    last_month_expenses = Transaction.query.filter(
-        Transaction.user_id == user_id,
-        Transaction.date >= last_month,
-        Transaction.date < current_month,
-        Transaction.amount < 0
-    ).all()
-    
-    current_total = sum(abs(t.amount) for t in current_expenses)
-    last_month_total = sum(abs(t.amount) for t in last_month_expenses)
+    # Month totals are prefix-sum lookups on the cached timeline
+    timeline = spending_timelines.get(user_id)
+    current_total = timeline.total('expenses', current_month, timeline.end)
+    last_month_total = timeline.total('expenses', last_month, current_month - timedelta(days=1))
     
     change_percent = ((current_total - last_month_total) / last_month_total * 100) if last_month_total > 0 else 0
     
@@ -958,32 +1243,7 @@ def calculate_analytics(user_id):
 
 def analyze_budgets(user_id):
     """Analyze budget vs actual spending"""
-    from models.database import Budget
-    budgets = Budget.query.filter_by(user_id=user_id).all()
-    current_month = datetime.now().replace(day=1)
-    
-    analysis = []
-    for budget in budgets:
-        spent = db.session.query(db.func.sum(Transaction.amount)).filter(
-            Transaction.user_id == user_id,
-            Transaction.category == budget.category,
-            Transaction.date >= current_month,
-            Transaction.amount < 0
-        ).scalar() or 0
-        
-        spent = abs(spent)
-        remaining = budget.monthly_limit - spent
-        percent_used = (spent / budget.monthly_limit * 100) if budget.monthly_limit > 0 else 0
-        
-        analysis.append({
-            'budget': budget,
-            'spent': spent,
-            'remaining': remaining,
-            'percent_used': round(percent_used, 1),
-            'status': 'over' if spent > budget.monthly_limit else 'warning' if percent_used > 80 else 'good'
-        })
-    
-    return analysis
+    return budget_engine.evaluate(user_id)
 
 def calculate_portfolio_performance(investments):
     """Calculate investment portfolio performance"""
@@ -1035,50 +1295,110 @@ def get_spending_trends(user_id, days=30):
     return [{'date': str(day.date), 'amount': abs(day.total)} for day in daily_spending]
 
 def get_income_vs_expenses(user_id, months=6):
-    """Get income vs expenses for the last N months"""
+    """Get income vs expenses for the last N calendar months in a single grouped query"""
+    current_month = datetime.now().date().replace(day=1)
+    first_month = add_months(current_month, -(months - 1))
+    next_month = add_months(current_month, 1)
+    
+    year = db.extract('year', Transaction.date)
+    month = db.extract('month', Transaction.date)
+    rows = db.session.query(
+        year.label('year'),
+        month.label('month'),
+        db.func.sum(db.case((Transaction.amount > 0, Transaction.amount), else_=0)).label('income'),
+        db.func.sum(db.case((Transaction.amount < 0, Transaction.amount), else_=0)).label('expenses')
+    ).filter(
+        Transaction.user_id == user_id,
+        Transaction.date >= first_month,
+        Transaction.date < next_month
+    ).group_by(year, month).all()
+    
+    totals = {(int(row.year), int(row.month)): row for row in rows}
+    
     data = []
     for i in range(months):
-        month_start = (datetime.now().replace(day=1) - timedelta(days=i*30)).replace(day=1)
-        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-        
-        income = db.session.query(db.func.sum(Transaction.amount)).filter(
-            Transaction.user_id == user_id,
-            Transaction.date >= month_start,
-            Transaction.date <= month_end,
-            Transaction.amount > 0
-        ).scalar() or 0
-        
-        expenses = db.session.query(db.func.sum(Transaction.amount)).filter(
-            Transaction.user_id == user_id,
-            Transaction.date >= month_start,
-            Transaction.date <= month_end,
-            Transaction.amount < 0
-        ).scalar() or 0
-        
+        month_start = add_months(first_month, i)
+        row = totals.get((month_start.year, month_start.month))
         data.append({
             'month': month_start.strftime('%B %Y'),
-            'income': income,
-            'expenses': abs(expenses)
+            'income': (row.income or 0) if row else 0,
+            'expenses': abs(row.expenses or 0) if row else 0
         })
     
-    return list(reversed(data))
+    return data
+
+@app.cli.command('init-db')
+@click.option('--force', is_flag=True, help='Run DDL even if the stored schema fingerprint matches.')
+def init_db_command(force):
+    """Create tables and the search index; run once per deploy or build."""
+    if ensure_schema(transaction_search, force=force):
+        click.echo(f'Schema initialized (search backend: {transaction_search.backend})')
+    else:
+        click.echo('Schema up to date')
+
+@app.route('/api/admin/profile', methods=['POST'])
+def arm_request_profiling():
+    """Profile a user's next requests on this worker; authorized by a signed profiling token"""
+    token = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not verify_profile_token(request_profiler.secret, token):
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    data = request.get_json() or {}
+    user = User.query.filter_by(email=data.get('email')).first()
+    if user is None:
+        return jsonify({'error': 'User not found'}), 404
+    try:
+        count = min(max(int(data.get('requests', 1)), 1), 100)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'requests must be a number'}), 400
+    
+    request_profiler.arm(user.id, count)
+    return jsonify({'armed': True, 'requests': count, 'output_dir': request_profiler.output_dir})
+
+@app.cli.command('profile-token')
+@click.option('--minutes', default=15, show_default=True, help='How long the token stays valid.')
+def profile_token_command(minutes):
+    """Print a token for the X-Profile header and the profiling admin endpoint."""
+    if not app.config.get('PROFILE_SECRET'):
+        raise click.ClickException('Set PROFILE_SECRET to enable request profiling')
+    click.echo(sign_profile_token(app.config['PROFILE_SECRET'], ttl=minutes * 60))
+
+@app.cli.command('generate-data')
+@click.option('--users', default=100, show_default=True, help='Synthetic users to create.')
+@click.option('--years', default=2.0, show_default=True, help='Years of transaction history per user.')
+@click.option('--seed', type=int, help='Seed for reproducible data.')
+@click.option('--chunk-size', default=10000, show_default=True, help='Rows per bulk insert.')
+def generate_data_command(users, years, seed, chunk_size):
+    """Bulk-load synthetic users and history for load tests and benchmarks."""
+    # Every synthetic user signs in with the same password, hashed once
+    password_hash = password_hasher.hash('synthetic-password')
+    started = time.perf_counter()
+    
+    def report(totals):
+        elapsed = time.perf_counter() - started
+        click.echo(f"{totals['users']} users, {totals['transactions']} transactions "
+                   f"({totals['transactions'] / elapsed * 60:,.0f} transactions/min)")
+    
+    totals = generate_users(users, days=int(years * 365), seed=seed, password_hash=password_hash,
+                            chunk_size=chunk_size, search=transaction_search, progress=report)
+    click.echo(', '.join(f'{count} {table}' for table, count in totals.items()))
+    click.echo("Synthetic users sign in with password 'synthetic-password'")
+
+# Bring the schema up to date when the process starts rather than on a user
+# request. Once it is current this is one read of the schema fingerprint;
+# deployments that run `flask init-db` at build can turn it off.
+if app.config['SCHEMA_AUTO_INIT']:
+    with app.app_context():
+        try:
+            ensure_schema(transaction_search)
+        except Exception:
+            logger.exception("Database initialization error")
 
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
+        ensure_schema(transaction_search)
     # For local development
     app.run(debug=True)
 
-# For Vercel deployment - Initialize database on first request
-@app.before_request
-def initialize_database():
-    """Initialize database tables on first request"""
-    if not hasattr(app, '_database_initialized'):
-        try:
-            db.create_all()
-            app._database_initialized = True
-        except Exception as e:
-            print(f"Database initialization error: {e}")
-
 # Vercel serverless handler
 app.app = app
\ No newline at end of file
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark serverless cold starts: app import time and time to first response per route
+
+Each route is timed in a fresh interpreter, as on a cold serverless instance:
+the time to import the app, then the time for the first request to that
+route (building any lazy components it needs), and which components ended
+up loaded. Routes after the first few need a session, so a throwaway user
+is registered and seeded before the timed request, in a throwaway SQLite
+database (or --database-url).
+
+Usage: python benchmarks/bench_cold_start.py [--runs N] [--route /path ...] [--database-url URL]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('LOG_SAMPLE_RATES', 'finance.request=0,finance.chat=0')
+
+# (method, path, needs a logged-in user)
+ROUTES = [
+    ('GET', '/', False),
+    ('GET', '/login', False),
+    ('GET', '/dashboard', True),
+    ('GET', '/api/forecast', True),
+    ('POST', '/chat', True),
+]
+
+LAZY_COMPONENTS = ['intent_classifier', 'forecaster', 'plaid_client']
+
+def child(method, path, login):
+    """Run inside the fresh interpreter: import the app, serve one request, report timings"""
+    started = time.perf_counter()
+    import app as app_module
+    imported = time.perf_counter()
+
+    with app_module.app.test_client() as client:
+        if login:
+            email = f"cold-{uuid.uuid4().hex[:12]}@example.com"
+            client.post('/register', json={'email': email, 'password': 'benchpassword', 'name': 'Bench'})
+            client.post('/create_demo_data')
+        before = {name: getattr(app_module, name).loaded for name in LAZY_COMPONENTS}
+
+        request_started = time.perf_counter()
+        if method == 'POST':
+            response = client.post(path, json={'message': 'what is my balance'})
+        else:
+            response = client.get(path)
+        finished = time.perf_counter()
+
+    print(json.dumps({
+        'status': response.status_code,
+        'import_ms': (imported - started) * 1000,
+        'first_response_ms': (finished - request_started) * 1000,
+        'loaded': [name for name in LAZY_COMPONENTS
+                   if getattr(app_module, name).loaded and not before[name]]
+    }))
+
+def run_cold(method, path, login):
+    env = dict(os.environ, BCRYPT_LOG_ROUNDS=os.environ.get('BCRYPT_LOG_ROUNDS', '4'))
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', method, path, str(int(login))],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='cold starts per route (medians are reported)')
+    parser.add_argument('--route', action='append', help='GET route to time instead of the defaults; repeatable')
+    parser.add_argument('--login', action='store_true', help='log in before requesting --route paths')
+    parser.add_argument('--database-url', help='database to register bench users in (default: temporary SQLite file)')
+    parser.add_argument('--child', nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        method, path, login = args.child
+        child(method, path, login == '1')
+        return
+
+    workdir = tempfile.mkdtemp(prefix='bench_cold_start_')
+    os.environ['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    # One untimed start creates the schema, so no timed run pays for the DDL
+    run_cold('GET', '/login', False)
+
+    routes = [('GET', path, args.login) for path in args.route] if args.route else ROUTES
+    header = f"{'route':<24}{'status':>7}{'import ms':>11}{'first resp ms':>15}  loaded on first use"
+    print(header)
+    print('-' * len(header))
+    for method, path, login in routes:
+        results = [run_cold(method, path, login) for _ in range(args.runs)]
+        print(f"{method + ' ' + path:<24}{results[-1]['status']:>7}"
+              f"{statistics.median(r['import_ms'] for r in results):>11.1f}"
+              f"{statistics.median(r['first_response_ms'] for r in results):>15.1f}"
+              f"  {', '.join(results[-1]['loaded']) or '-'}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Benchmark every page and API route against a stored baseline and fail on regressions
+
+Builds a throwaway SQLite database (or uses --database-url), bulk-loads
+synthetic users at each history size, logs in as one of them and drives each
+route through the Flask test client. For every route it records p50/p95/p99
+latency, the number of SQL statements per request and the peak Python memory
+allocated while serving it, then compares them with the baseline file:
+p50 and p95 latency and peak memory may grow by the given tolerance, query
+counts may not grow at all. Any regression is printed and the exit status is 1.
+
+Usage: python benchmarks/bench_endpoints.py [--sizes small medium large] [--iterations 30] [--update-baseline]
+"""
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'endpoints_baseline.json')
+
+# Days of history per user, and how many users share the database at that size
+SIZES = {
+    'small': {'days': 90, 'users': 10},
+    'medium': {'days': 365, 'users': 50},
+    'large': {'days': 1095, 'users': 200},
+}
+
+# One chat message per intent the classifier recognises
+CHAT_MESSAGES = {
+    'greeting': 'hello',
+    'balance_inquiry': 'what is my balance',
+    'spending_analysis': 'how much did i spend',
+    'forecast_inquiry': 'forecast next month',
+    'affordability_check': 'can i afford a laptop',
+    'savings_advice': 'give me saving tips',
+    'investment_advice': 'investment ideas',
+    'general_help': 'help',
+}
+
+# (name, method, path, JSON body)
+ROUTES = [
+    ('dashboard', 'GET', '/dashboard', None),
+    ('dashboard snapshot', 'GET', '/api/dashboard/snapshot', None),
+    ('transactions', 'GET', '/api/transactions', None),
+    ('search', 'GET', '/api/transactions/search?q=uber', None),
+    ('forecast', 'GET', '/api/forecast', None),
+    ('insights', 'GET', '/api/insights', None),
+    ('analytics', 'GET', '/analytics', None),
+    ('spending trends', 'GET', '/api/analytics/spending-trends', None),
+    ('income vs expenses', 'GET', '/api/analytics/income-vs-expenses?months=12', None),
+    ('compare month', 'GET', '/api/analytics/compare?period=month', None),
+    ('compare year', 'GET', '/api/analytics/compare?period=year', None),
+    ('budgets', 'GET', '/budgets', None),
+    ('goals', 'GET', '/goals', None),
+    ('goal projections', 'GET', '/api/goals/projections', None),
+    ('reports', 'GET', '/reports', None),
+    ('monthly report', 'GET', '/api/generate-report/monthly', None),
+    ('yearly report', 'GET', '/api/generate-report/yearly', None),
+    ('investments', 'GET', '/investments', None),
+    ('portfolio performance', 'GET', '/api/investments/performance', None),
+    ('notifications', 'GET', '/api/notifications', None),
+] + [(f'chat: {intent}', 'POST', '/chat', {'message': message}) for intent, message in CHAT_MESSAGES.items()]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=list(SIZES), help='history sizes to run')
+    parser.add_argument('--iterations', type=int, default=30, help='timed requests per route')
+    parser.add_argument('--seed', type=int, default=2024, help='seed for the synthetic data')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline file to compare against')
+    parser.add_argument('--update-baseline', action='store_true', help='write these results as the new baseline')
+    parser.add_argument('--latency-tolerance', type=float, default=0.5, help='allowed p50 and p95 growth, as a fraction')
+    parser.add_argument('--memory-tolerance', type=float, default=0.25, help='allowed peak memory growth, as a fraction')
+    parser.add_argument('--database-url', help='database to load into (default: temporary SQLite file)')
+    return parser.parse_args()
+
+class QueryCounter:
+    """Counts SQL statements sent on an engine, from any thread"""
+
+    def __init__(self, engine):
+        self.count = 0
+        self._lock = threading.Lock()
+        from sqlalchemy import event
+        event.listen(engine, 'before_cursor_execute', self._record)
+
+    def _record(self, *args):
+        with self._lock:
+            self.count += 1
+
+def seed_size(size, seed):
+    """Load one size's users and return the email of the one to benchmark as"""
+    from app import password_hasher, transaction_search
+    from models.database import db, Investment, User
+    from models.synthetic import generate_users
+
+    first_id = (db.session.query(db.func.max(User.id)).scalar() or 0) + 1
+    config = SIZES[size]
+    generate_users(config['users'], days=config['days'], seed=f'{seed}-{size}',
+                   password_hash=password_hasher.hash('synthetic-password'), search=transaction_search)
+    # Someone with holdings, so the investment routes have work to do
+    user = User.query.join(Investment, Investment.user_id == User.id)\
+        .filter(User.id >= first_id).order_by(User.id).first()
+    return (user or User.query.filter(User.id >= first_id).order_by(User.id).first()).email
+
+def percentiles(samples):
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return cuts[49], cuts[94], cuts[98]
+
+def measure(client, counter, method, path, body, iterations):
+    """Latency percentiles (ms), median queries per request and peak traced memory (KB) for a route"""
+    # Untimed warm-up: template compilation and per-user caches belong to the first visit, not the steady state
+    client.open(path, method=method, json=body).get_data()
+    latencies, queries = [], []
+    # As timeit does, keep collector pauses out of the timings so percentiles are stable run to run
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(iterations):
+            counter.count = 0
+            started = time.perf_counter()
+            response = client.open(path, method=method, json=body)
+            response.get_data()
+            latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(counter.count)
+    finally:
+        gc.enable()
+
+    # Traced separately: tracemalloc slows everything it watches
+    tracemalloc.start()
+    client.open(path, method=method, json=body).get_data()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    p50, p95, p99 = percentiles(latencies)
+    return {
+        'status': response.status_code,
+        'p50_ms': round(p50, 2),
+        'p95_ms': round(p95, 2),
+        'p99_ms': round(p99, 2),
+        'queries': int(statistics.median(queries)),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+def compare(results, baseline, latency_tolerance, memory_tolerance):
+    """Regressions against the baseline, as printable lines"""
+    regressions = []
+    for size, routes in results.items():
+        for name, current in routes.items():
+            previous = baseline.get(size, {}).get(name)
+            if previous is None:
+                continue
+            label = f'{size} / {name}'
+            if current['status'] != previous['status']:
+                regressions.append(f"{label}: status {previous['status']} -> {current['status']}")
+            if current['queries'] > previous['queries']:
+                regressions.append(f"{label}: queries {previous['queries']} -> {current['queries']}")
+            # A slow route moves its median too; one noisy sample moving p95 alone is not a regression.
+            # Absolute floors keep sub-millisecond and tiny-allocation routes from flapping.
+            if all(current[key] > previous[key] * (1 + latency_tolerance) and current[key] - previous[key] > 1
+                   for key in ('p50_ms', 'p95_ms')):
+                regressions.append(f"{label}: p50/p95 {previous['p50_ms']:.2f}/{previous['p95_ms']:.2f}ms -> "
+                                   f"{current['p50_ms']:.2f}/{current['p95_ms']:.2f}ms")
+            if current['peak_kb'] > previous['peak_kb'] * (1 + memory_tolerance) and current['peak_kb'] - previous['peak_kb'] > 64:
+                regressions.append(f"{label}: peak memory {previous['peak_kb']:.0f}KB -> {current['peak_kb']:.0f}KB")
+    return regressions
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix='bench_endpoints_')
+    os.environ['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('LOG_SAMPLE_RATES', 'finance.request=0,finance.chat=0')
+
+    from app import app
+    from models.database import db
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)['sizes']
+
+    results = {}
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+        for size in args.sizes:
+            started = time.perf_counter()
+            email = seed_size(size, args.seed)
+            print(f"\n{size}: {SIZES[size]['days']} days x {SIZES[size]['users']} users "
+                  f"(seeded in {time.perf_counter() - started:.1f}s)")
+            header = f"{'route':<30}{'status':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'peak KB':>10}"
+            print(header)
+            print('-' * len(header))
+
+            results[size] = {}
+            with app.test_client() as client:
+                client.post('/login', json={'email': email, 'password': 'synthetic-password'})
+                for name, method, path, body in ROUTES:
+                    result = measure(client, counter, method, path, body, args.iterations)
+                    results[size][name] = result
+                    print(f"{name:<30}{result['status']:>7}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+                          f"{result['p99_ms']:>9.2f}{result['queries']:>9}{result['peak_kb']:>10.1f}")
+
+    if args.update_baseline:
+        merged = dict(baseline, **results)
+        with open(args.baseline, 'w') as f:
+            json.dump({'iterations': args.iterations, 'sizes': merged}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nBaseline written to {os.path.relpath(args.baseline)}")
+        return
+
+    if not baseline:
+        print(f"\nNo baseline at {os.path.relpath(args.baseline)}; run with --update-baseline to create one")
+        return
+    regressions = compare(results, baseline, args.latency_tolerance, args.memory_tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {os.path.relpath(args.baseline)}:")
+        for line in regressions:
+            print(f"  REGRESSION {line}")
+        sys.exit(1)
+    print(f"\nNo regressions against {os.path.relpath(args.baseline)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON serialization time and bytes on the wire for the API endpoints
+
+Registers a user with demo data in a throwaway SQLite database (or
+--database-url), then compares json.dumps with the app's JSON provider on
+each endpoint's payload.
+
+Usage: python benchmarks/bench_json.py [--repeat N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENDPOINTS = [
+    '/api/dashboard/snapshot',
+    '/api/forecast',
+    '/api/insights',
+    '/api/analytics/spending-trends',
+    '/api/analytics/income-vs-expenses?months=24',
+    '/api/analytics/compare?period=year',
+    '/api/generate-report/yearly',
+]
+
+def time_call(func, repeat):
+    """Best-of-N wall time in microseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200, help='serialization repetitions per payload')
+    parser.add_argument('--database-url', help='database to register the bench user in (default: temporary SQLite file)')
+    args = parser.parse_args()
+    
+    workdir = tempfile.mkdtemp(prefix='bench_json_')
+    os.environ['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('LOG_SAMPLE_RATES', 'finance.request=0,finance.chat=0')
+    
+    from app import app
+    from utils.compression import available_encodings
+    from utils.json_provider import ORJSON_AVAILABLE
+    
+    print(f"orjson available: {ORJSON_AVAILABLE}; encodings: {', '.join(available_encodings())}\n")
+    header = f"{'endpoint':<46}{'identity B':>11}{'gzip B':>9}{'br B':>9}{'stdlib us':>11}{'provider us':>13}"
+    print(header)
+    print('-' * len(header))
+    
+    with app.test_client() as client:
+        email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+        client.post('/register', data=json.dumps({'email': email, 'password': 'benchpassword', 'name': 'Bench'}),
+                    content_type='application/json')
+        client.get('/dashboard')  # Seeds demo accounts and transactions
+        
+        for endpoint in ENDPOINTS:
+            sizes = {}
+            for encoding in ['identity'] + available_encodings():
+                response = client.get(endpoint, headers={'Accept-Encoding': encoding})
+                sizes[encoding] = len(response.get_data())
+            
+            payload = client.get(endpoint, headers={'Accept-Encoding': 'identity'}).get_json()
+            stdlib_us = time_call(lambda: json.dumps(payload, sort_keys=True), args.repeat)
+            # Serialization only on both sides; building the Response object is the same either way
+            with app.app_context():
+                provider_us = time_call(lambda: app.json.dumps(payload), args.repeat)
+            
+            print(f"{endpoint:<46}{sizes['identity']:>11}{sizes.get('gzip', '-'):>9}{sizes.get('br', '-'):>9}"
+                  f"{stdlib_us:>11.1f}{provider_us:>13.1f}")
+
+if __name__ == '__main__':
+    main()
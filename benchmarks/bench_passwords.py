@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark password hashing throughput (logins/sec) for the configured cost
+
+Times PasswordHasher.verify, the work a login does, first from one thread and
+then from as many client threads as there are pool workers, and reports
+logins/sec overall and per core. Prints one row per scheme and cost so
+BCRYPT_LOG_ROUNDS / PBKDF2_ITERATIONS can be chosen for the hardware.
+
+Usage: python benchmarks/bench_passwords.py [--rounds 10 12] [--iterations 600000] [--seconds 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.passwords import PasswordHasher, BCRYPT_AVAILABLE
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rounds', type=int, nargs='+', default=[10, 12], help='bcrypt costs to time')
+    parser.add_argument('--iterations', type=int, nargs='+', default=[600000], help='PBKDF2 iteration counts to time')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='hashing pool size')
+    parser.add_argument('--seconds', type=float, default=3.0, help='minimum time per measurement')
+    return parser.parse_args()
+
+def logins_per_second(hasher, stored_hash, threads, seconds):
+    """Run verify() from `threads` client threads until `seconds` have passed"""
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        count = 0
+        while time.perf_counter() < deadline:
+            hasher.verify('correct horse battery staple', stored_hash)
+            count += 1
+        return count
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as clients:
+        total = sum(clients.map(lambda _: client(), range(threads)))
+    return total / (time.perf_counter() - started)
+
+def main():
+    args = parse_args()
+    cores = os.cpu_count() or 1
+    configs = [('pbkdf2', {'pbkdf2_iterations': n}, f'{n} iterations') for n in args.iterations]
+    if BCRYPT_AVAILABLE:
+        configs = [('bcrypt', {'bcrypt_rounds': r}, f'cost {r}') for r in args.rounds] + configs
+    else:
+        print('bcrypt is not installed; timing PBKDF2 only')
+
+    print(f'{cores} cores, {args.workers} hashing workers\n')
+    print(f"{'scheme':<8} {'cost':<18} {'1 thread/s':>11} {'pool/s':>9} {'pool/s/core':>12}")
+    for scheme, options, label in configs:
+        # Headroom so the benchmark's own clients never trip the queue limit
+        hasher = PasswordHasher(scheme=scheme, max_workers=args.workers,
+                                max_pending=args.workers * 2, **options)
+        stored_hash = hasher.hash('correct horse battery staple')
+        single = logins_per_second(hasher, stored_hash, 1, args.seconds)
+        pooled = logins_per_second(hasher, stored_hash, args.workers, args.seconds)
+        print(f'{scheme:<8} {label:<18} {single:>11.1f} {pooled:>9.1f} {pooled / cores:>12.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark full-text transaction search against a LIKE scan
+
+Builds a throwaway SQLite database (or uses DATABASE_URL if given with
+--database-url), bulk-loads synthetic transactions, builds the search index
+and times prefix searches for one user.
+
+Usage: python benchmarks/bench_search.py [--rows 10000000] [--users 10000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MERCHANTS = [
+    'Uber Ride', 'Uber Eats', 'Lyft Ride', 'Netflix Subscription', 'Spotify Premium', 'Amazon Purchase',
+    'Whole Foods Market', 'Trader Joes', 'Starbucks Coffee', 'Shell Gas Station', 'Chevron Fuel',
+    'Electric Bill', 'Water Utility', 'Comcast Internet', 'Verizon Wireless', 'Target Store',
+    'Walmart Supercenter', 'Gym Membership', 'Delta Airlines', 'Airbnb Stay', 'Salary Deposit',
+]
+
+QUERIES = ['uber', 'netf', 'whole foods', 'gas', 'airbnb stay', 'zzz']
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000, help='transactions to generate')
+    parser.add_argument('--users', type=int, default=1000, help='users the rows are spread over')
+    parser.add_argument('--chunk', type=int, default=50000, help='rows per executemany batch')
+    parser.add_argument('--repeat', type=int, default=20, help='timed runs per query')
+    parser.add_argument('--database-url', help='database to load into (default: temporary SQLite file)')
+    return parser.parse_args()
+
+def best_of(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix='bench_search_')
+    os.environ['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('LOG_SAMPLE_RATES', 'finance.request=0,finance.chat=0')
+    # Tables only: the search index and its triggers are built after the load, as part of what's timed
+    os.environ['SCHEMA_AUTO_INIT'] = 'false'
+    
+    from app import app
+    from models.database import db, User, Account, Transaction
+    from models.search import TransactionSearch
+    
+    with app.app_context():
+        db.create_all()
+        
+        started = time.perf_counter()
+        db.session.execute(db.insert(User), [
+            {'id': u, 'email': f'bench{u}@example.com', 'name': f'Bench {u}', 'password_hash': '-'}
+            for u in range(1, args.users + 1)
+        ])
+        db.session.execute(db.insert(Account), [
+            {'id': u, 'user_id': u, 'plaid_account_id': f'bench_{u}', 'access_token': '-',
+             'name': 'Bench Checking', 'account_type': 'depository', 'balance': 0.0}
+            for u in range(1, args.users + 1)
+        ])
+        
+        today = date.today()
+        rng = random.Random(42)
+        for offset in range(0, args.rows, args.chunk):
+            batch = []
+            for i in range(offset, min(offset + args.chunk, args.rows)):
+                user_id = rng.randint(1, args.users)
+                batch.append({
+                    'user_id': user_id, 'account_id': user_id, 'plaid_transaction_id': f'bench_{i}',
+                    'amount': -round(rng.uniform(1, 200), 2), 'date': today - timedelta(days=rng.randint(0, 3650)),
+                    'description': rng.choice(MERCHANTS), 'category': 'Other'
+                })
+            db.session.execute(db.insert(Transaction), batch)
+        db.session.commit()
+        load_seconds = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        indexed = TransactionSearch()
+        backend = indexed.ensure_index()
+        index_seconds = time.perf_counter() - started
+        
+        scan = TransactionSearch()
+        scan.backend = 'like'
+        
+        print(f"rows={args.rows:,} users={args.users:,} backend={backend}")
+        print(f"load: {load_seconds:.1f}s ({args.rows / load_seconds:,.0f} rows/s), index build: {index_seconds:.1f}s\n")
+        print(f"{'query':<16}{'hits':>6}{backend + ' ms':>12}{'like ms':>12}")
+        
+        user_id = 1
+        for query in QUERIES:
+            hits = len(indexed.search(user_id, query, limit=50))
+            indexed_ms = best_of(lambda: indexed.search(user_id, query, limit=50), args.repeat)
+            scan_ms = best_of(lambda: scan.search(user_id, query, limit=50), max(1, args.repeat // 5))
+            print(f"{query:<16}{hits:>6}{indexed_ms:>12.2f}{scan_ms:>12.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,9 @@
 import os
 from dotenv import load_dotenv
 
+from utils.log import parse_sample_rates
+from utils.query_stats import parse_budgets
+
 load_dotenv()
 
 class Config:
@@ -22,13 +25,73 @@ class Config:
         'pool_recycle': 300,
     }
     
+    # Check the schema fingerprint at process start and create anything missing; turn off
+    # when `flask init-db` runs at deploy or build
+    SCHEMA_AUTO_INIT = os.environ.get('SCHEMA_AUTO_INIT', 'true').lower() in ('1', 'true', 'yes')
+    
+    # Thread pool size for running a handler's independent read queries concurrently (1 disables)
+    QUERY_WORKERS = int(os.environ.get('QUERY_WORKERS', 4))
+    
     # Plaid Configuration
     PLAID_CLIENT_ID = os.environ.get('PLAID_CLIENT_ID')
     PLAID_SECRET = os.environ.get('PLAID_SECRET')
     PLAID_ENV = os.environ.get('PLAID_ENV', 'sandbox')  # sandbox, development, production
     
-    # Security
-    BCRYPT_LOG_ROUNDS = 12
+    # Security - password hashing scheme and cost; hashes run on a bounded pool off the request threads
+    PASSWORD_HASH_SCHEME = os.environ.get('PASSWORD_HASH_SCHEME', 'bcrypt')  # bcrypt, pbkdf2
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    PBKDF2_ITERATIONS = int(os.environ.get('PBKDF2_ITERATIONS', 600000))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0)) or None  # default: CPU count
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 32))
+    
+    # Logging - JSON lines written off the request path; per-logger sampling of info-level events
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_SAMPLE_RATES = parse_sample_rates(
+        os.environ.get('LOG_SAMPLE_RATES', 'finance.request=0.1,finance.chat=0.1')
+    )
+    
+    # Per-request SQL instrumentation: Server-Timing headers, and a warning (or, when strict, an
+    # error) for requests over their query or time budget. Per-endpoint budgets: 'dashboard=10,...'
+    SERVER_TIMING = os.environ.get('SERVER_TIMING', 'true').lower() in ('1', 'true', 'yes')
+    QUERY_BUDGET = int(os.environ.get('QUERY_BUDGET', 25))
+    QUERY_BUDGETS = parse_budgets(os.environ.get('QUERY_BUDGETS', ''))
+    QUERY_TIME_BUDGET_MS = int(os.environ.get('QUERY_TIME_BUDGET_MS', 250))
+    QUERY_BUDGET_STRICT = os.environ.get('QUERY_BUDGET_STRICT', 'false').lower() in ('1', 'true', 'yes')
+    
+    # On-demand request profiling: enabled by setting a secret, which signs X-Profile tokens
+    # (`flask profile-token`); profiles are written under PROFILE_DIR
+    PROFILE_SECRET = os.environ.get('PROFILE_SECRET')
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', '/tmp/finance_profiles')
+    PROFILE_MODE = os.environ.get('PROFILE_MODE', 'cprofile')  # cprofile, sampling (needs pyinstrument)
+    
+    # Authenticated identities (user, account ids, data version) cached per process
+    IDENTITY_CACHE_TTL = int(os.environ.get('IDENTITY_CACHE_TTL', 30))
+    IDENTITY_CACHE_SIZE = int(os.environ.get('IDENTITY_CACHE_SIZE', 4096))
+    
+    # Seconds a cached per-user spending timeline is trusted before it is rebuilt
+    TIMELINE_CACHE_TTL = int(os.environ.get('TIMELINE_CACHE_TTL', 300))
+    
+    # Response compression (gzip, or brotli when installed) for bodies at least this many bytes
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+    
+    # Background report rendering: worker threads, in-flight jobs allowed per user, seconds before a job is failed
+    REPORT_WORKERS = int(os.environ.get('REPORT_WORKERS', 2))
+    REPORT_JOBS_PER_USER = int(os.environ.get('REPORT_JOBS_PER_USER', 2))
+    REPORT_JOB_TIMEOUT = int(os.environ.get('REPORT_JOB_TIMEOUT', 300))
+    
+    # Investment quotes: provider name and seconds a symbol's price is shared before re-quoting
+    PRICE_PROVIDER = os.environ.get('PRICE_PROVIDER', 'fake')
+    PRICE_CACHE_TTL = int(os.environ.get('PRICE_CACHE_TTL', 60))
+    
+    # Notifications raised at transaction ingest. Pages hold an event stream open for up to
+    # NOTIFICATION_STREAM_SECONDS (keep it under the platform's request timeout) and reconnect
+    # NOTIFICATION_RETRY_SECONDS later; browsers without EventSource poll every NOTIFICATION_POLL_SECONDS
+    LARGE_TRANSACTION_ALERT = float(os.environ.get('LARGE_TRANSACTION_ALERT', 500))
+    LOW_BALANCE_ALERT = float(os.environ.get('LOW_BALANCE_ALERT', 100))
+    NOTIFICATION_STREAM_SECONDS = int(os.environ.get('NOTIFICATION_STREAM_SECONDS', 8))
+    NOTIFICATION_RETRY_SECONDS = int(os.environ.get('NOTIFICATION_RETRY_SECONDS', 5))
+    NOTIFICATION_POLL_SECONDS = int(os.environ.get('NOTIFICATION_POLL_SECONDS', 60))
     
     # ML Model Settings
     FORECAST_DAYS = 90
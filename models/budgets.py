@@ -0,0 +1,120 @@
+from datetime import datetime
+from collections import defaultdict
+
+from models.database import db, upsert_insert, Budget, BudgetCounter, Transaction
+
+class BudgetEngine:
+    """Evaluates all of a user's budgets from month-to-date counters.
+
+    Counters that are missing or belong to a previous month are rebuilt
+    together with a single grouped upsert, and are kept current afterwards by
+    record_transactions() at ingest time.
+    """
+    
+    def __init__(self, warning_percent=80):
+        self.warning_percent = warning_percent
+    
+    def evaluate(self, user_id):
+        """Analyze budget vs actual spending for all of a user's budgets"""
+        current_month = datetime.now().date().replace(day=1)
+        
+        rows = self._budgets_with_counters(user_id)
+        stale = [budget for budget, counter in rows if counter is None or counter.month != current_month]
+        if stale:
+            self.refresh_counters(user_id, [budget.id for budget in stale])
+            db.session.commit()
+            rows = self._budgets_with_counters(user_id)
+        
+        return [self._analyze(budget, (counter.spent or 0) if counter else 0) for budget, counter in rows]
+    
+    def refresh_counters(self, user_id, budget_ids):
+        """Recompute month-to-date spend for budgets with a missing or stale counter in one statement.
+
+        Runs on the caller's session, which commits. The grouped sum is upserted
+        so concurrent refreshes after a rollover don't collide, and counters
+        already on the current month are left alone so increments made by a
+        concurrent ingest aren't lost.
+        """
+        current_month = datetime.now().date().replace(day=1)
+        if not budget_ids:
+            return
+        
+        spent = db.select(
+            Budget.id,
+            db.literal(current_month, db.Date),
+            -db.func.coalesce(db.func.sum(Transaction.amount), 0)
+        ).select_from(Budget).outerjoin(Transaction, db.and_(
+            Transaction.user_id == Budget.user_id,
+            Transaction.category == Budget.category,
+            Transaction.date >= current_month,
+            Transaction.amount < 0
+        )).where(
+            Budget.user_id == user_id,
+            Budget.id.in_(budget_ids)
+        ).group_by(Budget.id)
+        
+        insert = upsert_insert(BudgetCounter).from_select(['budget_id', 'month', 'spent'], spent)
+        db.session.execute(insert.on_conflict_do_update(
+            index_elements=[BudgetCounter.budget_id],
+            set_={'month': insert.excluded.month, 'spent': insert.excluded.spent, 'updated_at': datetime.utcnow()},
+            where=BudgetCounter.month != insert.excluded.month
+        ))
+    
+    def record_transactions(self, transactions):
+        """Add newly ingested expenses to the current month's budget counters.
+
+        Call with the transactions already in the session and before committing,
+        so counters and rows are written atomically. Current counters are
+        incremented; missing ones (a new budget) and ones from a previous month
+        are rebuilt from the month's transactions, the new ones included, so
+        threshold alerts work without anyone having opened the budgets page.
+        """
+        current_month = datetime.now().date().replace(day=1)
+        
+        deltas = defaultdict(float)
+        for t in transactions:
+            if t.amount < 0 and t.date >= current_month:
+                deltas[(t.user_id, t.category)] += abs(t.amount)
+        if not deltas:
+            return
+        
+        for (user_id, category), amount in deltas.items():
+            budget_ids = db.select(Budget.id).where(
+                Budget.user_id == user_id,
+                Budget.category == category
+            )
+            BudgetCounter.query.filter(
+                BudgetCounter.budget_id.in_(budget_ids),
+                BudgetCounter.month == current_month
+            ).update({BudgetCounter.spent: BudgetCounter.spent + amount}, synchronize_session=False)
+        
+        # Autoflushes the new transactions, so the rebuilt sums include them
+        stale = db.session.query(Budget.user_id, Budget.id).outerjoin(
+            BudgetCounter, BudgetCounter.budget_id == Budget.id
+        ).filter(
+            Budget.user_id.in_({user_id for user_id, _ in deltas}),
+            Budget.category.in_({category for _, category in deltas}),
+            db.or_(BudgetCounter.id.is_(None), BudgetCounter.month != current_month)
+        ).all()
+        by_user = defaultdict(list)
+        for user_id, budget_id in stale:
+            by_user[user_id].append(budget_id)
+        for user_id, budget_ids in by_user.items():
+            self.refresh_counters(user_id, budget_ids)
+    
+    def _budgets_with_counters(self, user_id):
+        return db.session.query(Budget, BudgetCounter).outerjoin(
+            BudgetCounter, BudgetCounter.budget_id == Budget.id
+        ).filter(Budget.user_id == user_id).order_by(Budget.id).all()
+    
+    def _analyze(self, budget, spent):
+        remaining = budget.monthly_limit - spent
+        percent_used = (spent / budget.monthly_limit * 100) if budget.monthly_limit > 0 else 0
+        
+        return {
+            'budget': budget,
+            'spent': spent,
+            'remaining': remaining,
+            'percent_used': round(percent_used, 1),
+            'status': 'over' if spent > budget.monthly_limit else 'warning' if percent_used > self.warning_percent else 'good'
+        }
@@ -1,9 +1,15 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
+from sqlalchemy.dialects import postgresql, sqlite
 
 db = SQLAlchemy()
 
+def upsert_insert(model):
+    """INSERT supporting ON CONFLICT on the bound database (SQLite or PostgreSQL)"""
+    dialect = postgresql if db.session.get_bind().dialect.name == 'postgresql' else sqlite
+    return dialect.insert(model)
+
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -39,6 +45,11 @@ class Transaction(db.Model):
     description = db.Column(db.String(255), nullable=False)
     category = db.Column(db.String(100), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Serves per-user date-ordered reads and (date, id) keyset pagination
+        db.Index('ix_transaction_user_date_id', 'user_id', 'date', 'id'),
+    )
 
 class UserPreference(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -56,6 +67,14 @@ class Budget(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+class BudgetCounter(db.Model):
+    # Month-to-date spend per budget, rebuilt in one grouped query and incremented at transaction ingest
+    id = db.Column(db.Integer, primary_key=True)
+    budget_id = db.Column(db.Integer, db.ForeignKey('budget.id'), unique=True, nullable=False)
+    month = db.Column(db.Date, nullable=False)  # First day of the month the counter covers
+    spent = db.Column(db.Float, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class Goal(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -81,6 +100,15 @@ class Investment(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+class PriceHistory(db.Model):
+    # Daily closing price per symbol, shared by every holder of the symbol
+    __table_args__ = (db.UniqueConstraint('symbol', 'date', name='uq_price_history_symbol_date'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    symbol = db.Column(db.String(10), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    close = db.Column(db.Float, nullable=False)
+
 class Notification(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -89,6 +117,14 @@ class Notification(db.Model):
     type = db.Column(db.String(50), default='info')  # info, warning, success, error
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Counts unread notifications for users without a NotificationCounter row yet
+    __table_args__ = (db.Index('ix_notification_user_unread', 'user_id', 'is_read'),)
+
+class NotificationCounter(db.Model):
+    # Unread notifications per user, kept in step with Notification rows in the same transaction
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    unread = db.Column(db.Integer, nullable=False, default=0)
 
 class Report(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -96,4 +132,43 @@ class Report(db.Model):
     title = db.Column(db.String(200), nullable=False)
     report_type = db.Column(db.String(50), nullable=False)  # monthly, quarterly, yearly
     data = db.Column(db.Text)  # JSON data
-    generated_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    generated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ReportCache(db.Model):
+    # Report totals for one (user, type, period), reused while valid; linked to the Report row it is listed as
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    report_type = db.Column(db.String(50), nullable=False)  # monthly, quarterly, yearly
+    period_start = db.Column(db.Date, nullable=False)
+    period_end = db.Column(db.Date, nullable=False)
+    data_version = db.Column(db.Integer, nullable=False, default=0)
+    totals = db.Column(db.Text, nullable=False)  # JSON data
+    stale = db.Column(db.Boolean, nullable=False, default=False)  # set when a transaction lands in the period
+    report_id = db.Column(db.Integer, db.ForeignKey('report.id'))  # the user's Report row for this period, if listed
+    generated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Unique so stored totals can be upserted in one statement
+    __table_args__ = (db.Index('uq_report_cache_key', 'user_id', 'report_type', 'period_start', unique=True),)
+
+class UserDataVersion(db.Model):
+    # Incremented whenever a user's financial data changes; drives ETags for the JSON API
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ReportJob(db.Model):
+    # A report rendered by the background worker, with its output, so any instance can serve the download
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    report_type = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    output = db.Column(db.Text)
+    error = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+class SchemaMeta(db.Model):
+    # Facts about the deployed schema (its fingerprint, the search backend) so startup can skip DDL
+    key = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.String(255), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+
+from models.database import db, Transaction
+
+EXPORT_COLUMNS = ('id', 'date', 'description', 'category', 'amount', 'account_id')
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+def iter_transactions(user_id, start=None, end=None, batch_size=1000):
+    """Yield a user's transactions as tuples in (date, id) order.
+
+    Rows are fetched through a server-side cursor `batch_size` at a time, so
+    memory stays flat however long the history is.
+    """
+    statement = db.select(*(getattr(Transaction, name) for name in EXPORT_COLUMNS))\
+        .where(Transaction.user_id == user_id)
+    if start:
+        statement = statement.where(Transaction.date >= start)
+    if end:
+        statement = statement.where(Transaction.date <= end)
+    statement = statement.order_by(Transaction.date, Transaction.id)\
+        .execution_options(yield_per=batch_size)
+
+    for partition in db.session.execute(statement).partitions():
+        yield from partition
+
+def csv_chunks(rows, chunk_rows=500):
+    """Encode rows as CSV, yielding the header at once and then one chunk per `chunk_rows` rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield _drain(buffer)
+
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield _drain(buffer)
+            pending = 0
+    if pending:
+        yield _drain(buffer)
+
+def _drain(buffer):
+    value = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return value
+
+def ndjson_chunks(rows, chunk_rows=500):
+    """Encode rows as JSON Lines, yielding the first row at once and then one chunk per `chunk_rows` rows"""
+    lines = []
+    # The first row goes out alone so the client gets bytes as soon as the query returns
+    limit = 1
+    for row in rows:
+        item = dict(zip(EXPORT_COLUMNS, row))
+        item['date'] = item['date'].isoformat()
+        lines.append(json.dumps(item))
+        if len(lines) >= limit:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+            limit = chunk_rows
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+def export_chunks(user_id, export_format, start=None, end=None):
+    """Stream a user's transactions in `export_format` ('csv' or 'ndjson')"""
+    rows = iter_transactions(user_id, start, end)
+    if export_format == 'ndjson':
+        return ndjson_chunks(rows)
+    return csv_chunks(rows)
@@ -3,23 +3,32 @@ import warnings
 warnings.filterwarnings('ignore')
 
 from models.database import Transaction, Account
+from utils.concurrency import run_parallel
 
 class CashFlowForecaster:
     def __init__(self):
         self.model = None
         self.is_trained = False
     
-    def prepare_data(self, user_id, days_back=365):
-        """Prepare transaction data for forecasting"""
-        # Get user's transactions
+    def load_dataset(self, user_id, days_back=365):
+        """Load the transactions and accounts that forecasts and insights are built from"""
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=days_back)
         
-        transactions = Transaction.query.filter(
-            Transaction.user_id == user_id,
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        ).order_by(Transaction.date).all()
+        return run_parallel(
+            transactions=lambda: Transaction.query.filter(
+                Transaction.user_id == user_id,
+                Transaction.date >= start_date,
+                Transaction.date <= end_date
+            ).order_by(Transaction.date).all(),
+            accounts=lambda: Account.query.filter_by(user_id=user_id).all()
+        )
+    
+    def prepare_data(self, user_id, days_back=365, dataset=None):
+        """Prepare transaction data for forecasting"""
+        if dataset is None:
+            dataset = self.load_dataset(user_id, days_back)
+        transactions = dataset['transactions']
         
         if len(transactions) < 30:  # Need minimum data for forecasting
             return None
@@ -33,8 +42,7 @@ class CashFlowForecaster:
             data[date_str] += trans.amount
         
         # Calculate current balance
-        accounts = Account.query.filter_by(user_id=user_id).all()
-        current_balance = sum(account.balance for account in accounts)
+        current_balance = sum(account.balance for account in dataset['accounts'])
         
         return {
             'daily_flow': data,
@@ -54,9 +62,12 @@ class CashFlowForecaster:
         self.is_trained = True
         return True
     
-    def predict_cash_flow(self, user_id, days_ahead=30):
+    def predict_cash_flow(self, user_id, days_ahead=30, dataset=None):
         """Predict cash flow for specified days ahead"""
-        data = self.prepare_data(user_id)
+        # History and balances are fetched concurrently; the trend reuses the same history
+        if dataset is None:
+            dataset = self.load_dataset(user_id)
+        data = self.prepare_data(user_id, dataset=dataset)
         if data is None:
             return None
         
@@ -74,7 +85,7 @@ class CashFlowForecaster:
         confidence = 0.6
         
         # Analyze spending trends
-        recent_trend = self._analyze_spending_trend(user_id)
+        recent_trend = self._analyze_spending_trend(user_id, transactions=dataset['transactions'])
         
         return {
             'current_balance': current_balance,
@@ -86,16 +97,19 @@ class CashFlowForecaster:
             'trend': recent_trend
         }
     
-    def _analyze_spending_trend(self, user_id, days_back=30):
+    def _analyze_spending_trend(self, user_id, days_back=30, transactions=None):
         """Analyze recent spending trends"""
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=days_back)
         
-        transactions = Transaction.query.filter(
-            Transaction.user_id == user_id,
-            Transaction.date >= start_date,
-            Transaction.amount < 0  # Only expenses
-        ).all()
+        if transactions is None:
+            transactions = Transaction.query.filter(
+                Transaction.user_id == user_id,
+                Transaction.date >= start_date,
+                Transaction.amount < 0  # Only expenses
+            ).order_by(Transaction.date).all()
+        else:
+            transactions = [t for t in transactions if t.date >= start_date and t.amount < 0]
         
         if not transactions or len(transactions) < 10:
             return 'stable'
@@ -121,17 +135,20 @@ class CashFlowForecaster:
         """Calculate confidence score"""
         return 0.6  # Fixed confidence for simple model
     
-    def get_spending_insights(self, user_id):
+    def get_spending_insights(self, user_id, transactions=None):
         """Generate insights about spending patterns"""
         # Get last 90 days of transactions
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=90)
         
-        transactions = Transaction.query.filter(
-            Transaction.user_id == user_id,
-            Transaction.date >= start_date,
-            Transaction.amount < 0  # Only expenses
-        ).all()
+        if transactions is None:
+            transactions = Transaction.query.filter(
+                Transaction.user_id == user_id,
+                Transaction.date >= start_date,
+                Transaction.amount < 0  # Only expenses
+            ).all()
+        else:
+            transactions = [t for t in transactions if t.date >= start_date and t.amount < 0]
         
         if not transactions:
             return {}
@@ -0,0 +1,117 @@
+import importlib.util
+import math
+from datetime import datetime, timedelta
+
+# Optional numpy acceleration, imported on first use to keep it out of app start-up
+NUMPY_AVAILABLE = importlib.util.find_spec('numpy') is not None
+
+from models.database import db, Goal
+
+DAYS_PER_MONTH = 30.44
+
+# Contribution rates, as multiples of the forecast savings, that what-if grids use by default
+DEFAULT_SCENARIO_RATES = (0.5, 1.0, 1.5, 2.0)
+
+class GoalProjector:
+    """Projects when a user's active goals will be reached.
+
+    Monthly savings capacity comes from the user's net cash flow over the
+    lookback window (read from their cached spending timeline) and is split
+    across unfinished goals in proportion to the amount each still needs.
+    All goals and every scenario rate are projected together as one
+    goals x rates grid.
+    """
+
+    def __init__(self, timelines, lookback_days=90):
+        self.timelines = timelines
+        self.lookback_days = lookback_days
+
+    def monthly_savings(self, user_id):
+        """Average monthly income minus expenses over the lookback window"""
+        timeline = self.timelines.get(user_id)
+        end = datetime.now().date()
+        start = end - timedelta(days=self.lookback_days - 1)
+        net = timeline.total('income', start, end) - timeline.total('expenses', start, end)
+        return net / self.lookback_days * DAYS_PER_MONTH
+
+    def project(self, user_id, rates=DEFAULT_SCENARIO_RATES):
+        """Projection for every active goal, with a what-if row per contribution rate"""
+        goals = db.session.query(
+            Goal.id, Goal.title, Goal.category, Goal.target_amount, Goal.current_amount, Goal.target_date
+        ).filter(Goal.user_id == user_id, Goal.status == 'Active').order_by(Goal.target_date).all()
+
+        savings = self.monthly_savings(user_id)
+        result = {'monthly_savings': round(savings, 2), 'rates': list(rates), 'goals': []}
+        if not goals:
+            return result
+
+        today = datetime.now().date()
+        target = [float(g.target_amount or 0) for g in goals]
+        current = [float(g.current_amount or 0) for g in goals]
+        months_left = [
+            max((g.target_date - today).days / DAYS_PER_MONTH, 1.0) if g.target_date else None
+            for g in goals
+        ]
+
+        # The last column is the baseline: the forecast savings rate itself
+        columns = list(rates) + [1.0]
+        if NUMPY_AVAILABLE:
+            remaining, contributions, months = self._grid_numpy(target, current, savings, columns)
+        else:
+            remaining, contributions, months = self._grid_loop(target, current, savings, columns)
+
+        for i, goal in enumerate(goals):
+            projections = [
+                self._scenario(rate, contributions[i][j], months[i][j], goal.target_date, today)
+                for j, rate in enumerate(columns)
+            ]
+            baseline = projections.pop()
+
+            result['goals'].append({
+                'id': goal.id,
+                'title': goal.title,
+                'category': goal.category,
+                'target_amount': target[i],
+                'current_amount': current[i],
+                'remaining': round(float(remaining[i]), 2),
+                'progress_percent': round(min(current[i] / target[i] * 100, 100), 1) if target[i] > 0 else 100.0,
+                'target_date': goal.target_date.isoformat() if goal.target_date else None,
+                'required_monthly': round(float(remaining[i]) / months_left[i], 2) if months_left[i] else None,
+                'projected_monthly': baseline['monthly_contribution'],
+                'projected_completion': baseline['completion_date'],
+                'on_track': baseline['on_track'],
+                'scenarios': projections
+            })
+        return result
+
+    def _grid_numpy(self, target, current, savings, rates):
+        import numpy as np
+        remaining = np.maximum(np.asarray(target) - np.asarray(current), 0.0)
+        share = remaining / remaining.sum() if remaining.sum() > 0 else np.zeros_like(remaining)
+        contributions = np.outer(share * max(savings, 0.0), np.asarray(rates, dtype=np.float64))
+
+        months = np.full(contributions.shape, np.inf)
+        np.divide(remaining[:, None], contributions, out=months, where=contributions > 0)
+        months[remaining == 0, :] = 0.0
+        return remaining, contributions, months
+
+    def _grid_loop(self, target, current, savings, rates):
+        remaining = [max(t - c, 0.0) for t, c in zip(target, current)]
+        total = sum(remaining)
+        contributions, months = [], []
+        for need in remaining:
+            share = need / total if total > 0 else 0.0
+            row = [share * max(savings, 0.0) * rate for rate in rates]
+            contributions.append(row)
+            months.append([0.0 if need == 0 else (need / c if c > 0 else math.inf) for c in row])
+        return remaining, contributions, months
+
+    def _scenario(self, rate, contribution, months, target_date, today):
+        months = float(months)
+        completion = None if math.isinf(months) else today + timedelta(days=math.ceil(months * DAYS_PER_MONTH))
+        return {
+            'rate': rate,
+            'monthly_contribution': round(float(contribution), 2),
+            'completion_date': completion.isoformat() if completion else None,
+            'on_track': bool(completion and (target_date is None or completion <= target_date))
+        }
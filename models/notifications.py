@@ -0,0 +1,252 @@
+import json
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from models.database import db, upsert_insert, Account, Budget, BudgetCounter, Notification, NotificationCounter, Transaction, User
+
+class NotificationCenter:
+    """Creates notifications as transactions are ingested and delivers them.
+
+    evaluate() runs inside the ingest transaction and adds alerts for large
+    expenses, budgets crossing the warning or limit threshold, and balances
+    forecast to fall below the low-balance threshold. Each user's unread count
+    is a NotificationCounter row updated in the same transaction as the
+    notifications it counts, so reading it is one primary-key lookup that is
+    correct on every worker. After the commit, publish() pushes the new
+    notifications to the user's event streams open in this process. Streams
+    are short-lived: each one starts with the stored unread count and closes
+    after `stream_seconds`, and the browser reconnects, so a notification
+    raised on another worker shows up by the next reconnect at the latest.
+    """
+
+    def __init__(self, warning_percent=80, large_amount=500, low_balance=100,
+                 forecast_days=30, lookback_days=90, recent_days=7):
+        self.warning_percent = warning_percent
+        self.large_amount = large_amount
+        self.low_balance = low_balance
+        self.forecast_days = forecast_days
+        self.lookback_days = lookback_days
+        self.recent_days = recent_days
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def evaluate(self, transactions):
+        """Add notifications triggered by newly ingested transactions. Call before committing.
+
+        Returns (user_id, payload) pairs to hand to publish() after the commit.
+        """
+        if not transactions:
+            return []
+        notifications = (
+            self._large_transactions(transactions)
+            + self._budget_thresholds(transactions)
+            + self._low_balance_forecasts(transactions)
+        )
+        if not notifications:
+            return []
+        db.session.add_all(notifications)
+        # Flush for ids now; reading them after the commit would reload each row
+        db.session.flush()
+
+        added = defaultdict(int)
+        for notification in notifications:
+            added[notification.user_id] += 1
+        missing = [
+            user_id for user_id, count in added.items()
+            if not NotificationCounter.query.filter_by(user_id=user_id).update(
+                {NotificationCounter.unread: NotificationCounter.unread + count}, synchronize_session=False)
+        ]
+        self._create_counters(missing)
+        return [(n.user_id, serialize_notification(n)) for n in notifications]
+
+    def publish(self, pending):
+        """Push evaluated notifications to open streams once their transaction has committed"""
+        by_user = defaultdict(list)
+        for user_id, item in pending:
+            by_user[user_id].append(item)
+
+        with self._lock:
+            for user_id, items in by_user.items():
+                for subscriber in self._subscribers.get(user_id, ()):
+                    for item in items:
+                        subscriber.put(item)
+
+    def unread_count(self, user_id):
+        """Unread notifications for a user, from their counter row"""
+        stored = db.select(NotificationCounter.unread).where(NotificationCounter.user_id == user_id)
+        # Users without a row yet (no change since the counter was added) are counted instead;
+        # COALESCE only evaluates the count when the row is missing
+        counted = db.select(db.func.count(Notification.id)).where(
+            Notification.user_id == user_id,
+            Notification.is_read.is_(False)
+        )
+        return db.session.execute(db.select(
+            db.func.coalesce(stored.scalar_subquery(), counted.scalar_subquery())
+        )).scalar()
+
+    def mark_read(self, user_id, notification_ids=None):
+        """Mark some (or all) of a user's notifications read and return how many changed"""
+        query = Notification.query.filter_by(user_id=user_id, is_read=False)
+        if notification_ids is not None:
+            query = query.filter(Notification.id.in_(notification_ids))
+        changed = query.update({Notification.is_read: True}, synchronize_session=False)
+        if changed:
+            updated = NotificationCounter.query.filter_by(user_id=user_id).update({
+                NotificationCounter.unread: db.case(
+                    (NotificationCounter.unread > changed, NotificationCounter.unread - changed), else_=0)
+            }, synchronize_session=False)
+            if not updated:
+                self._create_counters([user_id])
+        db.session.commit()
+        return changed
+
+    def subscribe(self, user_id):
+        """Queue that receives the user's new notifications until unsubscribed"""
+        subscriber = queue.SimpleQueue()
+        with self._lock:
+            self._subscribers[user_id].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, user_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def stream(self, user_id, unread, stream_seconds=8, retry_seconds=5):
+        """Server-sent events: the unread count, then each new notification, for `stream_seconds`.
+
+        The stream then ends and the browser reconnects after `retry_seconds`,
+        so a stream never holds a worker for long. Runs outside the request's
+        app context, so it never touches the database.
+        """
+        subscriber = self.subscribe(user_id)
+        deadline = time.monotonic() + stream_seconds
+        try:
+            yield f"retry: {int(retry_seconds * 1000)}\nevent: unread\ndata: {json.dumps({'count': unread})}\n\n"
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    item = subscriber.get(timeout=remaining)
+                except queue.Empty:
+                    return
+                yield f"event: notification\ndata: {json.dumps(item)}\n\n"
+        finally:
+            self.unsubscribe(user_id, subscriber)
+
+    def _create_counters(self, user_ids):
+        """Create counter rows from the unread notifications, flushed new ones included"""
+        if not user_ids:
+            return
+        insert = upsert_insert(NotificationCounter).from_select(['user_id', 'unread'], db.select(
+            User.id, db.func.count(Notification.id)
+        ).select_from(User).outerjoin(Notification, db.and_(
+            Notification.user_id == User.id,
+            Notification.is_read.is_(False)
+        )).where(User.id.in_(user_ids)).group_by(User.id))
+        db.session.execute(insert.on_conflict_do_nothing(index_elements=[NotificationCounter.user_id]))
+
+    def _large_transactions(self, transactions):
+        # Backfilled history is not news; only alert on recent expenses
+        since = datetime.now().date() - timedelta(days=self.recent_days)
+        return [
+            Notification(
+                user_id=t.user_id,
+                title='Large transaction',
+                message=f'{t.description}: ${abs(t.amount):,.2f} on {t.date.isoformat()}',
+                type='warning'
+            )
+            for t in transactions
+            if t.amount < 0 and abs(t.amount) >= self.large_amount and t.date >= since
+        ]
+
+    def _budget_thresholds(self, transactions):
+        """Budgets whose month-to-date spend crossed a threshold with this ingest.
+
+        Runs after BudgetEngine.record_transactions, so counters already include
+        the new expenses; the spend before the ingest is the counter minus them.
+        """
+        current_month = datetime.now().date().replace(day=1)
+        added = defaultdict(float)
+        for t in transactions:
+            if t.amount < 0 and t.date >= current_month:
+                added[(t.user_id, t.category)] += abs(t.amount)
+        if not added:
+            return []
+
+        rows = db.session.query(
+            Budget.user_id, Budget.category, Budget.monthly_limit, BudgetCounter.spent
+        ).join(BudgetCounter, BudgetCounter.budget_id == Budget.id).filter(
+            Budget.user_id.in_({user_id for user_id, _ in added}),
+            Budget.category.in_({category for _, category in added}),
+            BudgetCounter.month == current_month
+        ).all()
+
+        notifications = []
+        for user_id, category, limit, spent in rows:
+            delta = added.get((user_id, category))
+            if not delta or not limit:
+                continue
+            before, after = (spent - delta) / limit * 100, spent / limit * 100
+            if before <= 100 < after:
+                title, kind = f'Budget exceeded: {category}', 'error'
+            elif before <= self.warning_percent < after:
+                title, kind = f'Budget alert: {category}', 'warning'
+            else:
+                continue
+            notifications.append(Notification(
+                user_id=user_id,
+                title=title,
+                message=f'You have spent ${spent:,.2f} of your ${limit:,.2f} {category} budget this month',
+                type=kind
+            ))
+        return notifications
+
+    def _low_balance_forecasts(self, transactions):
+        """Users whose balance is forecast to drop below the threshold, alerted once until read"""
+        today = datetime.now().date()
+        user_ids = {t.user_id for t in transactions}
+
+        balances = dict(db.session.query(Account.user_id, db.func.sum(Account.balance))
+                        .filter(Account.user_id.in_(user_ids)).group_by(Account.user_id).all())
+        # Average daily net flow over the lookback window, new transactions included (autoflushed)
+        net_flow = dict(db.session.query(Transaction.user_id, db.func.sum(Transaction.amount)).filter(
+            Transaction.user_id.in_(user_ids),
+            Transaction.date > today - timedelta(days=self.lookback_days),
+            Transaction.date <= today
+        ).group_by(Transaction.user_id).all())
+        already_alerted = {user_id for user_id, in db.session.query(Notification.user_id).filter(
+            Notification.user_id.in_(user_ids),
+            Notification.title == 'Low balance forecast',
+            Notification.is_read.is_(False)
+        ).distinct()}
+
+        notifications = []
+        for user_id in user_ids - already_alerted:
+            daily = (net_flow.get(user_id) or 0) / self.lookback_days
+            forecast = (balances.get(user_id) or 0) + daily * self.forecast_days
+            if forecast < self.low_balance:
+                notifications.append(Notification(
+                    user_id=user_id,
+                    title='Low balance forecast',
+                    message=f'Your balance is forecast to reach ${forecast:,.2f} in {self.forecast_days} days',
+                    type='warning'
+                ))
+        return notifications
+
+def serialize_notification(notification):
+    return {
+        'id': notification.id,
+        'title': notification.title,
+        'message': notification.message,
+        'type': notification.type,
+        'is_read': bool(notification.is_read),
+        'created_at': notification.created_at.isoformat() if notification.created_at else None
+    }
@@ -0,0 +1,253 @@
+import importlib.util
+from datetime import datetime, timedelta
+
+# Optional numpy acceleration, imported on first use to keep it out of app start-up
+NUMPY_AVAILABLE = importlib.util.find_spec('numpy') is not None
+
+from models.database import db, Investment, PriceHistory
+from utils.http_cache import bump_data_version
+
+def refresh_prices(price_cache, user_id=None):
+    """Update current_price on holdings from the shared price cache.
+
+    With no `user_id` every user's holdings are refreshed. Quotes are requested
+    once per distinct symbol and written with a single UPDATE, so the cost
+    scales with the number of symbols rather than the number of holdings.
+    Today's quotes are also recorded in PriceHistory.
+    Returns the number of holdings whose price changed.
+    """
+    symbols = db.session.query(Investment.symbol).distinct()
+    if user_id is not None:
+        symbols = symbols.filter(Investment.user_id == user_id)
+    prices = price_cache.get_prices(symbol for symbol, in symbols)
+    if not prices:
+        return 0
+
+    changed = db.and_(
+        Investment.symbol.in_(prices),
+        Investment.current_price != db.case(prices, value=Investment.symbol)
+    )
+    if user_id is not None:
+        changed = db.and_(changed, Investment.user_id == user_id)
+
+    affected_users = [row[0] for row in db.session.query(Investment.user_id).filter(changed).distinct()]
+    result = db.session.execute(
+        db.update(Investment).where(changed)
+        .values(current_price=db.case(prices, value=Investment.symbol))
+        .execution_options(synchronize_session=False)
+    )
+    record_closes(datetime.now().date(), prices)
+    bump_data_version(affected_users)
+    db.session.commit()
+    return result.rowcount
+
+def record_closes(day, prices):
+    """Store (or replace) one day's closing price per symbol. Caller commits."""
+    PriceHistory.query.filter(PriceHistory.date == day, PriceHistory.symbol.in_(prices))\
+        .delete(synchronize_session=False)
+    db.session.execute(db.insert(PriceHistory), [
+        {'symbol': symbol, 'date': day, 'close': close} for symbol, close in prices.items()
+    ])
+
+def backfill_price_history(provider, symbol, start, end=None):
+    """Fetch and store daily closes for `symbol` that are missing before its earliest stored day"""
+    end = end or datetime.now().date()
+    earliest = db.session.query(db.func.min(PriceHistory.date)).filter_by(symbol=symbol).scalar()
+    if earliest is not None:
+        if earliest <= start:
+            return 0
+        end = earliest - timedelta(days=1)
+
+    rows = provider.get_history([symbol], start, end).get(symbol, [])
+    if rows:
+        db.session.execute(db.insert(PriceHistory), [
+            {'symbol': symbol, 'date': day, 'close': close} for day, close in rows
+        ])
+    return len(rows)
+
+class PortfolioValuation:
+    """Daily value series for one user's holdings, with time-weighted returns and drawdowns.
+
+    Prices come from PriceHistory, carried forward over days without a close;
+    before a symbol's first known close a holding is valued at its purchase
+    price. Purchases inside the range are treated as external cash flows, so
+    returns measure performance rather than contributions.
+    """
+
+    def __init__(self, start, values, flows):
+        self.start = start
+        self.values = values
+        self.flows = flows
+
+    @classmethod
+    def build(cls, user_id, start=None, end=None):
+        """Value a user's holdings on every day from start to end"""
+        holdings = db.session.query(
+            Investment.symbol, Investment.shares, Investment.purchase_price,
+            Investment.purchase_date, Investment.current_price
+        ).filter(Investment.user_id == user_id).all()
+
+        today = datetime.now().date()
+        end = end or today
+        if start is not None and start > end:
+            raise ValueError('start must not be after end')
+        if not holdings:
+            return cls(start or end, [0.0], [0.0])
+        start = start or min(h.purchase_date for h in holdings)
+        if start > end:
+            raise ValueError('start must not be after end')
+
+        symbols = sorted({h.symbol for h in holdings})
+        closes = cls._load_closes(symbols, start, end)
+        if start <= today <= end:
+            # Holdings priced since the last stored close; never-priced ones keep their cost
+            for h in holdings:
+                if h.current_price:
+                    closes.setdefault((h.symbol, today), h.current_price)
+
+        if NUMPY_AVAILABLE:
+            values, flows = cls._value_matrix(holdings, symbols, closes, start, end)
+        else:
+            values, flows = cls._value_loop(holdings, symbols, closes, start, end)
+        return cls(start, values, flows)
+
+    @staticmethod
+    def _load_closes(symbols, start, end):
+        """{(symbol, date): close} in range, plus each symbol's last close before start"""
+        closes = {
+            (row.symbol, row.date): row.close
+            for row in db.session.query(PriceHistory.symbol, PriceHistory.date, PriceHistory.close).filter(
+                PriceHistory.symbol.in_(symbols),
+                PriceHistory.date >= start,
+                PriceHistory.date <= end
+            )
+        }
+
+        previous = db.session.query(
+            PriceHistory.symbol, db.func.max(PriceHistory.date).label('date')
+        ).filter(PriceHistory.symbol.in_(symbols), PriceHistory.date < start)\
+            .group_by(PriceHistory.symbol).subquery()
+        for symbol, close in db.session.query(PriceHistory.symbol, PriceHistory.close).join(
+            previous, db.and_(PriceHistory.symbol == previous.c.symbol, PriceHistory.date == previous.c.date)
+        ):
+            closes.setdefault((symbol, start), close)
+        return closes
+
+    @staticmethod
+    def _value_matrix(holdings, symbols, closes, start, end):
+        import numpy as np
+        days = (end - start).days + 1
+        column = {symbol: i for i, symbol in enumerate(symbols)}
+
+        # days x symbols price matrix, forward-filled down each column
+        prices = np.full((days, len(symbols)), np.nan)
+        if closes:
+            keys = list(closes)
+            rows = np.array([(day - start).days for _, day in keys])
+            cols = np.array([column[symbol] for symbol, _ in keys])
+            prices[rows, cols] = list(closes.values())
+        last_seen = np.where(~np.isnan(prices), np.arange(days)[:, None], 0)
+        np.maximum.accumulate(last_seen, axis=0, out=last_seen)
+        prices = prices[last_seen, np.arange(len(symbols))]
+
+        # days x holdings: each holding's price, and its shares from the purchase day on
+        shares = np.array([h.shares for h in holdings], dtype=np.float64)
+        cost = np.array([h.purchase_price for h in holdings], dtype=np.float64)
+        bought = np.array([(h.purchase_date - start).days for h in holdings])
+        holding_prices = prices[:, [column[h.symbol] for h in holdings]]
+        holding_prices = np.where(np.isnan(holding_prices), cost, holding_prices)
+        held = np.arange(days)[:, None] >= bought[None, :]
+
+        values = (held * shares * holding_prices).sum(axis=1)
+        flows = np.zeros(days)
+        in_range = (bought >= 0) & (bought < days)
+        np.add.at(flows, bought[in_range], (shares * cost)[in_range])
+        return values, flows
+
+    @staticmethod
+    def _value_loop(holdings, symbols, closes, start, end):
+        days = (end - start).days + 1
+        values, flows = [0.0] * days, [0.0] * days
+        current = {}
+        for i in range(days):
+            day = start + timedelta(days=i)
+            for symbol in symbols:
+                if (symbol, day) in closes:
+                    current[symbol] = closes[(symbol, day)]
+            for h in holdings:
+                offset = (h.purchase_date - start).days
+                if offset == i:
+                    flows[i] += h.shares * h.purchase_price
+                if offset <= i:
+                    values[i] += h.shares * current.get(h.symbol, h.purchase_price)
+        return values, flows
+
+    def daily_returns(self):
+        """Return for each day, net of that day's purchases (0 on the first day)"""
+        if NUMPY_AVAILABLE:
+            import numpy as np
+            values, flows = np.asarray(self.values, dtype=np.float64), np.asarray(self.flows, dtype=np.float64)
+            previous, value, flow = values[:-1], values[1:], flows[1:]
+            # Divide by the prior value, or by the day's purchases when starting from nothing
+            base = np.where(previous > 0, previous, flow)
+            gain = np.where(previous > 0, value - flow, value)
+            returns = np.zeros(len(values))
+            np.divide(gain, base, out=returns[1:], where=base > 0)
+            returns[1:] -= base > 0
+            return returns
+
+        returns = [0.0] * len(self.values)
+        for i in range(1, len(self.values)):
+            previous, value, flow = self.values[i - 1], self.values[i], self.flows[i]
+            if previous > 0:
+                returns[i] = (value - flow) / previous - 1
+            elif flow > 0:
+                returns[i] = value / flow - 1
+        return returns
+
+    def growth_index(self):
+        """Value of $1 invested at the start, compounding the daily returns"""
+        returns = self.daily_returns()
+        if NUMPY_AVAILABLE:
+            import numpy as np
+            return np.cumprod(1 + returns)
+        index, level = [], 1.0
+        for r in returns:
+            level *= 1 + r
+            index.append(level)
+        return index
+
+    def drawdowns(self, index=None):
+        """Fractional decline of the growth index from its running peak"""
+        index = self.growth_index() if index is None else index
+        if NUMPY_AVAILABLE:
+            import numpy as np
+            return index / np.maximum.accumulate(index) - 1
+        peak, result = 0.0, []
+        for level in index:
+            peak = max(peak, level)
+            result.append(level / peak - 1)
+        return result
+
+    def to_dict(self):
+        """Series and summary statistics for the API"""
+        index = self.growth_index()
+        drawdowns = self.drawdowns(index)
+        values = [round(float(v), 2) for v in self.values]
+        drawdowns = [float(d) for d in drawdowns]
+        worst = min(range(len(drawdowns)), key=drawdowns.__getitem__)
+
+        return {
+            'dates': [(self.start + timedelta(days=i)).isoformat() for i in range(len(values))],
+            'values': values,
+            'time_weighted_return': [round((float(level) - 1) * 100, 2) for level in index],
+            'drawdown': [round(d * 100, 2) for d in drawdowns],
+            'summary': {
+                'start_value': values[0],
+                'end_value': values[-1],
+                'contributions': round(float(sum(self.flows)), 2),
+                'time_weighted_return': round((float(index[-1]) - 1) * 100, 2),
+                'max_drawdown': round(drawdowns[worst] * 100, 2),
+                'max_drawdown_date': (self.start + timedelta(days=worst)).isoformat()
+            }
+        }
@@ -0,0 +1,116 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from models.database import db, ReportJob, User
+from models.reports import REPORT_TYPES, render_report_text
+from utils.log import get_logger
+
+logger = get_logger('report_jobs')
+
+IN_FLIGHT = ('queued', 'running')
+
+class JobLimitExceeded(Exception):
+    """The user already has the maximum number of report jobs in flight"""
+
+class ReportJobQueue:
+    """Renders reports on a small local worker pool, tracked in the ReportJob table.
+
+    The pool is separate from request threads and the query pool, and each user
+    may only have `per_user_limit` jobs queued or running, so a burst of report
+    requests waits on the workers instead of competing with interactive traffic.
+    The limit and the rendered output live on the ReportJob rows, so any
+    instance can enforce the one and serve the other. A job still in flight
+    after `timeout` seconds is marked failed, since the process running it may
+    have died or been frozen.
+    """
+
+    def __init__(self, report_store, max_workers=2, per_user_limit=2, timeout=300):
+        self.report_store = report_store
+        self.max_workers = max_workers
+        self.per_user_limit = per_user_limit
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, app, user_id, report_type):
+        """Record a queued job and hand it to the worker pool"""
+        if report_type not in REPORT_TYPES:
+            raise ValueError(f"report_type must be one of: {', '.join(REPORT_TYPES)}")
+
+        self.expire_stale(user_id)
+        job_id = uuid.uuid4().hex
+        in_flight = db.select(db.func.count(ReportJob.id)).where(
+            ReportJob.user_id == user_id,
+            ReportJob.status.in_(IN_FLIGHT)
+        ).scalar_subquery()
+        # The INSERT checks the cap itself, so concurrent submits can't both slip under it
+        row = db.select(
+            db.literal(job_id), db.literal(user_id), db.literal(report_type),
+            db.literal('queued'), db.literal(datetime.utcnow())
+        ).where(in_flight < self.per_user_limit)
+        inserted = db.session.execute(db.insert(ReportJob).from_select(
+            ['id', 'user_id', 'report_type', 'status', 'created_at'], row
+        )).rowcount
+        db.session.commit()
+        if not inserted:
+            raise JobLimitExceeded(f'At most {self.per_user_limit} report jobs may run at once')
+
+        self._get_executor().submit(self._run, app, job_id)
+        return db.session.get(ReportJob, job_id)
+
+    def get(self, user_id, job_id):
+        """A user's job, failed first if it has been in flight longer than the timeout"""
+        self.expire_stale(user_id)
+        return ReportJob.query.filter_by(id=job_id, user_id=user_id).first()
+
+    def expire_stale(self, user_id):
+        """Mark the user's jobs that have been in flight longer than the timeout as failed"""
+        now = datetime.utcnow()
+        expired = ReportJob.query.filter(
+            ReportJob.user_id == user_id,
+            ReportJob.status.in_(IN_FLIGHT),
+            ReportJob.created_at < now - timedelta(seconds=self.timeout)
+        ).update({ReportJob.status: 'failed', ReportJob.error: 'Timed out', ReportJob.finished_at: now},
+                 synchronize_session=False)
+        if expired:
+            db.session.commit()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='report')
+        return self._executor
+
+    def _run(self, app, job_id):
+        with app.app_context():
+            try:
+                # Claim and finish the job with conditional updates, so a job another
+                # instance has timed out in the meantime stays failed
+                claimed = ReportJob.query.filter_by(id=job_id, status='queued')\
+                    .update({ReportJob.status: 'running'}, synchronize_session=False)
+                db.session.commit()
+                if not claimed:
+                    return
+
+                job = db.session.get(ReportJob, job_id)
+                report_data = self.report_store.get(job.user_id, job.report_type)
+                user = db.session.get(User, job.user_id)
+                output = render_report_text(job.report_type, report_data, user.name, datetime.now())
+                finished = ReportJob.query.filter_by(id=job_id, status='running').update(
+                    {ReportJob.status: 'done', ReportJob.output: output, ReportJob.finished_at: datetime.utcnow()},
+                    synchronize_session=False)
+                db.session.commit()
+                if not finished:
+                    logger.warning("Report job %s finished after it was marked failed", job_id)
+            except Exception as e:
+                logger.exception("Report job %s failed", job_id)
+                db.session.rollback()
+                ReportJob.query.filter(ReportJob.id == job_id, ReportJob.status.in_(IN_FLIGHT)).update(
+                    {ReportJob.status: 'failed', ReportJob.error: str(e)[:255], ReportJob.finished_at: datetime.utcnow()},
+                    synchronize_session=False)
+                db.session.commit()
+            finally:
+                db.session.remove()
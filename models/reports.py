@@ -0,0 +1,273 @@
+import json
+from datetime import datetime, timedelta
+
+from models.database import db, upsert_insert, Report, ReportCache, Transaction
+from utils.helpers import add_months
+from utils.http_cache import get_data_version
+
+REPORT_TYPES = ('monthly', 'quarterly', 'yearly')
+
+def empty_totals():
+    return {'income': 0.0, 'expenses': 0.0, 'count': 0, 'categories': {}}
+
+def merge_totals(target, totals):
+    """Add one set of period totals into another"""
+    target['income'] += totals['income']
+    target['expenses'] += totals['expenses']
+    target['count'] += totals['count']
+    for category, amount in totals['categories'].items():
+        target['categories'][category] = target['categories'].get(category, 0) + amount
+    return target
+
+def summarize(totals):
+    """Report data in the shape the API and downloads use"""
+    net_savings = totals['income'] - totals['expenses']
+    top_categories = sorted(totals['categories'].items(), key=lambda x: x[1], reverse=True)[:5]
+
+    return {
+        'total_income': totals['income'],
+        'total_expenses': totals['expenses'],
+        'net_savings': net_savings,
+        'savings_rate': (net_savings / totals['income'] * 100) if totals['income'] > 0 else 0,
+        'top_categories': top_categories,
+        'transaction_count': totals['count']
+    }
+
+def report_period(report_type, today):
+    """(start, end) of the report period that contains `today`"""
+    if report_type == 'monthly':
+        return today.replace(day=1), today
+    if report_type == 'quarterly':
+        return today - timedelta(days=90), today
+    return today.replace(month=1, day=1), today
+
+def report_title(report_type, start, end):
+    """Display name of a report in the user's report list"""
+    if report_type == 'monthly':
+        return f"Monthly Report - {start.strftime('%B %Y')}"
+    if report_type == 'yearly':
+        return f"Yearly Report - {start.year}"
+    return f"Quarterly Report - {start.strftime('%b %d, %Y')} to {end.strftime('%b %d, %Y')}"
+
+def render_report_text(report_type, report_data, user_name, generated_at):
+    """Plain-text rendering of a report for download"""
+    content = f"""
+FINANCE MENTOR AI - {report_type.upper()} REPORT
+Generated: {generated_at.strftime('%Y-%m-%d %H:%M:%S')}
+User: {user_name}
+
+FINANCIAL SUMMARY:
+- Total Income: ${report_data.get('total_income', 0):,.2f}
+- Total Expenses: ${report_data.get('total_expenses', 0):,.2f}
+- Net Savings: ${report_data.get('net_savings', 0):,.2f}
+- Savings Rate: {report_data.get('savings_rate', 0):.1f}%
+
+TOP EXPENSE CATEGORIES:
+"""
+    for category, amount in report_data.get('top_categories', []):
+        content += f"- {category}: ${amount:,.2f}\n"
+    return content
+
+class ReportStore:
+    """Builds report data from grouped aggregates and persists it in the ReportCache table.
+
+    A stored report is reused while its period end is unchanged and, for
+    periods still in progress, while the user's data version is unchanged.
+    Closed months never expire on their own; ingesting a transaction dated
+    inside one marks its stored reports stale (see invalidate). Yearly reports
+    combine the stored closed months with a fresh read of the current month.
+    Each generated report is also listed as one Report row per (user, type,
+    period), updated in place when the period is regenerated.
+    """
+
+    def get(self, user_id, report_type):
+        """Report data for the period containing today, from storage when still valid"""
+        if report_type not in REPORT_TYPES:
+            report_type = 'yearly'
+        today = datetime.now().date()
+        start, end = report_period(report_type, today)
+        version = get_data_version(user_id)
+
+        entry = self._entries(user_id, report_type, [start]).get(start)
+        if entry is not None and self._is_valid(entry, report_type, end, version, today):
+            summary = summarize(json.loads(entry.totals))
+            if entry.report_id is None:
+                # Stored as part of a yearly report, but never listed on its own
+                entry.report_id = self._record_report(None, user_id, report_type, start, end, summary)
+                db.session.commit()
+            return summary
+
+        if report_type == 'yearly':
+            totals = self._yearly_totals(user_id, start, today, version)
+        else:
+            totals = self._period_totals(user_id, start, end)
+
+        summary = summarize(totals)
+        report_id = self._record_report(entry.report_id if entry else None, user_id, report_type, start, end, summary)
+        self._save_many(user_id, report_type, [(start, end, totals)], version, report_id=report_id)
+        db.session.commit()
+        return summary
+
+    def invalidate(self, entries):
+        """Mark stored reports whose period contains a newly ingested transaction as stale.
+
+        `entries` are (user_id, date) pairs. Call before committing the ingest.
+        Stale rows are kept so regenerating the period updates its Report row.
+        """
+        periods = {}
+        for user_id, day in entries:
+            periods.setdefault(user_id, set()).update([
+                ('monthly', day.replace(day=1)),
+                ('yearly', day.replace(month=1, day=1))
+            ])
+
+        for user_id, user_periods in periods.items():
+            ReportCache.query.filter(
+                ReportCache.user_id == user_id,
+                db.or_(*[
+                    db.and_(ReportCache.report_type == report_type, ReportCache.period_start == start)
+                    for report_type, start in user_periods
+                ])
+            ).update({ReportCache.stale: True}, synchronize_session=False)
+
+    def _yearly_totals(self, user_id, year_start, today, version):
+        """Combine stored closed months with only the current month read fresh"""
+        current_month = today.replace(day=1)
+        periods = []
+        month_start = year_start
+        while month_start < current_month:
+            periods.append((month_start, add_months(month_start, 1) - timedelta(days=1)))
+            month_start = add_months(month_start, 1)
+        periods.append((current_month, today))
+
+        entries = self._entries(user_id, 'monthly', [start for start, _ in periods])
+        stored = {
+            start: json.loads(entries[start].totals)
+            for start, end in periods
+            if start in entries and self._is_valid(entries[start], 'monthly', end, version, today)
+        }
+
+        totals = empty_totals()
+        missing = [(start, end) for start, end in periods[:-1] if start not in stored]
+        for start, _ in periods[:-1]:
+            if start in stored:
+                merge_totals(totals, stored[start])
+
+        unsaved = []
+        if missing:
+            # One grouped query covers every closed month that isn't stored yet
+            by_month = self._monthly_totals(user_id, missing[0][0], current_month - timedelta(days=1))
+            for month_start, month_end in missing:
+                month_totals = by_month.get(month_start, empty_totals())
+                unsaved.append((month_start, month_end, month_totals))
+                merge_totals(totals, month_totals)
+
+        current = stored.get(current_month)
+        if current is None:
+            current = self._period_totals(user_id, current_month, today)
+            unsaved.append((current_month, today, current))
+
+        if unsaved:
+            self._save_many(user_id, 'monthly', unsaved, version)
+        return merge_totals(totals, current)
+
+    def _monthly_totals(self, user_id, start, end):
+        """Totals per calendar month between start and end, from one grouped query"""
+        year = db.extract('year', Transaction.date)
+        month = db.extract('month', Transaction.date)
+        rows = self._aggregate(user_id, start, end, year, month)
+
+        by_month = {}
+        for row in rows:
+            month_start = start.replace(year=int(row[0]), month=int(row[1]), day=1)
+            self._add_row(by_month.setdefault(month_start, empty_totals()), row)
+        return by_month
+
+    def _period_totals(self, user_id, start, end):
+        totals = empty_totals()
+        for row in self._aggregate(user_id, start, end):
+            self._add_row(totals, row)
+        return totals
+
+    def _aggregate(self, user_id, start, end, *group_by):
+        return db.session.query(
+            *group_by,
+            Transaction.category,
+            db.func.sum(db.case((Transaction.amount > 0, Transaction.amount), else_=0)),
+            db.func.sum(db.case((Transaction.amount < 0, -Transaction.amount), else_=0)),
+            db.func.count(Transaction.id)
+        ).filter(
+            Transaction.user_id == user_id,
+            Transaction.date >= start,
+            Transaction.date <= end
+        ).group_by(*group_by, Transaction.category).all()
+
+    def _add_row(self, totals, row):
+        category, income, expenses, count = row[-4:]
+        totals['income'] += float(income or 0)
+        totals['expenses'] += float(expenses or 0)
+        totals['count'] += count
+        if expenses:
+            totals['categories'][category] = totals['categories'].get(category, 0) + float(expenses)
+
+    def _entries(self, user_id, report_type, starts):
+        """Stored rows for the given period starts, valid or not, keyed by start"""
+        entries = ReportCache.query.filter(
+            ReportCache.user_id == user_id,
+            ReportCache.report_type == report_type,
+            ReportCache.period_start.in_(starts)
+        ).all()
+        return {entry.period_start: entry for entry in entries}
+
+    def _is_valid(self, entry, report_type, end, version, today):
+        if entry.stale or entry.period_end != end:
+            return False
+        # Only whole past months are final; anything still in progress must match the data version
+        period_closed = report_type == 'monthly' and end < today
+        return period_closed or entry.data_version == version
+
+    def _save_many(self, user_id, report_type, periods, version, report_id=None):
+        """Upsert stored totals for each (start, end, totals) period in one statement"""
+        now = datetime.utcnow()
+        rows = [{
+            'user_id': user_id,
+            'report_type': report_type,
+            'period_start': start,
+            'period_end': end,
+            'data_version': version,
+            'totals': json.dumps(totals),
+            'stale': False,
+            'report_id': report_id,
+            'generated_at': now
+        } for start, end, totals in periods]
+
+        insert = upsert_insert(ReportCache).values(rows)
+        updates = {
+            column: insert.excluded[column]
+            for column in ('period_end', 'data_version', 'totals', 'stale', 'generated_at')
+        }
+        if report_id is not None:
+            updates['report_id'] = insert.excluded.report_id
+        db.session.execute(insert.on_conflict_do_update(
+            index_elements=[ReportCache.user_id, ReportCache.report_type, ReportCache.period_start],
+            set_=updates
+        ))
+
+    def _record_report(self, report_id, user_id, report_type, start, end, summary):
+        """Update the period's Report row, or create it; returns its id"""
+        data = json.dumps(dict(summary, period_start=start.isoformat(), period_end=end.isoformat()))
+        if report_id is not None:
+            updated = Report.query.filter_by(id=report_id).update(
+                {Report.data: data, Report.generated_at: datetime.utcnow()}, synchronize_session=False)
+            if updated:
+                return report_id
+
+        report = Report(
+            user_id=user_id,
+            title=report_title(report_type, start, end),
+            report_type=report_type,
+            data=data
+        )
+        db.session.add(report)
+        db.session.flush()
+        return report.id
@@ -0,0 +1,56 @@
+import hashlib
+import logging
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from models.database import db, SchemaMeta
+from models.search import POSTGRES_FTS_DDL, SQLITE_FTS_DDL
+from utils.log import get_logger, log_event
+
+logger = get_logger('schema')
+
+def schema_fingerprint(engine=None):
+    """Hash of the DDL the models and search index would create on this engine's dialect"""
+    dialect = (engine or db.engine).dialect
+    digest = hashlib.sha256()
+    for table in db.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=dialect)).encode())
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode())
+    for statement in SQLITE_FTS_DDL + POSTGRES_FTS_DDL:
+        digest.update(statement.encode())
+    return digest.hexdigest()[:16]
+
+def ensure_schema(search, force=False):
+    """Create missing tables and the search index unless the stored fingerprint is current.
+
+    Run it once per deploy (`flask init-db`) or at process start, never on a
+    request. When the schema is current this is a single read of SchemaMeta
+    with no catalog introspection. Missing tables are created, and so are
+    missing indexes on existing tables; changing an existing table's columns
+    still needs a migration. Returns True if DDL ran.
+    """
+    fingerprint = schema_fingerprint()
+    try:
+        stored = dict(db.session.query(SchemaMeta.key, SchemaMeta.value).all())
+    except DBAPIError:
+        # No metadata table yet: a fresh database
+        db.session.rollback()
+        stored = {}
+
+    if not force and stored.get('fingerprint') == fingerprint:
+        search.backend = stored.get('search_backend')
+        return False
+
+    db.create_all()
+    # create_all skips tables that already exist, indexes included
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+    backend = search.ensure_index()
+    db.session.merge(SchemaMeta(key='fingerprint', value=fingerprint))
+    db.session.merge(SchemaMeta(key='search_backend', value=backend))
+    db.session.commit()
+    log_event(logger, logging.INFO, 'schema_initialized', fingerprint=fingerprint, search_backend=backend)
+    return True
@@ -0,0 +1,154 @@
+import re
+from contextlib import contextmanager
+
+from models.database import db, Transaction
+from utils.log import get_logger
+
+logger = get_logger('search')
+
+# SQLite: contentless FTS5 table kept in sync by triggers. The owner column holds
+# a "u<user_id>" token so a user's matches are found by intersecting posting lists
+# instead of filtering every user's hits.
+SQLITE_FTS_DDL = [
+    '''CREATE VIRTUAL TABLE IF NOT EXISTS transaction_fts USING fts5(
+        description, owner, content='', tokenize='unicode61'
+    )''',
+    '''CREATE TRIGGER IF NOT EXISTS transaction_fts_insert AFTER INSERT ON "transaction" BEGIN
+        INSERT INTO transaction_fts(rowid, description, owner) VALUES (new.id, new.description, 'u' || new.user_id);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS transaction_fts_delete AFTER DELETE ON "transaction" BEGIN
+        INSERT INTO transaction_fts(transaction_fts, rowid, description, owner)
+            VALUES ('delete', old.id, old.description, 'u' || old.user_id);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS transaction_fts_update AFTER UPDATE OF description, user_id ON "transaction" BEGIN
+        INSERT INTO transaction_fts(transaction_fts, rowid, description, owner)
+            VALUES ('delete', old.id, old.description, 'u' || old.user_id);
+        INSERT INTO transaction_fts(rowid, description, owner) VALUES (new.id, new.description, 'u' || new.user_id);
+    END''',
+]
+
+SQLITE_FTS_BACKFILL = '''
+    INSERT INTO transaction_fts(rowid, description, owner)
+    SELECT id, description, 'u' || user_id FROM "transaction"
+'''
+
+# PostgreSQL: GIN expression index, maintained by the database on every write
+POSTGRES_FTS_DDL = [
+    '''CREATE INDEX IF NOT EXISTS ix_transaction_description_fts
+        ON "transaction" USING GIN (to_tsvector('simple', description))''',
+]
+
+SQLITE_SEARCH = '''
+    SELECT t.id, t.date, t.description, t.category, t.amount, bm25(transaction_fts, 1.0, 0.0) AS rank
+    FROM transaction_fts
+    JOIN "transaction" t ON t.id = transaction_fts.rowid
+    WHERE transaction_fts MATCH :query
+    ORDER BY rank
+    LIMIT :limit
+'''
+
+POSTGRES_SEARCH = '''
+    SELECT t.id, t.date, t.description, t.category, t.amount,
+           ts_rank(to_tsvector('simple', t.description), to_tsquery('simple', :query)) AS rank
+    FROM "transaction" t
+    WHERE to_tsvector('simple', t.description) @@ to_tsquery('simple', :query) AND t.user_id = :user_id
+    ORDER BY rank DESC, t.date DESC
+    LIMIT :limit
+'''
+
+def tokenize(text):
+    """Split a search string into lowercase word tokens"""
+    return re.findall(r'\w+', (text or '').lower())
+
+class TransactionSearch:
+    """Full-text search over transaction descriptions.
+
+    Uses FTS5 on SQLite and a tsvector GIN index on PostgreSQL; every token is
+    matched as a prefix ("ube" finds "Uber"). Other databases, or SQLite builds
+    without FTS5, fall back to a LIKE scan.
+    """
+
+    def __init__(self):
+        self.backend = None
+
+    def ensure_index(self, engine=None):
+        """Create the search index and its sync triggers if missing (idempotent)"""
+        engine = engine or db.engine
+        dialect = engine.dialect.name
+
+        try:
+            with engine.begin() as connection:
+                if dialect == 'sqlite':
+                    exists = connection.exec_driver_sql(
+                        "SELECT 1 FROM sqlite_master WHERE name = 'transaction_fts'"
+                    ).first()
+                    for statement in SQLITE_FTS_DDL:
+                        connection.exec_driver_sql(statement)
+                    if not exists:
+                        # Index rows that were written before the triggers existed
+                        connection.exec_driver_sql(SQLITE_FTS_BACKFILL)
+                    self.backend = 'fts5'
+                elif dialect == 'postgresql':
+                    for statement in POSTGRES_FTS_DDL:
+                        connection.exec_driver_sql(statement)
+                    self.backend = 'tsvector'
+                else:
+                    self.backend = 'like'
+        except Exception:
+            logger.exception("Could not create full-text index; falling back to LIKE search")
+            self.backend = 'like'
+
+        return self.backend
+
+    @contextmanager
+    def deferred_indexing(self, connection):
+        """Index transactions inserted inside the block in one pass when it exits.
+
+        For bulk loads on SQLite, where the per-row insert trigger costs more
+        than the insert itself. Use inside an open write transaction so no
+        other writer can add rows while the trigger is dropped; if the block
+        raises, rolling back restores the trigger. Other backends need no help.
+        """
+        if self.backend != 'fts5':
+            yield
+            return
+        last_id = connection.exec_driver_sql('SELECT COALESCE(MAX(id), 0) FROM "transaction"').scalar()
+        connection.exec_driver_sql('DROP TRIGGER IF EXISTS transaction_fts_insert')
+        yield
+        connection.exec_driver_sql(SQLITE_FTS_BACKFILL + ' WHERE id > ?', (last_id,))
+        connection.exec_driver_sql(SQLITE_FTS_DDL[1])
+
+    def search(self, user_id, text, limit=50):
+        """Rank a user's transactions by how well their description matches `text`"""
+        tokens = tokenize(text)
+        if not tokens:
+            return []
+        if self.backend is None:
+            self.ensure_index()
+
+        if self.backend == 'fts5':
+            terms = ' '.join(f'"{token}"*' for token in tokens)
+            query = f'owner : "u{int(user_id)}" AND description : ({terms})'
+            rows = db.session.execute(db.text(SQLITE_SEARCH), {'query': query, 'limit': limit}).all()
+        elif self.backend == 'tsvector':
+            query = ' & '.join(f'{token}:*' for token in tokens)
+            rows = db.session.execute(db.text(POSTGRES_SEARCH),
+                                      {'query': query, 'user_id': user_id, 'limit': limit}).all()
+        else:
+            conditions = [db.func.lower(Transaction.description).contains(token, autoescape=True) for token in tokens]
+            rows = db.session.query(
+                Transaction.id, Transaction.date, Transaction.description,
+                Transaction.category, Transaction.amount
+            ).filter(Transaction.user_id == user_id, *conditions)\
+                .order_by(Transaction.date.desc()).limit(limit).all()
+
+        return [
+            {
+                'id': row.id,
+                'date': str(row.date),
+                'description': row.description,
+                'category': row.category,
+                'amount': row.amount
+            }
+            for row in rows
+        ]
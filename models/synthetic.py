@@ -0,0 +1,306 @@
+import contextlib
+import csv
+import io
+import itertools
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from api.prices import FakePriceProvider
+from models.database import db, Account, Budget, Goal, Investment, Transaction, User
+
+# description, category, (low, high) monthly amount, day of month it posts
+RECURRING_BILLS = [
+    ('Rent Payment', 'Rent', (900, 2400), 1),
+    ('Gym Membership', 'Health', (30, 60), 3),
+    ('Netflix Subscription', 'Entertainment', (15, 20), 5),
+    ('Spotify Premium', 'Entertainment', (10, 12), 9),
+    ('Electric Bill', 'Bills', (60, 160), 12),
+    ('Internet Service', 'Bills', (50, 90), 15),
+    ('Phone Bill', 'Bills', (35, 95), 18),
+    ('Car Insurance', 'Transportation', (90, 180), 22),
+]
+
+# description, category, typical amount, visits per week
+EVERYDAY_SPENDING = [
+    ('Starbucks Coffee', 'Food and Drink', 7, 3.0),
+    ('Grocery Store', 'Food and Drink', 85, 1.5),
+    ('Restaurant Dinner', 'Food and Drink', 55, 0.8),
+    ('Gas Station', 'Transportation', 45, 1.0),
+    ('Uber Ride', 'Transportation', 22, 0.7),
+    ('Amazon Purchase', 'Shopping', 45, 0.9),
+    ('Pharmacy', 'Health', 25, 0.3),
+    ('Movie Theater', 'Entertainment', 30, 0.25),
+]
+
+# Categories people spend more on at weekends
+WEEKEND_CATEGORIES = {'Food and Drink', 'Entertainment', 'Shopping'}
+
+GOAL_TEMPLATES = [
+    ('Emergency Fund', 'Savings', (5000, 20000)),
+    ('Vacation', 'Travel', (1500, 6000)),
+    ('New Car', 'Transportation', (8000, 30000)),
+    ('Home Down Payment', 'Housing', (20000, 80000)),
+]
+
+INVESTMENT_NAMES = {
+    'AAPL': 'Apple Inc.',
+    'MSFT': 'Microsoft Corporation',
+    'GOOGL': 'Alphabet Inc.',
+    'AMZN': 'Amazon.com Inc.',
+    'TSLA': 'Tesla Inc.',
+    'NVDA': 'NVIDIA Corporation',
+    'VOO': 'Vanguard S&P 500 ETF',
+    'SPY': 'SPDR S&P 500 ETF',
+}
+
+DEMO_ACCOUNTS = [
+    ('Demo Checking Account', 'depository', 2500.00),
+    ('Demo Savings Account', 'depository', 8750.00),
+]
+
+FIRST_NAMES = ['Alex', 'Jordan', 'Sam', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie', 'Avery', 'Quinn']
+LAST_NAMES = ['Smith', 'Garcia', 'Chen', 'Patel', 'Johnson', 'Okafor', 'Novak', 'Silva', 'Kim', 'Larsen']
+
+class BulkLoader:
+    """Inserts rows in chunks through the fastest path the database driver offers.
+
+    PostgreSQL on psycopg2 streams each chunk with COPY; everything else uses
+    a single executemany per chunk. Rows bypass the ORM, so column defaults
+    must be supplied by the caller and the caller commits.
+    """
+
+    def __init__(self, connection, chunk_size=10000):
+        self.connection = connection
+        self.chunk_size = chunk_size
+        self.use_copy = connection.dialect.name == 'postgresql' and connection.dialect.driver == 'psycopg2'
+
+    def insert(self, model, rows):
+        """Insert an iterable of column dicts (all with the same keys) and return how many were written"""
+        table = model.__table__
+        rows = iter(rows)
+        total = 0
+        while True:
+            chunk = list(itertools.islice(rows, self.chunk_size))
+            if not chunk:
+                return total
+            if self.use_copy:
+                self._copy(table, chunk)
+            else:
+                self.connection.execute(table.insert(), chunk)
+            total += len(chunk)
+
+    def _copy(self, table, chunk):
+        columns = list(chunk[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in chunk:
+            writer.writerow(['' if row[column] is None else row[column] for column in columns])
+        buffer.seek(0)
+
+        preparer = self.connection.dialect.identifier_preparer
+        statement = (f"COPY {preparer.format_table(table)} "
+                     f"({', '.join(preparer.quote(column) for column in columns)}) FROM STDIN WITH (FORMAT csv)")
+        cursor = self.connection.connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(statement, buffer)
+        finally:
+            cursor.close()
+
+class SyntheticProfile:
+    """One person's finances: pay, recurring bills and everyday spending habits"""
+
+    def __init__(self, rng):
+        self.rng = rng
+        annual_salary = rng.uniform(35000, 160000)
+        self.biweekly = rng.random() < 0.6
+        # Take-home pay per paycheck, after roughly a quarter goes to tax
+        self.paycheck = annual_salary * 0.75 / (26 if self.biweekly else 12)
+        self.payday_offset = rng.randrange(14)
+
+        scale = (annual_salary / 80000) ** 0.5
+        self.bills = [
+            (description, category, round(rng.uniform(*amounts) * (scale if category == 'Rent' else 1), 2), day)
+            for description, category, amounts, day in RECURRING_BILLS
+            if category == 'Rent' or rng.random() < 0.7
+        ]
+        self.habits = [
+            (description, category, typical * scale * rng.uniform(0.8, 1.2), per_week * rng.uniform(0.5, 1.5) / 7)
+            for description, category, typical, per_week in EVERYDAY_SPENDING
+        ]
+
+    def transactions(self, start, end):
+        """(date, amount, description, category) for every day from start to end"""
+        rng = self.rng
+        day = start
+        while day <= end:
+            weekend = day.weekday() >= 5
+            if self.biweekly:
+                paid = day.weekday() == 4 and (day.toordinal() // 7 + self.payday_offset) % 2 == 0
+            else:
+                paid = day.day == 1
+            if paid:
+                yield day, round(self.paycheck * rng.uniform(0.98, 1.02), 2), 'Salary Deposit', 'Income'
+
+            for description, category, amount, bill_day in self.bills:
+                if day.day == bill_day:
+                    yield day, -round(amount * rng.uniform(0.97, 1.03), 2), description, category
+
+            for description, category, typical, daily_rate in self.habits:
+                rate = daily_rate * 1.4 if weekend and category in WEEKEND_CATEGORIES else daily_rate
+                if rng.random() < rate:
+                    yield day, -round(typical * rng.lognormvariate(0, 0.35), 2), description, category
+            day += timedelta(days=1)
+
+    def monthly_spend(self):
+        """Expected spend per category in a typical month"""
+        spend = {}
+        for _, category, amount, _ in self.bills:
+            spend[category] = spend.get(category, 0.0) + amount
+        for _, category, typical, daily_rate in self.habits:
+            spend[category] = spend.get(category, 0.0) + typical * daily_rate * 30.44
+        return spend
+
+def _user_rng(seed, key):
+    return random.Random(f'{seed}:{key}') if seed is not None else random.Random()
+
+def transaction_rows(profile, user_id, account_id, id_prefix, start, end, created_at):
+    """Transaction column dicts for a profile's history, ready for BulkLoader"""
+    for n, (day, amount, description, category) in enumerate(profile.transactions(start, end)):
+        yield {
+            'user_id': user_id,
+            'account_id': account_id,
+            'plaid_transaction_id': f'{id_prefix}_{n}',
+            'amount': amount,
+            'date': day,
+            'description': description,
+            'category': category,
+            'created_at': created_at,
+        }
+
+def _goal_row(rng, user_id, template, today, created_at):
+    title, category, amounts = template
+    target = round(rng.uniform(*amounts), -2)
+    return {
+        'user_id': user_id, 'title': title, 'description': None, 'target_amount': target,
+        'current_amount': round(target * rng.uniform(0, 0.6), 2),
+        'target_date': today + timedelta(days=rng.randint(180, 1460)),
+        'category': category, 'status': 'Active', 'created_at': created_at, 'updated_at': created_at,
+    }
+
+def _investment_row(rng, user_id, symbol, start, end, created_at):
+    reference = FakePriceProvider.REFERENCE_PRICES.get(symbol, 100.0)
+    return {
+        'user_id': user_id, 'symbol': symbol, 'name': INVESTMENT_NAMES[symbol],
+        'shares': round(rng.uniform(1, 50), 2),
+        'purchase_price': round(reference * rng.uniform(0.7, 1.1), 2),
+        'current_price': reference,
+        'purchase_date': start + timedelta(days=rng.randrange((end - start).days + 1)),
+        'created_at': created_at, 'updated_at': created_at,
+    }
+
+def generate_users(count, days=730, seed=None, password_hash='!', chunk_size=10000, batch_size=200,
+                   search=None, progress=None):
+    """Bulk-load `count` synthetic users with accounts, budgets, goals, investments and `days` of history.
+
+    Users are written and committed in batches of `batch_size`; `progress`, if
+    given, is called with the running totals after each batch. Every user shares
+    `password_hash`, so hash a known password once rather than per user.
+    Pass the app's TransactionSearch as `search` to index each batch in one pass.
+    Returns the number of rows written per table.
+    """
+    run = uuid.uuid4().hex[:8]
+    end = datetime.now().date()
+    start = end - timedelta(days=days - 1)
+    totals = {'users': 0, 'accounts': 0, 'transactions': 0, 'budgets': 0, 'goals': 0, 'investments': 0}
+
+    for batch_start in range(0, count, batch_size):
+        indexes = range(batch_start, min(batch_start + batch_size, count))
+        created_at = datetime.utcnow()
+        loader = BulkLoader(db.session.connection(), chunk_size)
+        rngs = {i: _user_rng(seed, i) for i in indexes}
+
+        emails = {f'synthetic-{run}-{i}@example.com': i for i in indexes}
+        totals['users'] += loader.insert(User, (
+            {'email': email, 'name': f'{rngs[i].choice(FIRST_NAMES)} {rngs[i].choice(LAST_NAMES)}',
+             'password_hash': password_hash, 'created_at': created_at}
+            for email, i in emails.items()
+        ))
+        user_ids = {emails[email]: user_id for email, user_id in
+                    db.session.query(User.email, User.id).filter(User.email.in_(emails))}
+
+        totals['accounts'] += loader.insert(Account, (
+            {'user_id': user_ids[i], 'plaid_account_id': f'syn_{run}_{i}_{kind}', 'access_token': 'synthetic_token',
+             'name': name, 'account_type': 'depository', 'balance': round(rngs[i].uniform(*balances), 2),
+             'created_at': created_at, 'updated_at': created_at}
+            for i in indexes
+            for kind, name, balances in (('checking', 'Checking Account', (200, 8000)),
+                                         ('savings', 'Savings Account', (500, 40000)))
+        ))
+        checking = {user_id: account_id for user_id, account_id in db.session.query(Account.user_id, Account.id).filter(
+            Account.user_id.in_(user_ids.values()), Account.plaid_account_id.endswith('_checking'))}
+
+        profiles = {i: SyntheticProfile(rngs[i]) for i in indexes}
+        totals['budgets'] += loader.insert(Budget, (
+            {'user_id': user_ids[i], 'category': category, 'monthly_limit': round(spend * rngs[i].uniform(0.9, 1.3), -1) or 10.0,
+             'created_at': created_at, 'updated_at': created_at}
+            for i in indexes
+            for category, spend in sorted(profiles[i].monthly_spend().items())
+            if category != 'Rent'
+        ))
+        totals['goals'] += loader.insert(Goal, (
+            _goal_row(rngs[i], user_ids[i], template, end, created_at)
+            for i in indexes
+            for template in rngs[i].sample(GOAL_TEMPLATES, rngs[i].randint(1, 3))
+        ))
+        totals['investments'] += loader.insert(Investment, (
+            _investment_row(rngs[i], user_ids[i], symbol, start, end, created_at)
+            for i in indexes
+            for symbol in rngs[i].sample(sorted(INVESTMENT_NAMES), rngs[i].randint(0, 4))
+        ))
+        with search.deferred_indexing(loader.connection) if search else contextlib.nullcontext():
+            totals['transactions'] += loader.insert(Transaction, itertools.chain.from_iterable(
+                transaction_rows(profiles[i], user_ids[i], checking[user_ids[i]], f'syn_{run}_{i}', start, end, created_at)
+                for i in indexes
+            ))
+
+        db.session.commit()
+        if progress:
+            progress(totals)
+    return totals
+
+def load_demo_data(user_id, days=60, seed=None):
+    """Give a user the demo accounts and `days` of generated history on the checking account.
+
+    Accounts and history the user already has are left alone, checked with one
+    query each rather than per row. Returns the inserted transaction rows; the
+    caller commits.
+    """
+    created_at = datetime.utcnow()
+    loader = BulkLoader(db.session.connection())
+    prefix = f'demo_{user_id}_'
+
+    accounts = dict(db.session.query(Account.plaid_account_id, Account.id).filter(
+        Account.user_id == user_id, Account.plaid_account_id.startswith(prefix, autoescape=True)))
+    missing = [
+        {'user_id': user_id, 'plaid_account_id': prefix + name.lower().replace(' ', '_'), 'access_token': 'demo_token',
+         'name': name, 'account_type': kind, 'balance': balance, 'created_at': created_at, 'updated_at': created_at}
+        for name, kind, balance in DEMO_ACCOUNTS
+        if prefix + name.lower().replace(' ', '_') not in accounts
+    ]
+    if missing:
+        loader.insert(Account, missing)
+        accounts = dict(db.session.query(Account.plaid_account_id, Account.id).filter(
+            Account.user_id == user_id, Account.plaid_account_id.startswith(prefix, autoescape=True)))
+
+    id_prefix = f'demo_trans_{user_id}'
+    if db.session.query(Transaction.id).filter(Transaction.user_id == user_id,
+                                               Transaction.plaid_transaction_id.startswith(f'{id_prefix}_', autoescape=True)).first():
+        return []
+
+    end = datetime.now().date()
+    checking = accounts[prefix + DEMO_ACCOUNTS[0][0].lower().replace(' ', '_')]
+    rows = list(transaction_rows(SyntheticProfile(_user_rng(seed, user_id)), user_id, checking, id_prefix,
+                                 end - timedelta(days=days), end, created_at))
+    loader.insert(Transaction, rows)
+    return rows
@@ -0,0 +1,169 @@
+import importlib.util
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+# Optional numpy acceleration, imported on first use to keep it out of app start-up
+NUMPY_AVAILABLE = importlib.util.find_spec('numpy') is not None
+
+from models.database import db, Transaction
+from utils.helpers import add_months, get_date_range
+
+def _cumulative(values):
+    """Prefix sums with a leading zero, so sum(values[i:j]) == cum[j] - cum[i]"""
+    if NUMPY_AVAILABLE:
+        import numpy as np
+        return np.concatenate(([0.0], np.cumsum(np.asarray(values, dtype=np.float64))))
+    cum = [0.0]
+    for value in values:
+        cum.append(cum[-1] + value)
+    return cum
+
+class SpendingTimeline:
+    """Cumulative daily expense and income sums for one user.
+
+    Any window's total is two lookups into the prefix-sum arrays.
+    """
+
+    def __init__(self, start, expenses, income):
+        self.start = start
+        self.expense_cum = _cumulative(expenses)
+        self.income_cum = _cumulative(income)
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def build(cls, user_id):
+        """Build a user's timeline from one grouped query over their history"""
+        rows = db.session.query(
+            Transaction.date,
+            db.func.sum(db.case((Transaction.amount < 0, -Transaction.amount), else_=0)).label('expenses'),
+            db.func.sum(db.case((Transaction.amount > 0, Transaction.amount), else_=0)).label('income')
+        ).filter(Transaction.user_id == user_id).group_by(Transaction.date).order_by(Transaction.date).all()
+
+        today = datetime.now().date()
+        start = rows[0].date if rows else today
+        end = max(rows[-1].date, today) if rows else today
+
+        days = (end - start).days + 1
+        expenses = [0.0] * days
+        income = [0.0] * days
+        for row in rows:
+            index = (row.date - start).days
+            expenses[index] = float(row.expenses or 0)
+            income[index] = float(row.income or 0)
+
+        return cls(start, expenses, income)
+
+    @property
+    def end(self):
+        return self.start + timedelta(days=len(self.expense_cum) - 2)
+
+    def total(self, kind, start, end):
+        """Total expenses or income between start and end, inclusive"""
+        cum = self.expense_cum if kind == 'expenses' else self.income_cum
+        last = len(cum) - 1
+        i = min(max((start - self.start).days, 0), last)
+        j = min(max((end - self.start).days + 1, 0), last)
+        return float(cum[j] - cum[i]) if j > i else 0.0
+
+    def compare(self, kind, current, previous):
+        """Compare totals for two (start, end) windows"""
+        current_total = self.total(kind, *current)
+        previous_total = self.total(kind, *previous)
+        change_percent = ((current_total - previous_total) / previous_total * 100) if previous_total > 0 else 0
+
+        return {
+            'current': current_total,
+            'previous': previous_total,
+            'change_percent': round(change_percent, 1)
+        }
+
+    def add(self, day, amount):
+        """Apply one new transaction in place"""
+        if day > self.end:
+            self._extend(day)
+        cum = self.expense_cum if amount < 0 else self.income_cum
+        index = (day - self.start).days + 1
+        if NUMPY_AVAILABLE:
+            cum[index:] += abs(amount)
+        else:
+            for k in range(index, len(cum)):
+                cum[k] += abs(amount)
+
+    def _extend(self, day):
+        """Grow the arrays through `day`, carrying the running totals forward"""
+        extra = (day - self.end).days
+        if NUMPY_AVAILABLE:
+            import numpy as np
+            self.expense_cum = np.concatenate((self.expense_cum, np.full(extra, self.expense_cum[-1])))
+            self.income_cum = np.concatenate((self.income_cum, np.full(extra, self.income_cum[-1])))
+        else:
+            self.expense_cum.extend([self.expense_cum[-1]] * extra)
+            self.income_cum.extend([self.income_cum[-1]] * extra)
+
+def period_windows(period):
+    """Current and previous (start, end) windows for week, month, quarter or year"""
+    start, end = get_date_range(period)
+
+    if period == 'week':
+        start = end - timedelta(days=6)
+        previous_start = start - timedelta(days=7)
+    elif period == 'quarter':
+        previous_start = add_months(start, -3)
+    elif period == 'year':
+        previous_start = add_months(start, -12)
+    else:
+        previous_start = add_months(start, -1)
+
+    return (start, end), (previous_start, start - timedelta(days=1))
+
+class TimelineCache:
+    """Per-process LRU of SpendingTimelines, updated in place as transactions are ingested"""
+
+    def __init__(self, max_users=1024, ttl=300):
+        self.max_users = max_users
+        self.ttl = ttl
+        self._timelines = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        """Get a user's timeline, building it on a miss or after the TTL"""
+        with self._lock:
+            timeline = self._timelines.get(user_id)
+            if timeline is not None and time.monotonic() - timeline.built_at < self.ttl:
+                self._timelines.move_to_end(user_id)
+                if timeline.end < datetime.now().date():
+                    timeline._extend(datetime.now().date())
+                return timeline
+            generation = self._generation
+
+        timeline = SpendingTimeline.build(user_id)
+        with self._lock:
+            # Skip caching a build that a record() or invalidation may have overtaken
+            if generation == self._generation:
+                self._timelines[user_id] = timeline
+                self._timelines.move_to_end(user_id)
+                while len(self._timelines) > self.max_users:
+                    self._timelines.popitem(last=False)
+        return timeline
+
+    def record(self, entries):
+        """Apply committed (user_id, date, amount) entries to cached timelines"""
+        with self._lock:
+            self._generation += 1
+            for user_id, day, amount in entries:
+                timeline = self._timelines.get(user_id)
+                if timeline is None:
+                    continue
+                if day < timeline.start:
+                    # History before the timeline's first day; rebuild on next use
+                    del self._timelines[user_id]
+                else:
+                    timeline.add(day, amount)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._generation += 1
+            self._timelines.pop(user_id, None)
@@ -1,6 +1,10 @@
 import re
 import os
 
+from utils.log import get_logger
+
+logger = get_logger('nlp')
+
 # Optional imports for enhanced functionality
 try:
     import spacy
@@ -59,7 +63,7 @@ class IntentClassifier:
             try:
                 self.nlp = spacy.load("en_core_web_sm")
             except OSError:
-                print("spaCy model not found. Using basic text preprocessing.")
+                logger.warning("spaCy model not found. Using basic text preprocessing.")
                 self.nlp = None
     
     def _load_or_train_model(self):
@@ -461,10 +461,25 @@ function formatDate(dateString) {
     });
 }
 
+// Dashboard snapshot - one request for balances, transactions, spending and forecast
+let dashboardSnapshotPromise = null;
+
+function loadDashboardSnapshot() {
+    if (!dashboardSnapshotPromise) {
+        dashboardSnapshotPromise = fetchJSONWithValidators('/api/dashboard/snapshot')
+            .catch(error => {
+                // Allow a retry on the next call
+                dashboardSnapshotPromise = null;
+                throw error;
+            });
+    }
+    return dashboardSnapshotPromise;
+}
+
 // Load forecast data
 function loadForecast() {
-    fetch('/api/forecast')
-        .then(response => response.json())
+    loadDashboardSnapshot()
+        .then(snapshot => snapshot.forecast || {})
         .then(data => {
             if (data.predicted_balance) {
                 document.getElementById('forecast-amount').textContent = 
@@ -487,11 +502,9 @@ function loadForecast() {
 
 // Spending insights
 function loadSpendingInsights() {
-    fetch('/api/insights')
-        .then(response => response.json())
-        .then(data => {
-            updateSpendingChart(data.category_spending);
-            displayInsights(data.insights);
+    loadDashboardSnapshot()
+        .then(snapshot => {
+            updateSpendingChart(snapshot.category_spending);
         })
         .catch(error => {
             console.error('Insights error:', error);
@@ -556,9 +569,9 @@ function loadForecast() {
         </div>
     `;
     
-    // Fetch forecast from API
-    fetch('/api/forecast')
-        .then(response => response.json())
+    // Hydrate from the shared dashboard snapshot
+    loadDashboardSnapshot()
+        .then(snapshot => snapshot.forecast || {})
         .then(data => {
             if (data.predicted_balance) {
                 forecastElement.textContent = formatCurrency(data.predicted_balance);
@@ -686,4 +699,98 @@ setTimeout(() => {
     if (document.getElementById('forecast-amount')) {
         loadForecast();
     }
-}, 1500);
\ No newline at end of file
+}, 1500);
+// Notifications: the badge starts from the server-rendered unread count and is
+// kept current by a short-lived event stream the browser reconnects; browsers
+// without EventSource fall back to polling the count.
+document.addEventListener('DOMContentLoaded', function() {
+    if (document.getElementById('notificationDropdown')) {
+        initializeNotifications();
+    }
+});
+
+function initializeNotifications() {
+    const toggle = document.getElementById('notificationDropdown');
+    const badge = toggle.querySelector('.notification-badge');
+    const listEnd = document.querySelector('.notification-dropdown .notification-list-end');
+    const pollSeconds = parseInt(toggle.dataset.pollSeconds, 10) || 60;
+    let unread = parseInt(badge.textContent, 10) || 0;
+    let loaded = false;
+    
+    const setUnread = count => {
+        // New notifications since the list was fetched: fetch it again on next open
+        if (count > unread) {
+            loaded = false;
+        }
+        unread = Math.max(count, 0);
+        badge.textContent = unread;
+        badge.style.display = unread > 0 ? '' : 'none';
+    };
+    
+    const icons = {warning: 'fa-exclamation-triangle text-warning', error: 'fa-exclamation-circle text-danger',
+                   success: 'fa-check-circle text-success', info: 'fa-info-circle text-info'};
+    const renderItem = notification => {
+        const item = document.createElement('li');
+        item.className = 'notification-item';
+        const link = document.createElement('a');
+        link.className = 'dropdown-item' + (notification.is_read ? '' : ' fw-semibold');
+        link.href = '#';
+        link.title = notification.message;
+        const icon = document.createElement('i');
+        icon.className = `fas ${icons[notification.type] || icons.info} me-2`;
+        link.appendChild(icon);
+        link.appendChild(document.createTextNode(notification.title));
+        item.appendChild(link);
+        return item;
+    };
+    
+    toggle.addEventListener('show.bs.dropdown', async () => {
+        try {
+            if (loaded) {
+                return;
+            }
+            loaded = true;
+            const data = await (await fetch('/api/notifications?limit=10')).json();
+            listEnd.parentNode.querySelectorAll('.notification-item').forEach(item => item.remove());
+            data.notifications.forEach(notification => {
+                listEnd.parentNode.insertBefore(renderItem(notification), listEnd);
+            });
+            
+            // Only what was actually shown counts as read
+            const ids = data.notifications.filter(notification => !notification.is_read).map(notification => notification.id);
+            let count = data.unread;
+            if (ids.length > 0) {
+                count = (await (await fetch('/api/notifications/read', {
+                    method: 'POST',
+                    headers: {'Content-Type': 'application/json'},
+                    body: JSON.stringify({ids})
+                })).json()).unread;
+            }
+            // The list just fetched is current, so don't mark it for refetching
+            unread = count;
+            setUnread(count);
+        } catch (error) {
+            loaded = false;
+            console.error('Notifications error:', error);
+        }
+    });
+    
+    if (window.EventSource) {
+        // The server ends each stream after a few seconds; EventSource reconnects after its retry delay
+        const stream = new EventSource('/api/notifications/stream');
+        stream.addEventListener('unread', event => setUnread(JSON.parse(event.data).count));
+        stream.addEventListener('notification', () => setUnread(unread + 1));
+        return;
+    }
+    
+    setInterval(async () => {
+        if (document.hidden) {
+            return;
+        }
+        try {
+            setUnread((await (await fetch('/api/notifications/unread')).json()).unread);
+        } catch (error) {
+            console.error('Notifications error:', error);
+        }
+    }, pollSeconds * 1000);
+}
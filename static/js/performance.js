@@ -75,6 +75,93 @@ function optimizeCharts() {
     }
 }
 
+// Conditional GET for JSON API calls - the browser's HTTP cache keeps the body and its ETag
+// across page loads and revalidates with If-None-Match (the API sends `private, no-cache`)
+function fetchJSONWithValidators(url, options = {}) {
+    return fetch(url, { cache: 'no-cache', ...options })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`Request to ${url} failed: ${response.status}`);
+            }
+            return response.json();
+        });
+}
+
+// Virtualized list - only the rows in (or near) the viewport exist in the DOM
+class VirtualList {
+    constructor(container, { rowHeight = 44, overscan = 8, renderRow, loadMore }) {
+        this.container = container;
+        this.rowHeight = rowHeight;
+        this.overscan = overscan;
+        this.renderRow = renderRow;
+        this.loadMore = loadMore;
+        this.items = [];
+        this.loading = false;
+        this.done = false;
+        
+        this.container.style.overflowY = 'auto';
+        this.container.style.position = 'relative';
+        this.spacer = document.createElement('div');
+        this.viewport = document.createElement('div');
+        this.viewport.style.cssText = 'position: absolute; top: 0; left: 0; right: 0;';
+        this.container.appendChild(this.spacer);
+        this.container.appendChild(this.viewport);
+        
+        this.container.addEventListener('scroll', throttle(() => this.render(), 16), { passive: true });
+    }
+    
+    reset() {
+        // Pages still in flight from before the reset are discarded
+        this.generation = (this.generation || 0) + 1;
+        this.items = [];
+        this.done = false;
+        this.loading = false;
+        this.container.scrollTop = 0;
+        return this.fetchMore();
+    }
+    
+    fetchMore() {
+        if (this.loading || this.done) return Promise.resolve();
+        this.loading = true;
+        const generation = this.generation;
+        
+        return this.loadMore(this.items.length)
+            .then(({ items, done }) => {
+                if (generation !== this.generation) return;
+                this.items = this.items.concat(items);
+                this.done = done;
+            })
+            .catch(error => console.error('VirtualList load error:', error))
+            .finally(() => {
+                if (generation !== this.generation) return;
+                this.loading = false;
+                this.render();
+            });
+    }
+    
+    render() {
+        const { scrollTop, clientHeight } = this.container;
+        const first = Math.max(0, Math.floor(scrollTop / this.rowHeight) - this.overscan);
+        const last = Math.min(this.items.length, Math.ceil((scrollTop + clientHeight) / this.rowHeight) + this.overscan);
+        
+        this.spacer.style.height = `${this.items.length * this.rowHeight}px`;
+        this.viewport.style.transform = `translateY(${first * this.rowHeight}px)`;
+        
+        const fragment = document.createDocumentFragment();
+        for (let i = first; i < last; i++) {
+            const row = this.renderRow(this.items[i], i);
+            row.style.height = `${this.rowHeight}px`;
+            fragment.appendChild(row);
+        }
+        this.viewport.replaceChildren(fragment);
+        
+        // Prefetch the next page before the user reaches the end
+        if (last >= this.items.length - this.overscan) {
+            this.fetchMore();
+        }
+    }
+}
+
 // Preload critical resources
 function preloadCriticalResources() {
     const criticalResources = [
@@ -3,8 +3,13 @@
 Test script for Finance Mentor AI
 """
 
+import os
 import requests
 import json
+
+# Minimum bcrypt cost keeps the many test registrations fast
+os.environ.setdefault('BCRYPT_LOG_ROUNDS', '4')
+
 from app import app
 from models.database import db, User
 from werkzeug.security import generate_password_hash
@@ -84,6 +89,1091 @@ def test_forecasting():
     forecaster = CashFlowForecaster()
     print("✅ Forecasting components initialized!")
 
+def _login_new_user(client):
+    """Register and log in a fresh user, returning their email"""
+    import uuid
+    email = f"test-{uuid.uuid4().hex[:12]}@example.com"
+    client.post('/register',
+                data=json.dumps({'email': email, 'password': 'testpassword123', 'name': 'Test User'}),
+                content_type='application/json')
+    return email
+
+def test_parallel_queries():
+    """Test concurrent query helper and the pages that use it"""
+    from utils.concurrency import run_parallel
+    
+    with app.app_context():
+        results = run_parallel(users=lambda: User.query.count(), one=lambda: 1)
+        assert results['one'] == 1
+        assert results['users'] >= 0
+    
+    with app.test_client() as client:
+        _login_new_user(client)
+        assert client.get('/dashboard').status_code == 200
+        assert client.get('/analytics').status_code == 200
+        response = client.post('/chat',
+                               data=json.dumps({'message': 'predict the future'}),
+                               content_type='application/json')
+        assert response.status_code == 200
+        assert 'response' in response.get_json()
+
+def test_structured_logging():
+    """Test JSON log formatting, sampling and user id hashing"""
+    import logging
+    from utils.log import JSONFormatter, SamplingFilter, hash_user_id, parse_sample_rates
+    
+    record = logging.LogRecord('finance.chat', logging.INFO, __file__, 1, 'chat_query', None, None)
+    record.fields = {'intent': 'greeting', 'user': hash_user_id(42)}
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry['event'] == 'chat_query'
+    assert entry['intent'] == 'greeting'
+    assert entry['user'] != '42' and entry['user'] == hash_user_id(42)
+    
+    assert not SamplingFilter(0).filter(record)
+    record.levelno = logging.ERROR
+    assert SamplingFilter(0).filter(record)
+    
+    assert parse_sample_rates('finance.request=0.1, finance.chat=1') == {'finance.request': 0.1, 'finance.chat': 1.0}
+
+def test_queued_logging_formats_on_listener():
+    """Test that queued records keep their exception info until the listener formats them"""
+    import io
+    import logging
+    from utils import log
+    
+    root = log.configure_logging()
+    assert any(isinstance(handler, log.DeferredQueueHandler) for handler in root.handlers)
+    output = io.StringIO()
+    previous = log._listener.handlers[0].setStream(output)
+    try:
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            log.get_logger('tests').exception('division_failed')
+        # Stopping the listener drains the queue
+        log._listener.stop()
+        log._listener.start()
+    finally:
+        log._listener.handlers[0].setStream(previous)
+    
+    entry = json.loads(output.getvalue().strip().splitlines()[-1])
+    assert entry['event'] == 'division_failed'
+    assert entry['level'] == 'ERROR'
+    assert 'ZeroDivisionError' in entry['exc']
+
+def test_dashboard_snapshot():
+    """Test the single-request dashboard snapshot"""
+    with app.test_client() as client:
+        _login_new_user(client)
+        client.get('/dashboard')  # Creates demo accounts and transactions
+        
+        response = client.get('/api/dashboard/snapshot')
+        assert response.status_code == 200
+        snapshot = response.get_json()
+        for key in ['accounts', 'total_balance', 'recent_transactions', 'category_spending', 'forecast']:
+            assert key in snapshot
+        assert len(snapshot['accounts']) == 2
+        assert len(snapshot['recent_transactions']) <= 10
+        
+        forecast = client.get('/api/forecast').get_json()
+        if snapshot['forecast']:
+            assert snapshot['forecast']['predicted_balance'] == forecast['predicted_balance']
+
+def test_income_vs_expenses_months():
+    """Test calendar-month bucketing for income vs expenses"""
+    from datetime import date
+    from utils.helpers import add_months
+    
+    assert add_months(date(2024, 1, 31), -1) == date(2023, 12, 1)
+    assert add_months(date(2024, 11, 15), 2) == date(2025, 1, 1)
+    assert add_months(date(2024, 3, 1), -24) == date(2022, 3, 1)
+    
+    with app.test_client() as client:
+        _login_new_user(client)
+        client.get('/dashboard')
+        
+        data = client.get('/api/analytics/income-vs-expenses?months=24').get_json()
+        assert len(data) == 24
+        months = [row['month'] for row in data]
+        assert len(set(months)) == 24
+        assert months[-1] == date.today().strftime('%B %Y')
+        assert sum(row['income'] + row['expenses'] for row in data) > 0
+
+def test_budget_engine_counters():
+    """Test set-based budget evaluation and incremental counters"""
+    from datetime import date
+    from app import budget_engine
+    from models.database import Budget, BudgetCounter, Transaction
+    
+    with app.test_client() as client:
+        _login_new_user(client)
+        client.get('/dashboard')
+        for category in ['Food and Drink', 'Shopping']:
+            client.post('/api/budget',
+                        data=json.dumps({'category': category, 'monthly_limit': 100}),
+                        content_type='application/json')
+        assert client.get('/budgets').status_code == 200
+    
+    with app.app_context():
+        budget = Budget.query.order_by(Budget.id.desc()).first()
+        user_id = budget.user_id
+        month_start = date.today().replace(day=1)
+        
+        expected = abs(db.session.query(db.func.sum(Transaction.amount)).filter(
+            Transaction.user_id == user_id,
+            Transaction.category == budget.category,
+            Transaction.date >= month_start,
+            Transaction.amount < 0
+        ).scalar() or 0)
+        analysis = {item['budget'].id: item for item in budget_engine.evaluate(user_id)}
+        assert len(analysis) == 2
+        assert abs(analysis[budget.id]['spent'] - expected) < 0.01
+        
+        transaction = Transaction(
+            user_id=user_id,
+            account_id=Transaction.query.filter_by(user_id=user_id).first().account_id,
+            plaid_transaction_id=f"test_budget_{budget.id}",
+            amount=-25.0,
+            date=date.today(),
+            description='Test purchase',
+            category=budget.category
+        )
+        db.session.add(transaction)
+        budget_engine.record_transactions([transaction])
+        db.session.commit()
+        
+        counter = BudgetCounter.query.filter_by(budget_id=budget.id).one()
+        assert abs(counter.spent - (expected + 25)) < 0.01
+        analysis = {item['budget'].id: item for item in budget_engine.evaluate(user_id)}
+        assert abs(analysis[budget.id]['spent'] - (expected + 25)) < 0.01
+        
+        # A counter left over from last month is rebuilt, and a repeated refresh is harmless
+        counter.month, counter.spent = date(2000, 1, 1), 999.0
+        db.session.commit()
+        budget_engine.refresh_counters(user_id, [budget.id])
+        budget_engine.refresh_counters(user_id, [budget.id])
+        db.session.commit()
+        analysis = {item['budget'].id: item for item in budget_engine.evaluate(user_id)}
+        assert abs(analysis[budget.id]['spent'] - (expected + 25)) < 0.01
+        assert BudgetCounter.query.filter_by(budget_id=budget.id).one().month == month_start
+
+def test_spending_timeline():
+    """Test prefix-sum window totals and in-place updates"""
+    from datetime import date, timedelta
+    from models.timeline import SpendingTimeline, TimelineCache, period_windows
+    
+    start = date.today() - timedelta(days=9)
+    timeline = SpendingTimeline(start, [10.0] * 10, [0.0] * 9 + [100.0])
+    assert timeline.end == date.today()
+    assert timeline.total('expenses', start, date.today()) == 100.0
+    assert timeline.total('expenses', start + timedelta(days=2), start + timedelta(days=4)) == 30.0
+    assert timeline.total('income', start - timedelta(days=30), start) == 0.0
+    
+    timeline.add(start + timedelta(days=3), -5.0)
+    timeline.add(date.today() + timedelta(days=2), 50.0)
+    assert timeline.total('expenses', start + timedelta(days=3), start + timedelta(days=3)) == 15.0
+    assert timeline.total('income', start, timeline.end) == 150.0
+    
+    # A record() that lands while a timeline is being built keeps the build out of the cache
+    cache = TimelineCache()
+    original_build = SpendingTimeline.__dict__['build']
+    
+    def racing_build(user_id):
+        cache.record([(user_id, date.today(), -5.0)])
+        return SpendingTimeline(start, [0.0] * 10, [0.0] * 10)
+    SpendingTimeline.build = staticmethod(racing_build)
+    try:
+        first = cache.get(1)
+        assert cache.get(1) is not first
+        SpendingTimeline.build = staticmethod(lambda user_id: first)
+        assert cache.get(1) is first and cache.get(1) is first
+    finally:
+        SpendingTimeline.build = original_build
+    
+    current, previous = period_windows('week')
+    assert (current[1] - current[0]).days == 6
+    assert previous[1] == current[0] - timedelta(days=1)
+    
+    with app.test_client() as client:
+        _login_new_user(client)
+        client.get('/dashboard')
+        response = client.get('/api/analytics/compare?period=quarter')
+        assert response.status_code == 200
+        assert set(response.get_json()['expenses']) == {'current', 'previous', 'change_percent'}
+        assert client.get('/api/analytics/compare?period=decade').status_code == 400
+
+def test_conditional_get():
+    """Test ETag validation on JSON API endpoints"""
+    with app.test_client() as client:
+        email = _login_new_user(client)
+        client.get('/dashboard')
+        
+        response = client.get('/api/analytics/income-vs-expenses?months=3')
+        assert response.status_code == 200
+        etag = response.headers['ETag']
+        assert 'no-cache' in response.headers['Cache-Control']
+        
+        response = client.get('/api/analytics/income-vs-expenses?months=3', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        
+        # Different parameters get a different validator
+        response = client.get('/api/analytics/income-vs-expenses?months=4', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        
+        # A data change invalidates it
+        client.post('/api/budget', data=json.dumps({'category': 'Bills', 'monthly_limit': 50}),
+                    content_type='application/json')
+        response = client.get('/api/analytics/income-vs-expenses?months=3', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        etag = response.headers['ETag']
+        
+        # So does a change committed by another worker, which this process's identity cache doesn't hear about
+        from models.database import UserDataVersion
+        with app.app_context():
+            user_id = User.query.filter_by(email=email).one().id
+            with db.engine.begin() as connection:
+                connection.execute(db.update(UserDataVersion).where(UserDataVersion.user_id == user_id)
+                                   .values(version=UserDataVersion.version + 1))
+        response = client.get('/api/analytics/income-vs-expenses?months=3', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+
+def test_json_provider_and_compression():
+    """Test the JSON provider matches the stdlib output and responses are compressed"""
+    import gzip
+    from datetime import date
+    from flask.json.provider import DefaultJSONProvider
+    
+    payload = {'b': 1.5, 'a': [1, 2], 'when': date(2024, 1, 2), 'name': 'café'}
+    with app.app_context():
+        assert json.loads(app.json.dumps(payload)) == json.loads(DefaultJSONProvider(app).dumps(payload))
+    
+    with app.test_client() as client:
+        _login_new_user(client)
+        client.get('/dashboard')
+        
+        plain = client.get('/api/analytics/income-vs-expenses?months=60', headers={'Accept-Encoding': 'identity'})
+        assert 'Content-Encoding' not in plain.headers
+        
+        compressed = client.get('/api/analytics/income-vs-expenses?months=60', headers={'Accept-Encoding': 'gzip'})
+        assert compressed.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in compressed.headers['Vary']
+        assert json.loads(gzip.decompress(compressed.get_data())) == plain.get_json()
+        
+        # The encoded validator still revalidates
+        response = client.get('/api/analytics/income-vs-expenses?months=60',
+                              headers={'Accept-Encoding': 'gzip', 'If-None-Match': compressed.headers['ETag']})
+        assert response.status_code == 304
+
+def test_transactions_keyset_pagination():
+    """Test keyset pagination, filters and sparse fields on /api/transactions"""
+    with app.test_client() as client:
+        _login_new_user(client)
+        client.get('/dashboard')
+        
+        everything = client.get('/api/transactions?limit=500').get_json()['transactions']
+        assert len(everything) > 0
+        
+        seen, cursor = [], None
+        while True:
+            url = '/api/transactions?limit=7&fields=description,amount' + (f'&cursor={cursor}' if cursor else '')
+            page = client.get(url).get_json()
+            assert all(set(item) == {'description', 'amount'} for item in page['transactions'])
+            seen.extend(page['transactions'])
+            cursor = page['next_cursor']
+            if not page['has_more']:
+                break
+        assert [item['amount'] for item in seen] == [item['amount'] for item in everything]
+        
+        keys = [(item['date'], item['id']) for item in everything]
+        assert keys == sorted(keys, reverse=True)
+        
+        expenses = client.get('/api/transactions?max_amount=0&category=Food and Drink').get_json()['transactions']
+        assert all(item['amount'] <= 0 and item['category'] == 'Food and Drink' for item in expenses)
+        
+        assert client.get('/api/transactions?fields=password').status_code == 400
+        assert client.get('/api/transactions?cursor=garbage').status_code == 400
+
+def test_transaction_search():
+    """Test full-text search with prefix matching and index sync on insert"""
+    from datetime import date
+    from app import transaction_search
+    from models.database import Transaction
+    
+    with app.test_client() as client:
+        email = _login_new_user(client)
+        client.get('/dashboard')
+        
+        with app.app_context():
+            user_id = User.query.filter_by(email=email).one().id
+            account_id = Transaction.query.filter_by(user_id=user_id).first().account_id
+            db.session.add(Transaction(
+                user_id=user_id, account_id=account_id,
+                plaid_transaction_id=f"test_search_{user_id}",
+                amount=-12.5, date=date.today(),
+                description='Zebrafish Aquarium Supplies', category='Shopping'
+            ))
+            db.session.commit()
+            
+            assert transaction_search.backend in ('fts5', 'tsvector', 'like')
+            assert [r['description'] for r in transaction_search.search(user_id, 'zebra')] == ['Zebrafish Aquarium Supplies']
+            assert transaction_search.search(user_id + 1000000, 'zebra') == []
+        
+        response = client.get('/api/transactions/search?q=zebrafish aqua')
+        assert response.status_code == 200
+        assert response.get_json()['results'][0]['description'] == 'Zebrafish Aquarium Supplies'
+        assert client.get('/api/transactions/search').status_code == 400
+
+def test_report_store():
+    """Test that generated reports are persisted, listed once per period and invalidated by new transactions"""
+    import re
+    from datetime import date
+    from app import commit_new_transactions
+    from models.database import Report, ReportCache, Transaction
+    
+    with app.test_client() as client:
+        email = _login_new_user(client)
+        client.get('/dashboard')
+        
+        response = client.get('/api/generate-report/yearly')
+        first = response.get_json()
+        assert first['success']
+        # Every missing month is computed by one grouped query and stored by one upsert
+        timing = ', '.join(response.headers.getlist('Server-Timing'))
+        assert int(re.search(r'desc="(\d+) quer', timing).group(1)) <= 10
+        
+        year_start = date.today().replace(month=1, day=1)
+        with app.app_context():
+            user_id = User.query.filter_by(email=email).one().id
+            stored = {(r.report_type, r.period_start) for r in ReportCache.query.filter_by(user_id=user_id)}
+            assert ('yearly', year_start) in stored
+            assert ('monthly', date.today().replace(day=1)) in stored
+            # Only the requested report is listed; the monthly shards are not
+            reports = Report.query.filter_by(user_id=user_id).all()
+            assert [(r.report_type, r.title) for r in reports] == [('yearly', f'Yearly Report - {year_start.year}')]
+            report_id = reports[0].id
+            
+            expenses = -sum(t.amount for t in Transaction.query.filter(
+                Transaction.user_id == user_id, Transaction.date >= year_start, Transaction.amount < 0))
+            assert abs(first['data']['total_expenses'] - expenses) < 0.01
+            
+            stored_ids = {r.id for r in ReportCache.query.filter_by(user_id=user_id)}
+        
+        assert client.get('/api/generate-report/yearly').get_json()['data'] == first['data']
+        assert f'Yearly Report - {year_start.year}' in client.get('/reports').get_data(as_text=True)
+        with app.app_context():
+            assert {r.id for r in ReportCache.query.filter_by(user_id=user_id)} == stored_ids
+            
+            account_id = Transaction.query.filter_by(user_id=user_id).first().account_id
+            transaction = Transaction(
+                user_id=user_id, account_id=account_id,
+                plaid_transaction_id=f"test_report_{user_id}",
+                amount=-40.0, date=date.today(),
+                description='Report Test Purchase', category='Shopping'
+            )
+            db.session.add(transaction)
+            commit_new_transactions([transaction])
+            assert ReportCache.query.filter_by(user_id=user_id, report_type='yearly').one().stale
+        
+        updated = client.get('/api/generate-report/yearly').get_json()['data']
+        assert abs(updated['total_expenses'] - first['data']['total_expenses'] - 40.0) < 0.01
+        assert updated['transaction_count'] == first['data']['transaction_count'] + 1
+        
+        # The month stored for the yearly report is listed once it is requested itself
+        client.get('/api/generate-report/monthly')
+        with app.app_context():
+            assert {r.id for r in ReportCache.query.filter_by(user_id=user_id)} == stored_ids
+            reports = Report.query.filter_by(user_id=user_id).all()
+            assert sorted(r.report_type for r in reports) == ['monthly', 'yearly']
+            yearly = next(r for r in reports if r.report_type == 'yearly')
+            assert yearly.id == report_id
+            assert json.loads(yearly.data)['transaction_count'] == updated['transaction_count']
+
+def test_transaction_export():
+    """Test streaming CSV and NDJSON exports"""
+    import csv
+    import io
+    from models.database import Transaction
+    
+    with app.test_client() as client:
+        email = _login_new_user(client)
+        client.get('/dashboard')
+        
+        with app.app_context():
+            user_id = User.query.filter_by(email=email).one().id
+            count = Transaction.query.filter_by(user_id=user_id).count()
+        
+        response = client.get('/api/export/transactions?format=csv', headers={'Accept-Encoding': 'gzip'})
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.mimetype == 'text/csv'
+        assert 'Content-Encoding' not in response.headers
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        assert len(rows) == count
+        assert [row['date'] for row in rows] == sorted(row['date'] for row in rows)
+        
+        lines = client.get('/api/export/transactions?format=ndjson').get_data(as_text=True).splitlines()
+        items = [json.loads(line) for line in lines]
+        assert len(items) == count
+        assert set(items[0]) == {'id', 'date', 'description', 'category', 'amount', 'account_id'}
+        
+        # Both formats send their first chunk without waiting for a full batch
+        from datetime import date
+        from models.exports import csv_chunks, ndjson_chunks
+        sample = [(1, date(2024, 1, 1), 'Coffee', 'Food and Drink', -3.5, 1)] * 3
+        assert next(ndjson_chunks(iter(sample))).count('\n') == 1
+        assert next(csv_chunks(iter(sample))).startswith('id,date')
+        
+        latest = max(item['date'] for item in items)
+        ranged = client.get(f'/api/export/transactions?format=ndjson&start={latest}').get_data(as_text=True)
+        assert all(json.loads(line)['date'] == latest for line in ranged.splitlines())
+        
+        assert client.get('/api/export/transactions?format=xml').status_code == 400
+        assert client.get('/api/export/transactions?start=yesterday').status_code == 400
+
+def test_report_jobs():
+    """Test background report jobs with status polling, the per-user cap and timeouts"""
+    import time
+    import uuid
+    from app import report_jobs
+    
+    with app.test_client() as client:
+        email = _login_new_user(client)
+        client.get('/dashboard')
+        
+        response = client.post('/api/reports/jobs', json={'report_type': 'quarterly'})
+        assert response.status_code == 202
+        job = response.get_json()['job']
+        assert response.headers['Location'].endswith(job['id'])
+        
+        deadline = time.time() + 10
+        while job['status'] in ('queued', 'running') and time.time() < deadline:
+            time.sleep(0.05)
+            job = client.get(f"/api/reports/jobs/{job['id']}").get_json()['job']
+        assert job['status'] == 'done'
+        
+        download = client.get(job['download_url'])
+        assert download.status_code == 200
+        assert 'QUARTERLY REPORT' in download.get_data(as_text=True)
+        
+        assert client.post('/api/reports/jobs', json={'report_type': 'weekly'}).status_code == 400
+        
+        # In-flight jobs count against the cap wherever they were submitted, until they time out
+        from datetime import datetime, timedelta
+        from models.database import ReportJob
+        with app.app_context():
+            user_id = User.query.filter_by(email=email).one().id
+            stuck = [ReportJob(id=uuid.uuid4().hex, user_id=user_id, report_type='monthly', status='running')
+                     for _ in range(report_jobs.per_user_limit)]
+            db.session.add_all(stuck)
+            db.session.commit()
+            stuck_ids = [row.id for row in stuck]
+        assert client.post('/api/reports/jobs', json={'report_type': 'monthly'}).status_code == 429
+        
+        with app.app_context():
+            ReportJob.query.filter(ReportJob.id.in_(stuck_ids)).update(
+                {ReportJob.created_at: datetime.utcnow() - timedelta(seconds=report_jobs.timeout + 1)},
+                synchronize_session=False)
+            db.session.commit()
+        timed_out = client.get(f'/api/reports/jobs/{stuck_ids[0]}').get_json()['job']
+        assert timed_out['status'] == 'failed' and timed_out['error'] == 'Timed out'
+        assert client.post('/api/reports/jobs', json={'report_type': 'monthly'}).status_code == 202
+        
+        # A job timed out while it runs is not overwritten when the worker finishes
+        from models.report_jobs import ReportJobQueue
+        
+        class ExpiringStore:
+            def get(self, user_id, report_type):
+                ReportJob.query.filter_by(id=slow_id).update(
+                    {ReportJob.status: 'failed', ReportJob.error: 'Timed out'}, synchronize_session=False)
+                db.session.commit()
+                return {}
+        
+        with app.app_context():
+            slow_id = uuid.uuid4().hex
+            db.session.add(ReportJob(id=slow_id, user_id=user_id, report_type='monthly'))
+            db.session.commit()
+        ReportJobQueue(ExpiringStore())._run(app, slow_id)
+        with app.app_context():
+            slow = db.session.get(ReportJob, slow_id)
+            assert slow.status == 'failed' and slow.error == 'Timed out' and slow.output is None
+    
+    with app.test_client() as other:
+        _login_new_user(other)
+        assert other.get(f"/api/reports/jobs/{job['id']}").status_code == 404
+
+def test_shared_price_cache():
+    """Test that price refreshes quote each symbol once across users"""
+    import app as app_module
+    from api.prices import FakePriceProvider, PriceCache, PriceProvider
+    from models.database import Investment
+    
+    class QuotesOnly(PriceProvider):
+        def get_quotes(self, symbols):
+            return {}
+    try:
+        QuotesOnly()
+        assert False, 'providers must implement get_history'
+    except TypeError:
+        pass
+    
+    class RecordingProvider(FakePriceProvider):
+        def __init__(self, seed=None):
+            super().__init__(seed)
+            self.calls = []
+        
+        def get_quotes(self, symbols):
+            symbols = list(symbols)
+            self.calls.append(symbols)
+            return super().get_quotes(symbols)
+    
+    provider = RecordingProvider(seed=7)
+    original_cache = app_module.price_cache
+    app_module.price_cache = PriceCache(provider, ttl=60)
+    try:
+        emails = []
+        for symbol in ('AAPL', 'ZZTEST'):
+            with app.test_client() as client:
+                emails.append(_login_new_user(client))
+                for held in ('AAPL', symbol):
+                    client.post('/api/investment', json={
+                        'symbol': held, 'name': held, 'shares': 2,
+                        'purchase_price': 100, 'purchase_date': '2024-01-02'
+                    })
+                response = client.get('/api/refresh-prices').get_json()
+                assert response['success']
+        
+        quoted = [symbol for call in provider.calls for symbol in call]
+        assert sorted(quoted) == ['AAPL', 'ZZTEST']
+        
+        with app.app_context():
+            user_ids = [User.query.filter_by(email=email).one().id for email in emails]
+            prices = {
+                (i.user_id, i.symbol): i.current_price
+                for i in Investment.query.filter(Investment.user_id.in_(user_ids))
+            }
+        assert prices[(user_ids[0], 'AAPL')] == prices[(user_ids[1], 'AAPL')] != 100
+        
+        app_module.price_cache.invalidate()
+        result = app.test_cli_runner().invoke(args=['refresh-prices'])
+        assert 'Refreshed prices' in result.output
+        assert len(provider.calls) == 3
+        assert len(provider.calls[-1]) == len(set(provider.calls[-1]))
+    finally:
+        app_module.price_cache = original_cache
+
+def test_portfolio_valuation():
+    """Test the daily portfolio value series, time-weighted return and drawdown"""
+    import uuid
+    from datetime import date, timedelta
+    from models.database import Investment, PriceHistory
+    from models.portfolio import PortfolioValuation, record_closes
+    
+    with app.test_client() as client:
+        email = _login_new_user(client)
+        start = date.today() - timedelta(days=4)
+        symbol = f"V{uuid.uuid4().hex[:6].upper()}"
+        
+        with app.app_context():
+            user_id = User.query.filter_by(email=email).one().id
+            for i, close in enumerate([10.0, 12.0, 9.0, 9.0, 15.0]):
+                record_closes(start + timedelta(days=i), {symbol: close})
+            db.session.add_all([
+                Investment(user_id=user_id, symbol=symbol, name='Test', shares=10,
+                           purchase_price=10.0, current_price=15.0, purchase_date=start),
+                Investment(user_id=user_id, symbol=symbol, name='Test', shares=10,
+                           purchase_price=9.0, current_price=15.0, purchase_date=start + timedelta(days=2))
+            ])
+            db.session.commit()
+            
+            valuation = PortfolioValuation.build(user_id).to_dict()
+            assert valuation['values'] == [100.0, 120.0, 180.0, 180.0, 300.0]
+            assert valuation['summary']['contributions'] == 190.0
+            # Returns: 0%, +20%, -25%, 0%, +66.7% -> 1.2 * 0.75 * 5/3 = 1.5
+            assert valuation['summary']['time_weighted_return'] == 50.0
+            assert valuation['summary']['max_drawdown'] == -25.0
+            assert valuation['summary']['max_drawdown_date'] == (start + timedelta(days=2)).isoformat()
+            
+            history = PriceHistory.query.filter_by(symbol=symbol).count()
+            assert history == 5
+        
+        ranged = client.get(f'/api/investments/performance?start={(start + timedelta(days=3)).isoformat()}')
+        assert ranged.status_code == 200
+        assert ranged.get_json()['values'] == [180.0, 300.0]
+        assert client.get('/api/investments/performance?start=tomorrow').status_code == 400
+        
+        # A holding that was never priced is valued at cost rather than at None
+        import models.portfolio as portfolio
+        with app.app_context():
+            db.session.add(Investment(user_id=user_id, symbol=f'{symbol}X', name='Unpriced', shares=1,
+                                      purchase_price=5.0, current_price=None, purchase_date=start))
+            db.session.commit()
+            saved = portfolio.NUMPY_AVAILABLE
+            try:
+                for numpy_available in {saved, False}:
+                    portfolio.NUMPY_AVAILABLE = numpy_available
+                    assert PortfolioValuation.build(user_id).to_dict()['values'][-1] == 305.0
+            finally:
+                portfolio.NUMPY_AVAILABLE = saved
+        
+        client.post('/api/investment', json={
+            'symbol': 'BKFILL', 'name': 'Backfill', 'shares': 1,
+            'purchase_price': 50, 'purchase_date': (date.today() - timedelta(days=30)).isoformat()
+        })
+        with app.app_context():
+            assert PriceHistory.query.filter_by(symbol='BKFILL').count() >= 31
+    
+    with app.test_client() as client:
+        _login_new_user(client)
+        # Reversed ranges are rejected even without holdings
+        assert client.get('/api/investments/performance?start=2020-01-01&end=2019-01-01').status_code == 400
+
+def test_goal_projections():
+    """Test batched goal projections and what-if contribution rates"""
+    from datetime import date, timedelta
+    from app import goal_projector
+    from models.database import Goal
+    
+    with app.test_client() as client:
+        email = _login_new_user(client)
+        client.get('/dashboard')
+        
+        with app.app_context():
+            user_id = User.query.filter_by(email=email).one().id
+            savings = goal_projector.monthly_savings(user_id)
+            db.session.add_all([
+                Goal(user_id=user_id, title='Near', target_amount=1000, current_amount=400,
+                     target_date=date.today() + timedelta(days=365)),
+                Goal(user_id=user_id, title='Far', target_amount=5000, current_amount=2000,
+                     target_date=date.today() + timedelta(days=30)),
+                Goal(user_id=user_id, title='Done', target_amount=100, current_amount=100,
+                     target_date=date.today() + timedelta(days=30)),
+                Goal(user_id=user_id, title='Paused', target_amount=100, status='Paused')
+            ])
+            db.session.commit()
+        
+        projection = client.get('/api/goals/projections?rates=1,2').get_json()
+        goals = {goal['title']: goal for goal in projection['goals']}
+        assert set(goals) == {'Near', 'Far', 'Done'}
+        assert projection['rates'] == [1.0, 2.0]
+        
+        # Savings are split in proportion to what each goal still needs (600 : 3000)
+        near, far = goals['Near'], goals['Far']
+        assert abs(near['projected_monthly'] - max(savings, 0) * 600 / 3600) < 0.01
+        assert abs(far['scenarios'][1]['monthly_contribution'] - 2 * far['projected_monthly']) < 0.02
+        assert far['required_monthly'] == 3000.0
+        assert goals['Done']['remaining'] == 0 and goals['Done']['on_track']
+        if savings > 0:
+            assert near['scenarios'][1]['completion_date'] <= near['scenarios'][0]['completion_date']
+        
+        assert client.get('/api/goals/projections?rates=abc').status_code == 400
+        assert client.get('/api/goals/projections?rates=-1').status_code == 400
+
+def test_notifications_at_ingest():
+    """Test ingest-time alerts, the stored unread counter and event stream delivery"""
+    from datetime import date
+    from app import commit_new_transactions, notification_center
+    from models.database import Notification, NotificationCounter, Transaction
+    
+    with app.test_client() as client:
+        email = _login_new_user(client)
+        client.get('/dashboard')
+        # Alerts must not depend on the budgets page having built the counter first
+        client.post('/api/budget', json={'category': 'Alert Test', 'monthly_limit': 1000})
+        
+        with app.app_context():
+            user_id = User.query.filter_by(email=email).one().id
+            account_id = Transaction.query.filter_by(user_id=user_id).first().account_id
+            unread = notification_center.unread_count(user_id)
+            latest_id = db.session.query(db.func.max(Notification.id)).scalar() or 0
+            subscriber = notification_center.subscribe(user_id)
+            
+            def ingest(key, amount):
+                transaction = Transaction(
+                    user_id=user_id, account_id=account_id,
+                    plaid_transaction_id=f"test_alert_{user_id}_{key}",
+                    amount=amount, date=date.today(),
+                    description='Alert Test Purchase', category='Alert Test'
+                )
+                db.session.add(transaction)
+                commit_new_transactions([transaction])
+            
+            ingest(1, -100.0)
+            assert notification_center.unread_count(user_id) == unread
+            ingest(2, -750.0)
+            ingest(3, -200.0)
+            
+            notification_center.unsubscribe(user_id, subscriber)
+            
+            raised = [n.title for n in Notification.query.filter(
+                Notification.user_id == user_id, Notification.id > latest_id).order_by(Notification.id)]
+            assert raised == ['Large transaction', 'Budget alert: Alert Test', 'Budget exceeded: Alert Test']
+            pushed = []
+            while not subscriber.empty():
+                pushed.append(subscriber.get()['title'])
+            assert pushed == raised
+            assert db.session.get(NotificationCounter, user_id).unread == unread + 3
+            assert notification_center.unread_count(user_id) == unread + 3
+            
+            # A counter left over from last month is rolled over at ingest
+            from models.database import Budget, BudgetCounter
+            counter = BudgetCounter.query.join(Budget, Budget.id == BudgetCounter.budget_id)\
+                .filter(Budget.user_id == user_id, Budget.category == 'Alert Test').one()
+            counter.month, counter.spent = date(2000, 1, 1), 0.0
+            db.session.commit()
+            ingest(4, -10.0)
+            db.session.refresh(counter)
+            assert counter.month == date.today().replace(day=1)
+            assert abs(counter.spent - 1060.0) < 0.01
+        
+        listed = client.get('/api/notifications').get_json()
+        assert listed['unread'] == unread + 3
+        assert listed['notifications'][0]['title'] == 'Budget exceeded: Alert Test'
+        assert f'>{unread + 3}</span>' in client.get('/settings').get_data(as_text=True)
+        
+        assert client.get('/api/notifications/unread').get_json() == {'unread': unread + 3}
+        
+        # Only the notifications sent are marked read
+        shown = [n['id'] for n in listed['notifications'][:2]]
+        marked = client.post('/api/notifications/read', json={'ids': shown}).get_json()
+        assert marked['marked'] == 2 and marked['unread'] == unread + 1
+        marked = client.post('/api/notifications/read').get_json()
+        assert marked['marked'] == unread + 1 and marked['unread'] == 0
+        with app.app_context():
+            assert db.session.get(NotificationCounter, user_id).unread == 0
+        
+        stream = notification_center.stream(user_id, 0, stream_seconds=0.5, retry_seconds=2)
+        assert next(stream) == 'retry: 2000\nevent: unread\ndata: {"count": 0}\n\n'
+        notification_center.publish([(user_id, {'title': 'Pushed'})])
+        assert next(stream) == 'event: notification\ndata: {"title": "Pushed"}\n\n'
+        # Streams end on their own so the worker is freed and the browser reconnects
+        assert list(stream) == []
+        assert user_id not in notification_center._subscribers
+        
+        response = client.get('/api/notifications/stream')
+        assert response.mimetype == 'text/event-stream'
+        response.close()
+
+def test_identity_cache():
+    """Test that authenticated requests load users from the identity cache"""
+    from sqlalchemy import event
+    from utils.identity import identity_cache
+    
+    with app.test_client() as client:
+        email = _login_new_user(client)
+        client.get('/dashboard')
+        
+        with app.app_context():
+            user = User.query.filter_by(email=email).one()
+            user_id = user.id
+        
+        client.get('/api/transactions?limit=1')
+        with app.app_context():
+            cached = identity_cache.get(user_id)
+            assert len(cached.account_ids) == 2
+        
+        statements = []
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            assert client.get('/api/transactions?limit=1').status_code == 200
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+        assert statements
+        # Only the data version behind the ETag is read; the user row comes from the cache
+        assert not any('user.email' in s for s in statements)
+        
+        other_account = max(cached.account_ids) + 100000
+        assert client.get(f'/api/transactions?account_id={other_account}').status_code == 404
+        
+        # A data version bump replaces the cached identity once it commits
+        client.post('/api/budget', json={'category': 'Identity Test', 'monthly_limit': 10})
+        with app.app_context():
+            refreshed = identity_cache.get(user_id)
+            assert refreshed is not cached
+            assert refreshed.data_version == cached.data_version + 1
+            
+            user = db.session.get(User, user_id)
+            user.name = 'Renamed User'
+            db.session.commit()
+            assert identity_cache.get(user_id).name == 'Renamed User'
+
+def test_password_hashing():
+    """Test bcrypt hashing off the request thread and rehash on login"""
+    from app import password_hasher
+    from utils.passwords import PasswordHasher, HashingOverloaded
+    
+    with app.test_client() as client:
+        email = _login_new_user(client)
+        with app.app_context():
+            stored = User.query.filter_by(email=email).one().password_hash
+        assert stored.startswith('$2b$%02d$' % password_hasher.bcrypt_rounds)
+        
+        # Legacy werkzeug hashes are accepted and upgraded on the next login
+        with app.app_context():
+            user = User.query.filter_by(email=email).one()
+            user.password_hash = generate_password_hash('testpassword123')
+            db.session.commit()
+        client.get('/logout')
+        assert client.post('/login', json={'email': email, 'password': 'wrong'}).status_code == 401
+        assert client.post('/login', json={'email': email, 'password': 'testpassword123'}).status_code == 200
+        with app.app_context():
+            assert User.query.filter_by(email=email).one().password_hash.startswith('$2b$')
+    
+    hasher = PasswordHasher(bcrypt_rounds=4, pbkdf2_iterations=1000)
+    long_password = 'x' * 100
+    long_hash = hasher.hash(long_password)
+    assert long_hash.startswith('pbkdf2:sha256:1000$')
+    assert hasher.verify(long_password, long_hash) == (True, False)
+    assert hasher.verify('y' * 100, long_hash) == (False, False)
+    assert hasher.verify('pw', hasher.hash('pw')) == (True, False)
+    assert PasswordHasher(bcrypt_rounds=5).verify('pw', hasher.hash('pw')) == (True, True)
+    
+    # With every slot taken, calls fail fast instead of queueing
+    busy = PasswordHasher(bcrypt_rounds=4, max_pending=1)
+    busy._slots.acquire()
+    try:
+        try:
+            busy.hash('pw')
+            assert False, 'expected HashingOverloaded'
+        except HashingOverloaded:
+            pass
+    finally:
+        busy._slots.release()
+    assert busy.hash('pw').startswith('$2b$04$')
+
+def test_lazy_components():
+    """Test heavy components are built once, on first use, not at import"""
+    import subprocess
+    import sys
+    import threading
+    from utils.lazy import LazyComponent
+    
+    # A fresh interpreter shows what importing the app alone pulls in
+    probe = ("import sys, app; "
+             "print(all(m not in sys.modules for m in ('api.plaid_client', 'nlp.intent_classifier', 'models.forecasting')))")
+    output = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, check=True,
+                            env=dict(os.environ, LOG_SAMPLE_RATES='finance.request=0,finance.chat=0'))
+    assert output.stdout.strip().splitlines()[-1] == 'True'
+    
+    calls = []
+    start = threading.Barrier(8)
+    
+    def factory():
+        calls.append(1)
+        return {'ready': True}
+    
+    component = LazyComponent(factory)
+    assert not component.loaded
+    
+    def use():
+        start.wait()
+        assert component.get()['ready']
+    
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and component.loaded
+    assert component.keys() == {'ready': True}.keys()
+    
+    # A failed build is retried on the next use
+    attempts = []
+    
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError('not yet')
+        return 'built'
+    
+    flaky_component = LazyComponent(flaky)
+    try:
+        flaky_component.get()
+        assert False, 'expected RuntimeError'
+    except RuntimeError:
+        pass
+    assert flaky_component.get() == 'built' and len(attempts) == 2
+    
+    with app.test_client() as client:
+        _login_new_user(client)
+        response = client.post('/chat', json={'message': 'what is my balance'})
+        assert response.status_code == 200
+    from app import intent_classifier
+    assert intent_classifier.loaded
+
+def test_schema_bootstrap():
+    """Test schema setup runs at startup and is skipped when the fingerprint matches"""
+    from sqlalchemy import event
+    from app import transaction_search
+    from models.database import SchemaMeta
+    from models.schema import ensure_schema, schema_fingerprint
+    
+    with app.app_context():
+        # Importing the app already brought the schema up to date
+        assert db.session.get(SchemaMeta, 'fingerprint').value == schema_fingerprint()
+        
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            assert ensure_schema(transaction_search) is False
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        assert len(statements) == 1 and 'schema_meta' in statements[0]
+        assert transaction_search.backend == 'fts5'
+        
+        # A changed model set means a new fingerprint, so the DDL runs again,
+        # adding indexes that are new on tables that already exist
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql('DROP INDEX ix_notification_user_unread')
+        db.session.get(SchemaMeta, 'fingerprint').value = 'stale'
+        db.session.commit()
+        assert ensure_schema(transaction_search) is True
+        assert db.session.get(SchemaMeta, 'fingerprint').value == schema_fingerprint()
+        assert 'ix_notification_user_unread' in {index['name'] for index in db.inspect(db.engine).get_indexes('notification')}
+    
+    runner = app.test_cli_runner()
+    assert 'up to date' in runner.invoke(args=['init-db']).output
+    assert 'Schema initialized' in runner.invoke(args=['init-db', '--force']).output
+    
+    with app.test_client() as client:
+        assert client.get('/').status_code == 200
+
+def test_synthetic_data():
+    """Test the bulk synthetic data generator and demo onboarding built on it"""
+    from app import transaction_search
+    from models.database import Account, Budget, Transaction
+    from models.synthetic import generate_users
+    
+    with app.app_context():
+        first = generate_users(3, days=90, seed=42, search=transaction_search, batch_size=2)
+        second = generate_users(3, days=90, seed=42, search=transaction_search)
+        assert first == second and first['users'] == 3 and first['accounts'] == 6
+        assert first['transactions'] > 3 * 90
+        
+        user_id = User.query.filter(User.email.like('synthetic-%')).order_by(User.id.desc()).first().id
+        categories = {category for category, in db.session.query(Transaction.category).filter_by(user_id=user_id)}
+        assert {'Income', 'Rent', 'Food and Drink'} <= categories
+        assert Budget.query.filter_by(user_id=user_id).count() > 0
+        # Rows loaded with the insert trigger dropped are still searchable
+        assert transaction_search.search(user_id, 'salary')
+        assert all(r['description'] == 'Salary Deposit' for r in transaction_search.search(user_id, 'salary'))
+    
+    result = app.test_cli_runner().invoke(args=['generate-data', '--users', '1', '--years', '0.1', '--seed', '1'])
+    assert result.exit_code == 0 and '1 users' in result.output
+    
+    with app.test_client() as client:
+        email = _login_new_user(client)
+        client.get('/dashboard')
+        with app.app_context():
+            user_id = User.query.filter_by(email=email).one().id
+            count = Transaction.query.filter_by(user_id=user_id).count()
+            assert Account.query.filter_by(user_id=user_id).count() == 2 and count > 0
+        
+        # Running the demo setup again adds nothing
+        assert client.post('/create_demo_data').get_json()['success']
+        with app.app_context():
+            assert Account.query.filter_by(user_id=user_id).count() == 2
+            assert Transaction.query.filter_by(user_id=user_id).count() == count
+        assert client.get('/api/transactions/search?q=salary').status_code == 200
+
+def test_query_budgets():
+    """Test per-request query counts in Server-Timing and strict per-route budgets"""
+    import re
+    
+    # Most statements each page may issue, first visit included; lower these as routes get cheaper
+    route_budgets = {
+        '/dashboard': 6,
+        '/api/dashboard/snapshot': 3,
+        '/api/transactions': 2,
+        '/api/forecast': 3,
+        '/api/insights': 2,
+        '/analytics': 4,
+        '/api/analytics/spending-trends': 2,
+        '/api/analytics/income-vs-expenses?months=24': 2,
+        '/budgets': 5,
+        '/goals': 2,
+        '/api/goals/projections': 2,
+        '/api/generate-report/monthly': 5,
+        '/investments': 2,
+        '/api/notifications': 2,
+    }
+    adapter = app.url_map.bind('localhost')
+    budgets = {adapter.match(path.split('?')[0])[0]: budget for path, budget in route_budgets.items()}
+    
+    def queries(response):
+        timing = ', '.join(response.headers.getlist('Server-Timing'))
+        return int(re.search(r'sql;dur=[\d.]+;desc="(\d+) quer', timing).group(1))
+    
+    saved = {key: app.config[key] for key in ('QUERY_BUDGETS', 'QUERY_BUDGET_STRICT')}
+    app.config.update(QUERY_BUDGETS=budgets, QUERY_BUDGET_STRICT=True)
+    try:
+        with app.test_client() as client:
+            _login_new_user(client)
+            app.config['QUERY_BUDGET_STRICT'] = False
+            client.get('/dashboard')  # One-off demo data seeding is not what the budgets cover
+            app.config['QUERY_BUDGET_STRICT'] = True
+            client.post('/api/budget', json={'category': 'Food and Drink', 'monthly_limit': 300})
+            for path in route_budgets:
+                for _ in range(2):
+                    response = client.get(path)
+                    assert response.status_code == 200, path
+                    assert queries(response) <= route_budgets[path], path
+            
+            # Pool threads used by run_parallel count towards the request
+            assert queries(client.get('/api/dashboard/snapshot')) == 3
+            assert 'app;dur=' in ', '.join(client.get('/goals').headers.getlist('Server-Timing'))
+            
+            app.config['QUERY_BUDGETS'] = dict(budgets, **{adapter.match('/api/notifications')[0]: 0})
+            assert client.get('/api/notifications').status_code == 500
+    finally:
+        app.config.update(saved)
+
+def test_request_profiling():
+    """Test signed-header and admin-armed request profiling"""
+    import tempfile
+    from app import request_profiler
+    from utils.profiling import sign_profile_token
+    
+    output_dir = tempfile.mkdtemp(prefix='profiles_')
+    request_profiler.secret, request_profiler.output_dir = 'test-secret', output_dir
+    try:
+        with app.test_client() as client:
+            email = _login_new_user(client)
+            client.get('/dashboard')
+            assert 'X-Profile-Id' not in client.get('/dashboard').headers
+            assert 'X-Profile-Id' not in client.get('/dashboard', headers={'X-Profile': sign_profile_token('wrong')}).headers
+            
+            response = client.get('/dashboard', headers={'X-Profile': sign_profile_token('test-secret')})
+            assert response.status_code == 200
+            directory = os.path.join(output_dir, response.headers['X-Profile-Id'])
+            assert {'profile.prof', 'summary.txt', 'sql.json', 'request.json'} <= set(os.listdir(directory))
+            with open(os.path.join(directory, 'request.json')) as f:
+                meta = json.load(f)
+            with open(os.path.join(directory, 'sql.json')) as f:
+                timeline = json.load(f)
+            assert meta['endpoint'] == 'dashboard' and meta['render_ms'] > 0
+            assert meta['sql_queries'] == len(timeline) > 0
+            assert all(entry['sql'] and entry['duration_ms'] >= 0 for entry in timeline)
+            with open(os.path.join(directory, 'summary.txt')) as f:
+                assert 'dashboard' in f.read()
+            
+            # Arming a user profiles their next requests on this worker, then stops
+            token = sign_profile_token('test-secret')
+            assert client.post('/api/admin/profile', json={'email': email}).status_code == 403
+            armed = client.post('/api/admin/profile', json={'email': email, 'requests': 2},
+                                headers={'Authorization': f'Bearer {token}'})
+            assert armed.get_json()['armed']
+            assert 'X-Profile-Id' in client.get('/api/forecast').headers
+            assert 'X-Profile-Id' in client.get('/goals').headers
+            assert 'X-Profile-Id' not in client.get('/goals').headers
+    finally:
+        request_profiler.secret = None
+
+
 if __name__ == '__main__':
     print("🧪 Running Finance Mentor AI Tests\n")
     
@@ -93,4 +1183,4 @@ if __name__ == '__main__':
         test_forecasting()
     
     print("\n✅ All tests completed successfully!")
-    print("🚀 Ready for deployment!")
\ No newline at end of file
+    print("🚀 Ready for deployment!")
@@ -0,0 +1,64 @@
+import gzip
+
+# Optional imports for enhanced functionality
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/html', 'text/plain', 'text/csv', 'application/x-ndjson')
+
+def available_encodings():
+    """Encodings this process can produce, in order of preference"""
+    return ['br', 'gzip'] if BROTLI_AVAILABLE else ['gzip']
+
+def encoded_etags(etag):
+    """All ETags a resource may carry: identity plus one per content encoding"""
+    return [etag] + [f'{etag}-{encoding}' for encoding in available_encodings()]
+
+def choose_encoding(accept_encodings):
+    """Pick the best encoding the client accepts, or None for identity"""
+    for encoding in available_encodings():
+        if accept_encodings[encoding]:
+            return encoding
+    return None
+
+def compress(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=level)
+
+def init_app(app):
+    """Compress eligible responses according to the request's Accept-Encoding"""
+    from flask import request
+    
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    level = app.config.get('COMPRESS_LEVEL', 6)
+    
+    @app.after_request
+    def _compress_response(response):
+        if (response.status_code != 200
+                or response.direct_passthrough
+                or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_TYPES):
+            return response
+        
+        response.vary.add('Accept-Encoding')
+        if response.content_length is not None and response.content_length < min_size:
+            return response
+        
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+        
+        response.set_data(compress(response.get_data(), encoding, level))
+        response.headers['Content-Encoding'] = encoding
+        
+        # A strong validator must differ per representation
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(f'{etag}-{encoding}')
+        
+        return response
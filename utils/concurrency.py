@@ -0,0 +1,52 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from models.database import db
+from utils.query_stats import bind, current_stats
+
+_executor = None
+_executor_lock = threading.Lock()
+_worker_state = threading.local()
+
+def _get_executor(max_workers):
+    """Create the shared query pool on first use"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='query')
+    return _executor
+
+def _run_in_app_context(app, func, stats):
+    """Run a query callable inside its own app context (and so its own session)"""
+    with app.app_context(), bind(stats):
+        _worker_state.active = True
+        try:
+            return func()
+        finally:
+            _worker_state.active = False
+            db.session.remove()
+
+def run_parallel(**queries):
+    """Run independent read queries concurrently and return their results by name.
+
+    Each callable runs in a pool thread with its own app context, so it gets its
+    own database session. Callables must not touch ``current_user`` or the
+    request; pass ids in explicitly. Calls made from inside a pool thread, or
+    with QUERY_WORKERS <= 1, run sequentially in the calling thread.
+    """
+    max_workers = current_app.config.get('QUERY_WORKERS', 4)
+    if max_workers <= 1 or len(queries) <= 1 or getattr(_worker_state, 'active', False):
+        return {name: func() for name, func in queries.items()}
+
+    app = current_app._get_current_object()
+    executor = _get_executor(max_workers)
+    # Queries on the pool threads still count towards the calling request
+    stats = current_stats()
+    futures = {
+        name: executor.submit(_run_in_app_context, app, func, stats)
+        for name, func in queries.items()
+    }
+    return {name: future.result() for name, future in futures.items()}
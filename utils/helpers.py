@@ -76,6 +76,11 @@ def get_date_range(period):
     
     return start_date, end_date
 
+def add_months(day, months):
+    """Return the first day of the calendar month `months` away from `day`'s month"""
+    month_index = day.year * 12 + (day.month - 1) + months
+    return day.replace(year=month_index // 12, month=month_index % 12 + 1, day=1)
+
 def calculate_spending_velocity(transactions):
     """Calculate how fast user is spending money"""
     if not transactions or len(transactions) < 2:
@@ -0,0 +1,63 @@
+import hashlib
+from datetime import datetime
+from functools import wraps
+
+from flask import request, make_response
+from flask_login import current_user
+
+from models.database import db, UserDataVersion
+from utils.compression import encoded_etags
+from utils.identity import invalidate_after_commit
+
+def get_data_version(user_id):
+    """Current data version for a user (0 if their data has never changed)"""
+    version = db.session.query(UserDataVersion.version).filter_by(user_id=user_id).scalar()
+    return version or 0
+
+def bump_data_version(user_ids):
+    """Mark users' data as changed. Call before committing the change itself."""
+    user_ids = set(user_ids)
+    invalidate_after_commit(user_ids)
+    for user_id in user_ids:
+        updated = UserDataVersion.query.filter_by(user_id=user_id).update(
+            {UserDataVersion.version: UserDataVersion.version + 1,
+             UserDataVersion.updated_at: datetime.utcnow()},
+            synchronize_session=False
+        )
+        if not updated:
+            db.session.add(UserDataVersion(user_id=user_id, version=1))
+
+def compute_etag(user_id, version):
+    """Strong validator from the user, their data version, today's date and the request"""
+    # Date is included because forecasts and month-to-date figures roll over daily
+    params = '&'.join(f'{key}={value}' for key, value in sorted(request.args.items(multi=True)))
+    key = f'{user_id}:{version}:{datetime.now().date().isoformat()}:{request.path}?{params}'
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+def conditional_json(func):
+    """Answer If-None-Match with 304 before running the endpoint.
+
+    Successful responses carry an ETag and `Cache-Control: private, no-cache`,
+    so browsers keep them but revalidate on every use.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        # Read from the database: the identity cache's copy can be stale on other workers
+        etag = compute_etag(current_user.id, get_data_version(current_user.id))
+        
+        # Compressed representations carry an encoding suffix on the same validator
+        matched = next((tag for tag in encoded_etags(etag) if tag in request.if_none_match), None)
+        if matched:
+            response = make_response('', 304)
+            response.set_etag(matched)
+        else:
+            response = make_response(func(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            response.set_etag(etag)
+        
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.vary.add('Cookie')
+        return response
+    
+    return wrapper
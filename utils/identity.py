@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.database import db, Account, User, UserDataVersion
+
+class CachedUser(UserMixin):
+    """Read-only identity for current_user, with per-user metadata handlers reuse"""
+
+    def __init__(self, id, email, name, account_ids, data_version):
+        self.id = id
+        self.email = email
+        self.name = name
+        self.account_ids = account_ids
+        self.data_version = data_version
+
+class IdentityCache:
+    """Short-TTL LRU of authenticated users, so requests skip the users table.
+
+    Entries are dropped when the user row changes or their data version is
+    bumped, once that transaction commits. Other processes are not told, so
+    they may serve a stale entry for up to `ttl` seconds.
+    """
+
+    def __init__(self, max_users=4096, ttl=30):
+        self.max_users = max_users
+        self.ttl = ttl
+        self._users = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        """Cached identity for a user id, loading it on a miss; None if the user doesn't exist"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._users.move_to_end(user_id)
+                return entry[0]
+            generation = self._generation
+
+        user = self._load(user_id)
+        with self._lock:
+            # Skip caching a load that an invalidation may have overtaken
+            if user is not None and generation == self._generation:
+                self._users[user_id] = (user, now)
+                self._users.move_to_end(user_id)
+                while len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+        return user
+
+    def invalidate(self, user_ids):
+        with self._lock:
+            self._generation += 1
+            for user_id in user_ids:
+                self._users.pop(user_id, None)
+
+    def _load(self, user_id):
+        row = db.session.query(User.id, User.email, User.name, UserDataVersion.version)\
+            .outerjoin(UserDataVersion, UserDataVersion.user_id == User.id)\
+            .filter(User.id == user_id).first()
+        if row is None:
+            return None
+        account_ids = tuple(account_id for account_id, in db.session.query(Account.id).filter(Account.user_id == user_id))
+        return CachedUser(row.id, row.email, row.name, account_ids, row.version or 0)
+
+identity_cache = IdentityCache()
+
+def invalidate_after_commit(user_ids, session=None):
+    """Drop users' cached identities once the current transaction commits"""
+    if session is None:
+        session = db.session()
+    session.info.setdefault('stale_identities', set()).update(user_ids)
+
+def init_app(app, login_manager):
+    """Size the identity cache from app config and load users through it"""
+    identity_cache.ttl = app.config.get('IDENTITY_CACHE_TTL', 30)
+    identity_cache.max_users = app.config.get('IDENTITY_CACHE_SIZE', 4096)
+
+    @login_manager.user_loader
+    def load_user(user_id):
+        return identity_cache.get(int(user_id))
+
+@event.listens_for(Session, 'before_flush')
+def _track_user_changes(session, flush_context, instances):
+    changed = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            changed.add(obj.id)
+        elif isinstance(obj, Account) and obj.user_id is not None:
+            changed.add(obj.user_id)
+    if changed:
+        invalidate_after_commit(changed, session)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    stale = session.info.pop('stale_identities', None)
+    if stale:
+        identity_cache.invalidate(stale)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop('stale_identities', None)
@@ -0,0 +1,44 @@
+from flask.json.provider import DefaultJSONProvider
+
+# Optional imports for enhanced functionality
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider that serializes with orjson when it is installed.
+
+    Falls back to Flask's stdlib-based provider otherwise. Dates, decimals and
+    other types orjson doesn't handle the same way are passed to Flask's
+    default hook, so the output matches the stdlib provider.
+    """
+    
+    def dumps(self, obj, **kwargs):
+        if not ORJSON_AVAILABLE or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._dumps_bytes(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        if not ORJSON_AVAILABLE or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        if not ORJSON_AVAILABLE:
+            return super().response(*args, **kwargs)
+        
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self._dumps_bytes(obj, indent=indent) + b'\n', mimetype=self.mimetype
+        )
+    
+    def _dumps_bytes(self, obj, indent=False):
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option)
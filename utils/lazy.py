@@ -0,0 +1,34 @@
+import threading
+
+class LazyComponent:
+    """Builds a component on first use instead of at import time.
+
+    Attribute access is forwarded to the instance, so a LazyComponent can
+    stand in wherever the component itself was used. The factory runs at
+    most once, even when several request threads hit a cold component
+    together; the others wait for the first to finish. If the factory
+    raises, nothing is cached and the next access tries again.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """The component, building it if this is the first use"""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    @property
+    def loaded(self):
+        return self._instance is not None
+
+    def __getattr__(self, name):
+        # Dunder lookups (copy, pickle, repr helpers) shouldn't build the component
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
@@ -0,0 +1,134 @@
+import atexit
+import copy
+import hashlib
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+ROOT_LOGGER = 'finance'
+
+_listener = None
+
+class JSONFormatter(logging.Formatter):
+    """Format records as one JSON object per line, merging structured fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': record.getMessage()
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class DeferredQueueHandler(QueueHandler):
+    """Enqueue records unformatted so the listener thread does the formatting.
+
+    The stock prepare() formats the message and drops exc_info on the calling
+    thread; this only copies the record, exception info included.
+    """
+
+    def prepare(self, record):
+        return copy.copy(record)
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of records below WARNING; warnings and errors always pass"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+def get_logger(name):
+    """Get a logger under the application's root logger"""
+    if name != ROOT_LOGGER and not name.startswith(ROOT_LOGGER + '.'):
+        name = f'{ROOT_LOGGER}.{name}'
+    return logging.getLogger(name)
+
+def log_event(logger, level, event, **fields):
+    """Log an event with structured fields"""
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={'fields': fields})
+
+def hash_user_id(user_id):
+    """Stable, non-reversible identifier for correlating a user's log lines"""
+    if user_id is None:
+        return None
+    return hashlib.sha256(f'user:{user_id}'.encode()).hexdigest()[:12]
+
+def parse_sample_rates(value):
+    """Parse 'finance.request=0.1,finance.chat=0.5' into a dict of rates"""
+    rates = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            name, rate = item.split('=', 1)
+            rates[name.strip()] = float(rate)
+    return rates
+
+def configure_logging(level='INFO', sample_rates=None, stream=None):
+    """Route application logs through a queue to a background JSON writer.
+
+    Request threads only enqueue records; formatting and the stdout write happen
+    on the listener thread.
+    """
+    global _listener
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level)
+    root.propagate = False
+
+    for name, rate in (sample_rates or {}).items():
+        logger = get_logger(name)
+        for existing in [f for f in logger.filters if isinstance(f, SamplingFilter)]:
+            logger.removeFilter(existing)
+        logger.addFilter(SamplingFilter(rate))
+
+    if _listener is not None:
+        return root
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JSONFormatter())
+
+    log_queue = queue.SimpleQueue()
+    root.addHandler(DeferredQueueHandler(log_queue))
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    return root
+
+def init_app(app):
+    """Configure logging from app config and log one line per request"""
+    from flask import g, request
+    from flask_login import current_user
+
+    configure_logging(app.config.get('LOG_LEVEL', 'INFO'), app.config.get('LOG_SAMPLE_RATES'))
+    request_logger = get_logger('request')
+
+    @app.before_request
+    def _start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _log_request(response):
+        started = g.pop('request_started', None)
+        if started is not None and request_logger.isEnabledFor(logging.INFO):
+            user_id = current_user.get_id() if current_user else None
+            log_event(request_logger, logging.INFO, 'request',
+                      route=request.url_rule.rule if request.url_rule else request.path,
+                      method=request.method,
+                      status=response.status_code,
+                      user=hash_user_id(user_id),
+                      duration_ms=round((time.perf_counter() - started) * 1000, 2))
+        return response
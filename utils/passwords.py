@@ -0,0 +1,98 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Optional imports for enhanced functionality
+try:
+    import bcrypt
+    BCRYPT_AVAILABLE = True
+except ImportError:
+    BCRYPT_AVAILABLE = False
+
+# bcrypt only reads this many bytes of a password; longer ones are hashed with PBKDF2 instead
+BCRYPT_MAX_BYTES = 72
+
+class HashingOverloaded(Exception):
+    """Too many password hashes are already queued; the caller should retry later"""
+
+class PasswordHasher:
+    """Hashes and verifies passwords on a bounded worker pool.
+
+    bcrypt and PBKDF2 release the GIL while they run, so a pool sized to the
+    CPU count hashes in parallel while request threads just wait. At most
+    `max_pending` operations may be queued or running; beyond that calls fail
+    fast with HashingOverloaded instead of piling up behind a login storm.
+
+    New hashes use the configured scheme and cost. verify() also reports
+    whether a stored hash is weaker than that (another scheme, such as
+    werkzeug's scrypt default, or a lower cost) so callers can upgrade it
+    while they have the plaintext.
+    """
+
+    def __init__(self, scheme='bcrypt', bcrypt_rounds=12, pbkdf2_iterations=600000,
+                 max_workers=None, max_pending=32):
+        if scheme == 'bcrypt' and not BCRYPT_AVAILABLE:
+            scheme = 'pbkdf2'
+        self.scheme = scheme
+        self.bcrypt_rounds = bcrypt_rounds
+        self.pbkdf2_iterations = pbkdf2_iterations
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def hash(self, password):
+        """Hash a password with the configured scheme and cost"""
+        return self._submit(self._hash, password)
+
+    def verify(self, password, stored_hash):
+        """Check a password; returns (matches, needs_rehash)"""
+        matches = self._submit(self._verify, password, stored_hash)
+        return matches, matches and self.needs_rehash(stored_hash, password)
+
+    def needs_rehash(self, stored_hash, password):
+        """Whether stored_hash uses a weaker scheme or cost than new hashes would"""
+        scheme = self._scheme_for(password)
+        if scheme == 'bcrypt':
+            if not stored_hash.startswith('$2'):
+                return True
+            return int(stored_hash.split('$')[2]) < self.bcrypt_rounds
+        method = stored_hash.split('$', 1)[0].split(':')
+        if method[0] != 'pbkdf2':
+            return True
+        return int(method[2]) < self.pbkdf2_iterations if len(method) > 2 else True
+
+    def _submit(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingOverloaded('Password hashing is at capacity')
+        try:
+            return self._get_executor().submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='hash')
+        return self._executor
+
+    def _scheme_for(self, password):
+        if self.scheme == 'bcrypt' and len(password.encode()) > BCRYPT_MAX_BYTES:
+            return 'pbkdf2'
+        return self.scheme
+
+    def _hash(self, password):
+        if self._scheme_for(password) == 'bcrypt':
+            salt = bcrypt.gensalt(rounds=self.bcrypt_rounds)
+            return bcrypt.hashpw(password.encode(), salt).decode()
+        return generate_password_hash(password, method=f'pbkdf2:sha256:{self.pbkdf2_iterations}')
+
+    def _verify(self, password, stored_hash):
+        if stored_hash.startswith('$2'):
+            if not BCRYPT_AVAILABLE:
+                return False
+            return bcrypt.checkpw(password.encode()[:BCRYPT_MAX_BYTES], stored_hash.encode())
+        return check_password_hash(stored_hash, password)
@@ -0,0 +1,186 @@
+import cProfile
+import hashlib
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from utils.log import get_logger, hash_user_id, log_event
+
+# Optional imports for enhanced functionality
+try:
+    import pyinstrument
+    PYINSTRUMENT_AVAILABLE = True
+except ImportError:
+    PYINSTRUMENT_AVAILABLE = False
+
+logger = get_logger('profiling')
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_MODE_HEADER = 'X-Profile-Mode'
+PROFILE_MODES = ('cprofile', 'sampling')
+
+def sign_profile_token(secret, ttl=900):
+    """Token for the X-Profile header, valid for `ttl` seconds"""
+    expires = int(time.time()) + ttl
+    signature = hmac.new(secret.encode(), str(expires).encode(), hashlib.sha256).hexdigest()
+    return f'{expires}.{signature}'
+
+def verify_profile_token(secret, token):
+    """Whether a token was signed with `secret` and hasn't expired"""
+    expires, _, signature = (token or '').partition('.')
+    if not secret or not expires.isdigit() or int(expires) < time.time():
+        return False
+    expected = hmac.new(secret.encode(), expires.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, expected)
+
+class RequestProfiler:
+    """Profiles single requests on demand and saves the results for offline analysis.
+
+    A request is profiled when it carries an X-Profile header signed with the
+    profiling secret, or when it comes from a user an operator armed with
+    arm(). Each profile is a directory under `output_dir` holding the call
+    graph (profile.prof for pstats/snakeviz, or a sampling profile when
+    pyinstrument is installed), a text summary, the SQL timeline and the
+    time spent rendering templates. Every other request pays one header
+    lookup and a check of an empty dict. Armed users are per process.
+    """
+
+    def __init__(self, secret=None, output_dir='/tmp/finance_profiles', mode='cprofile'):
+        self.secret = secret
+        self.output_dir = output_dir
+        self.mode = mode
+        self._armed = {}
+        self._lock = threading.Lock()
+
+    def arm(self, user_id, requests=1):
+        """Profile the user's next `requests` requests served by this process"""
+        with self._lock:
+            self._armed[str(user_id)] = requests
+
+    def wants(self, headers, user_id_getter):
+        """Whether to profile this request, consuming one armed request if that's the reason"""
+        if self.secret and PROFILE_HEADER in headers:
+            return verify_profile_token(self.secret, headers[PROFILE_HEADER])
+        if not self._armed:
+            return False
+        user_id = str(user_id_getter())
+        with self._lock:
+            remaining = self._armed.get(user_id)
+            if not remaining:
+                return False
+            if remaining == 1:
+                del self._armed[user_id]
+            else:
+                self._armed[user_id] = remaining - 1
+        return True
+
+    def start(self, mode=None):
+        mode = mode if mode in PROFILE_MODES else self.mode
+        if mode == 'sampling' and PYINSTRUMENT_AVAILABLE:
+            profiler = pyinstrument.Profiler()
+            profiler.start()
+            return profiler
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def save(self, profiler, stats, render_ms, meta):
+        """Stop the profiler and write its results; returns the profile's id"""
+        profile_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{meta['endpoint'] or 'unknown'}-{uuid.uuid4().hex[:6]}"
+        directory = os.path.join(self.output_dir, profile_id)
+        os.makedirs(directory, exist_ok=True)
+
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            profiler.dump_stats(os.path.join(directory, 'profile.prof'))
+            summary = io.StringIO()
+            pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(40)
+            meta['profiler'] = 'cprofile'
+        else:
+            profiler.stop()
+            with open(os.path.join(directory, 'profile.html'), 'w') as f:
+                f.write(profiler.output_html())
+            summary = io.StringIO(profiler.output_text())
+            meta['profiler'] = 'sampling'
+
+        with open(os.path.join(directory, 'summary.txt'), 'w') as f:
+            f.write(summary.getvalue())
+        with open(os.path.join(directory, 'sql.json'), 'w') as f:
+            json.dump(stats.statements or [], f, indent=2)
+        meta.update(
+            sql_queries=stats.count,
+            sql_ms=round(stats.duration * 1000, 2),
+            render_ms=round(render_ms, 2),
+        )
+        with open(os.path.join(directory, 'request.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+        log_event(logger, logging.INFO, 'request_profiled', profile=profile_id,
+                  endpoint=meta['endpoint'], total_ms=meta['total_ms'])
+        return profile_id
+
+def init_app(app, profiler):
+    """Configure the profiler from app config and profile requests that ask for it.
+
+    Must be initialized after utils.query_stats, whose per-request stats carry
+    the SQL timeline.
+    """
+    from flask import before_render_template, g, request, template_rendered
+    from flask_login import current_user
+
+    profiler.secret = app.config.get('PROFILE_SECRET')
+    profiler.output_dir = app.config.get('PROFILE_DIR', profiler.output_dir)
+    profiler.mode = app.config.get('PROFILE_MODE', profiler.mode)
+
+    @app.before_request
+    def _start_profile():
+        if not profiler.wants(request.headers, current_user.get_id):
+            return
+        g.query_stats.record_statements()
+        g.profile_render = [0.0, None]
+        g.profile_started = time.perf_counter()
+        g.profile = profiler.start(request.headers.get(PROFILE_MODE_HEADER))
+
+    @app.after_request
+    def _save_profile(response):
+        active = g.pop('profile', None)
+        if active is None:
+            return response
+        profile_id = profiler.save(active, g.query_stats, g.profile_render[0], {
+            'method': request.method,
+            'path': request.full_path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'user': hash_user_id(current_user.get_id()),
+            'total_ms': round((time.perf_counter() - g.profile_started) * 1000, 2),
+        })
+        response.headers['X-Profile-Id'] = profile_id
+        return response
+
+    @app.teardown_request
+    def _stop_profile(exc):
+        # The request failed before after_request could save it
+        active = g.pop('profile', None)
+        if isinstance(active, cProfile.Profile):
+            active.disable()
+        elif active is not None:
+            active.stop()
+
+    def _render_started(sender, template, context, **extra):
+        if 'profile' in g:
+            g.profile_render[1] = time.perf_counter()
+
+    def _render_finished(sender, template, context, **extra):
+        if 'profile' in g and g.profile_render[1] is not None:
+            g.profile_render[0] += (time.perf_counter() - g.profile_render[1]) * 1000
+            g.profile_render[1] = None
+
+    before_render_template.connect(_render_started, app, weak=False)
+    template_rendered.connect(_render_finished, app, weak=False)
@@ -0,0 +1,133 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from utils.log import get_logger, log_event
+
+logger = get_logger('sql')
+
+_state = threading.local()
+
+class QueryBudgetExceeded(AssertionError):
+    """A request issued more SQL statements than its route's budget allows"""
+
+class QueryStats:
+    """SQL statements issued for one request, and the time spent in them, across threads.
+
+    Call record_statements() to also keep each statement's text and timing,
+    as the request profiler does.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.started = time.perf_counter()
+        self.statements = None
+        self._lock = threading.Lock()
+
+    def record_statements(self):
+        self.statements = []
+
+    def add(self, duration, statement=None):
+        with self._lock:
+            self.count += 1
+            self.duration += duration
+            if self.statements is not None:
+                finished = time.perf_counter()
+                self.statements.append({
+                    'start_ms': round((finished - duration - self.started) * 1000, 3),
+                    'duration_ms': round(duration * 1000, 3),
+                    'thread': threading.current_thread().name,
+                    'sql': statement,
+                })
+
+def current_stats():
+    """Stats that queries on this thread are attributed to, if any"""
+    return getattr(_state, 'stats', None)
+
+@contextmanager
+def bind(stats):
+    """Attribute this thread's queries to `stats`, e.g. in a pool worker serving a request"""
+    previous = current_stats()
+    _state.stats = stats
+    try:
+        yield stats
+    finally:
+        _state.stats = previous
+
+def parse_budgets(value):
+    """Parse 'dashboard=10,api_forecast=5' into a dict of per-endpoint query budgets"""
+    budgets = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            endpoint, budget = item.split('=', 1)
+            budgets[endpoint.strip()] = int(budget)
+    return budgets
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and current_stats() is not None:
+        context._query_started = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _finish_query(conn, cursor, statement, parameters, context, executemany):
+    stats = current_stats()
+    started = getattr(context, '_query_started', None)
+    if stats is not None and started is not None:
+        stats.add(time.perf_counter() - started, statement)
+
+def init_app(app):
+    """Count and time each request's SQL, report it in Server-Timing and flag routes over budget.
+
+    Budgets are read from app config on every request: QUERY_BUDGET statements
+    and QUERY_TIME_BUDGET_MS milliseconds by default, with per-endpoint query
+    budgets in QUERY_BUDGETS. Requests over budget are logged; with
+    QUERY_BUDGET_STRICT a request over its query budget raises instead, so
+    tests fail when a route starts issuing more queries. Queries made while a
+    streamed body is being sent happen after the response and aren't counted.
+    """
+    from flask import g, request
+
+    @app.before_request
+    def _start_query_stats():
+        g.query_stats_started = time.perf_counter()
+        g.query_stats = _state.stats = QueryStats()
+
+    @app.after_request
+    def _report_query_stats(response):
+        stats = g.pop('query_stats', None)
+        _state.stats = None
+        if stats is None:
+            return response
+
+        sql_ms = stats.duration * 1000
+        duration_ms = (time.perf_counter() - g.pop('query_stats_started')) * 1000
+        if app.config.get('SERVER_TIMING', True):
+            noun = 'query' if stats.count == 1 else 'queries'
+            response.headers.add('Server-Timing', f'sql;dur={sql_ms:.2f};desc="{stats.count} {noun}"')
+            response.headers.add('Server-Timing', f'app;dur={duration_ms:.2f}')
+
+        query_budget = app.config.get('QUERY_BUDGETS', {}).get(request.endpoint, app.config.get('QUERY_BUDGET', 25))
+        time_budget = app.config.get('QUERY_TIME_BUDGET_MS', 250)
+        if stats.count > query_budget or duration_ms > time_budget:
+            log_event(logger, logging.WARNING, 'request_over_budget',
+                      route=request.url_rule.rule if request.url_rule else request.path,
+                      endpoint=request.endpoint,
+                      queries=stats.count,
+                      query_budget=query_budget,
+                      sql_ms=round(sql_ms, 2),
+                      duration_ms=round(duration_ms, 2),
+                      time_budget_ms=time_budget)
+            if stats.count > query_budget and app.config.get('QUERY_BUDGET_STRICT'):
+                raise QueryBudgetExceeded(
+                    f'{request.endpoint} issued {stats.count} queries; its budget is {query_budget}'
+                )
+        return response
+
+    @app.teardown_request
+    def _clear_query_stats(exc):
+        _state.stats = None